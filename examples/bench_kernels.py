@@ -0,0 +1,86 @@
+"""
+Compare tinygpu.kernels with the naive example kernels.
+
+reduce_sum.tgpu needs N / 2 threads and a global SYNC per phase;
+odd_even_sort.tgpu needs N phases. Prints cycles, thread-instructions
+and wall time of both for a few sizes on the vector engine.
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+# make local 'src' package available so imports resolve when running this script
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, src_path)
+
+from tinygpu import kernels  # noqa: E402
+from tinygpu.assembler import assemble_file  # noqa: E402
+from tinygpu.gpu import TinyGPU  # noqa: E402
+
+HERE = os.path.dirname(__file__)
+
+
+def run_example(name, data, defines, num_threads):
+    """Run an example kernel (without its final ``done: JMP done`` spin);
+    reduce_sum's idle threads read past the array, which is ignored."""
+    program, labels = assemble_file(os.path.join(HERE, name), defines=defines)
+    program = program[:-1]
+    gpu = TinyGPU(
+        num_threads=num_threads,
+        num_registers=12,
+        mem_size=len(data) + 1,
+        record_history=False,
+        engine="vector",
+        fault_policy="ignore",
+    )
+    gpu.memory[: len(data)] = data
+    gpu.memory[len(data)] = np.iinfo(np.int32).max  # odd-even sentinel
+    gpu.load_program(program, labels)
+    start = time.perf_counter()
+    gpu.run(max_cycles=10**6)
+    elapsed = time.perf_counter() - start
+    return gpu, {
+        "cycles": gpu.cycle,
+        "instructions": gpu.instructions_executed,
+        "seconds": elapsed,
+    }
+
+
+def run_library(func, *args):
+    stats = {}
+    start = time.perf_counter()
+    result = func(*args, stats=stats)
+    stats["seconds"] = time.perf_counter() - start
+    return result, stats
+
+
+def report(label, n, naive, library):
+    print(
+        f"{label:<8}{n:>6}  naive {naive['cycles']:>6} cycles "
+        f"{naive['instructions']:>9} instr {naive['seconds']:7.3f}s  |  "
+        f"kernels {library['cycles']:>6} cycles "
+        f"{library['instructions']:>9} instr {library['seconds']:7.3f}s"
+    )
+
+
+def main(sizes=(16, 64, 256, 1024)):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        data = rng.integers(0, 100, size=n)
+        gpu, naive = run_example(
+            "reduce_sum.tgpu", data, {"PHASES": n.bit_length() - 1}, n // 2
+        )
+        total, library = run_library(kernels.reduce, data)
+        assert gpu.memory[0] == total == data.sum()
+        report("reduce", n, naive, library)
+
+        gpu, naive = run_example("odd_even_sort.tgpu", data, {"N": n}, n // 2)
+        result, library = run_library(kernels.sort, data)
+        assert (gpu.memory[:n] == result).all()
+        report("sort", n, naive, library)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
 sys.path.insert(0, src_path)
 
 from tinygpu.assembler import assemble_file  # noqa: E402
+from tinygpu.debug import Debugger  # noqa: E402
 from tinygpu.gpu import TinyGPU  # noqa: E402
+from tinygpu.inspection import state_view  # noqa: E402
 from tinygpu.visualizer import visualize  # noqa: E402
 
 # config - change program path
@@ -15,10 +17,12 @@ program, labels = assemble_file(prog_path)
 
 gpu = TinyGPU(num_threads=4, num_registers=8, mem_size=64)
 gpu.load_program(program, labels)
+dbg = Debugger(gpu)
 
 print("TinyGPU debug REPL")
 print("Commands: s(step), n <k>(step k), p(print snapshot), v(visualize),")
-print("r <k>(rewind k), q(quit)")
+print("r <k>(rewind k), b <pc|label>(break), w <addr>(watch), d(delete all),")
+print("c(continue), q(quit)")
 
 while True:
     cmd = input("dbg> ").strip().split()
@@ -29,21 +33,21 @@ while True:
         break
     if c in ("s", "step"):
         gpu.step_single()
-        snap = gpu.snapshot(mem_slice=(0, 16), regs_threads=[0, 1])
-        print(f"cycle {snap['cycle']} pc: {snap['pc']}")
-        print("R0..R1 for threads 0,1:")
-        for tid in [0, 1]:
-            print(f" T{tid} regs:", snap["registers"][tid][:4])
+        view = state_view(gpu, threads=(0, 2), registers=(0, 4))
+        print(f"cycle {view.cycle} pc: {gpu.pc}")
+        print("R0..R3 for threads 0,1:")
+        for tid, regs in zip(view.tids, view.registers, strict=True):
+            print(f" T{tid} regs:", regs)
     elif c in ("n", "stepk"):
         k = int(cmd[1]) if len(cmd) > 1 else 1
         for _ in range(k):
             gpu.step_single()
         print("advanced", k, "cycles")
     elif c in ("p", "print"):
-        snap = gpu.snapshot(mem_slice=(0, 32))
-        print("PC:", snap["pc"])
-        print("Flags:", snap["flags"])
-        print("Mem[0..32]:", snap["memory_slice"])
+        view = state_view(gpu, memory=(0, 32))
+        print("PC:", view.pc)
+        print("Flags:", view.flags)
+        print("Mem[0..32]:", view.memory)
     elif c in ("v", "viz", "visualize"):
         visualize(gpu, show_pc=True)
     elif c in ("r", "rewind"):
@@ -53,5 +57,22 @@ while True:
             print("rewound", k, "cycles")
         except Exception as e:
             print("rewind error:", e)
+    elif c in ("b", "break") and len(cmd) > 1:
+        target = int(cmd[1]) if cmd[1].isdigit() else cmd[1]
+        try:
+            print("set", dbg.break_at(target).describe())
+        except KeyError as e:
+            print("break error:", e)
+    elif c in ("w", "watch") and len(cmd) > 1:
+        print("set", dbg.watch(int(cmd[1])).describe())
+    elif c in ("d", "delete"):
+        dbg.clear()
+        print("deleted all breakpoints")
+    elif c in ("c", "continue"):
+        hits = dbg.run(max_cycles=100000)
+        for hit in hits:
+            print(hit)
+        if not hits:
+            print("finished at cycle", gpu.cycle)
     else:
         print("unknown command")
@@ -10,6 +10,7 @@ sys.path.insert(0, src_path)
 
 from tinygpu.gpu import TinyGPU  # noqa: E402
 from tinygpu.assembler import assemble_file  # noqa: E402
+from tinygpu.allocator import DeviceAllocator  # noqa: E402
 
 ARRAY_LEN = 8  # total elements (must equal num_blocks * tpb)
 NUM_BLOCKS = 2
@@ -22,15 +23,22 @@ program, labels = assemble_file(prog_path)
 
 # create gpu with total threads
 gpu = TinyGPU(num_threads=NUM_BLOCKS * TPB, num_registers=12, mem_size=MEM_SIZE)
-gpu.set_grid(NUM_BLOCKS, TPB, shared_size=SHARED_SIZE)
+heap = DeviceAllocator(gpu)
 
-# prepare input values per thread in global memory at index tid
+# copy input values (one per thread) to the device, allocate block results
 arr = np.arange(1, ARRAY_LEN + 1)  # [1,2,3,...]
 print("Input values per tid:", arr.tolist())
-for tid in range(ARRAY_LEN):
-    gpu.memory[tid] = int(arr[tid])
+inputs = heap.to_device(arr)
+sums = heap.empty(NUM_BLOCKS)
 
-gpu.load_program(program, labels)
+# kernel args: R0 = input base, R1 = output base
+gpu.load_kernel(
+    program,
+    labels,
+    grid=(NUM_BLOCKS, TPB),
+    args=[inputs, sums],
+    shared_size=SHARED_SIZE,
+)
 gpu.run(max_cycles=200)
 
 # Save animation GIF to src/outputs/<script_name>/
@@ -47,8 +55,8 @@ try:
 except Exception as e:
     print("Could not save GIF:", e)
 
-# read back block results at mem[100 + block_id] (as used in kernel)
-results = [int(gpu.memory[100 + b]) for b in range(NUM_BLOCKS)]
+# read back block results
+results = sums.to_host().tolist()
 print("Block sums (expected):", results)
 print(
     "Expected manual sums:",
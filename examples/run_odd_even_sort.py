@@ -18,21 +18,9 @@ MEM_BASE = 0  # start of array in memory
 MEM_SIZE = 256
 MAX_CYCLES = 400
 
-# load program text and patch the SET R1 immediate to ARRAY_LEN
+# assemble with the array length as the number of phases
 prog_path = os.path.join(os.path.dirname(__file__), "odd_even_sort.tgpu")
-with open(prog_path, "r") as f:
-    prog_text = f.read()
-
-# quick injection: replace "SET R1, 8" with the actual number if present
-prog_text = prog_text.replace("SET R1, 8", f"SET R1, {ARRAY_LEN}")
-
-# write temp program file for assembler
-tmp_path = os.path.join(os.path.dirname(__file__), "odd_even_sort_tmp.tgpu")
-with open(tmp_path, "w") as f:
-    f.write(prog_text)
-
-# assemble
-program, labels = assemble_file(tmp_path)
+program, labels = assemble_file(prog_path, defines={"N": ARRAY_LEN})
 
 # create gpu with enough registers
 gpu = TinyGPU(num_threads=NUM_THREADS, num_registers=12, mem_size=MEM_SIZE)
@@ -16,7 +16,9 @@ MAX_CYCLES = 80
 
 # load and assemble program
 prog_path = os.path.join(os.path.dirname(__file__), "reduce_sum.tgpu")
-program, labels = assemble_file(prog_path)
+program, labels = assemble_file(
+    prog_path, defines={"PHASES": ARRAY_LEN.bit_length() - 1}
+)
 
 # create gpu with enough registers (R0-R9 used)
 gpu = TinyGPU(num_threads=NUM_THREADS, num_registers=12, mem_size=MEM_SIZE)
@@ -0,0 +1,192 @@
+# src/tinygpu/allocator.py
+"""
+Device memory allocator and device arrays.
+
+A DeviceAllocator manages ``gpu.memory`` (or a ``[base, limit)`` window of
+it) so buffers get addresses instead of hand-picked constants; a
+DeviceArray is an allocated buffer with bulk host copies whose address is
+passed to kernels as an argument::
+
+    heap = DeviceAllocator(gpu)
+    x = heap.to_device(values)              # allocate + copy in
+    out = heap.empty(len(values))
+    gpu.load_kernel(program, labels, grid=(4, 32), args=[x, out, len(values)])
+    gpu.run()
+    result = out.to_host()
+    x.free()
+
+Sizes are rounded up to a multiple of ``alignment`` words, so every address
+is aligned. Freed buffers are kept in per-size pools and handed out again
+to allocations of the same rounded size, which makes buffers reused across
+launches free of fragmentation. When neither a pool nor the free ranges
+can satisfy a request, the pools are returned to the free ranges (merging
+neighbours) and the search is retried before MemoryError is raised.
+"""
+
+from bisect import insort
+import numpy as np
+
+
+def _align(value, alignment):
+    return -(-value // alignment) * alignment
+
+
+class DeviceAllocator:
+    def __init__(self, gpu, alignment=4, base=0, limit=None):
+        if alignment < 1:
+            raise ValueError(f"alignment must be >= 1, got {alignment}")
+        limit = gpu.mem_size if limit is None else limit
+        base = _align(base, alignment)
+        if not 0 <= base <= limit <= gpu.mem_size:
+            raise ValueError(f"bad heap window [{base}, {limit})")
+        self.gpu = gpu
+        self.alignment = alignment
+        self.base, self.limit = base, limit
+        self.allocations = {}  # address -> rounded size
+        self._free = [(base, limit - base)] if limit > base else []  # by address
+        self._pools = {}  # rounded size -> [addresses]
+
+    # --- raw allocation ---
+
+    def malloc(self, size):
+        """Address of ``size`` (rounded up) uninitialized words."""
+        size = int(size)
+        if size < 0:
+            raise ValueError(f"size must be >= 0, got {size}")
+        size = max(_align(size, self.alignment), self.alignment)
+        pool = self._pools.get(size)
+        if pool:
+            address = pool.pop()
+        else:
+            address = self._carve(size)
+            if address is None:
+                self.trim()
+                address = self._carve(size)
+            if address is None:
+                raise MemoryError(
+                    f"cannot allocate {size} words: {self.free_words} free, "
+                    f"largest free range {self.largest_free}"
+                )
+        self.allocations[address] = size
+        return address
+
+    def free(self, address):
+        """Return an allocation to its size pool."""
+        address = int(address)
+        size = self.allocations.pop(address, None)
+        if size is None:
+            raise ValueError(f"address {address} is not allocated")
+        self._pools.setdefault(size, []).append(address)
+
+    def trim(self):
+        """Move pooled buffers back to the free ranges, merging neighbours."""
+        for size, addresses in self._pools.items():
+            for address in addresses:
+                insort(self._free, (address, size))
+        self._pools.clear()
+        merged = []
+        for address, size in self._free:
+            if merged and merged[-1][0] + merged[-1][1] == address:
+                merged[-1] = (merged[-1][0], merged[-1][1] + size)
+            else:
+                merged.append((address, size))
+        self._free = merged
+
+    def _carve(self, size):
+        for i, (address, free) in enumerate(self._free):  # first fit
+            if free >= size:
+                if free == size:
+                    del self._free[i]
+                else:
+                    self._free[i] = (address + size, free - size)
+                return address
+        return None
+
+    @property
+    def used_words(self):
+        return sum(self.allocations.values())
+
+    @property
+    def free_words(self):
+        pooled = sum(s * len(a) for s, a in self._pools.items())
+        return sum(size for _a, size in self._free) + pooled
+
+    @property
+    def largest_free(self):
+        sizes = [size for _a, size in self._free]
+        sizes += [s for s, a in self._pools.items() if a]
+        return max(sizes, default=0)
+
+    # --- device arrays ---
+
+    def empty(self, shape):
+        """Uninitialized DeviceArray of ``shape``."""
+        shape = tuple(np.atleast_1d(shape).tolist())
+        if any(dim < 0 for dim in shape):
+            raise ValueError(f"negative dimension in shape {shape}")
+        return DeviceArray(self, self.malloc(int(np.prod(shape))), shape)
+
+    def zeros(self, shape):
+        array = self.empty(shape)
+        array.view()[:] = 0
+        return array
+
+    def to_device(self, values):
+        """New DeviceArray holding a copy of ``values`` (cast to int32)."""
+        values = np.asarray(values)
+        array = self.empty(values.shape or (1,))
+        array.copy_from_host(values)
+        return array
+
+
+class DeviceArray:
+    """
+    An allocated int32 buffer in device memory. ``int(array)`` is its
+    address, so arrays can be passed directly in kernel ``args``.
+    """
+
+    def __init__(self, allocator, address, shape):
+        self.allocator = allocator
+        self.address = address
+        self.shape = shape
+        self.size = int(np.prod(shape))
+
+    def __int__(self):
+        return self.address
+
+    __index__ = __int__
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"DeviceArray(address={self.address}, shape={self.shape})"
+
+    def view(self):
+        """Writable NumPy view of the buffer in ``gpu.memory``."""
+        if self.address is None:
+            raise ValueError("device array was freed")
+        memory = self.allocator.gpu.memory
+        return memory[self.address : self.address + self.size].reshape(self.shape)
+
+    def copy_from_host(self, values):
+        """Bulk copy ``values`` (same number of elements) into the buffer."""
+        values = np.asarray(values)
+        if values.size != self.size:
+            raise ValueError(f"expected {self.size} values, got {values.size}")
+        np.copyto(self.view(), values.reshape(self.shape), casting="unsafe")
+
+    def to_host(self):
+        """Copy of the buffer as a NumPy array of ``shape``."""
+        return self.view().copy()
+
+    def free(self):
+        if self.address is not None:
+            self.allocator.free(self.address)
+            self.address = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.free()
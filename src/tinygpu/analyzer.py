@@ -0,0 +1,581 @@
+# src/tinygpu/analyzer.py
+"""
+Static analysis of assembled kernels.
+
+analyze(program, labels) builds the control-flow graph and reports:
+
+- register liveness, the registers used and the register file size needed,
+- static shared-memory usage,
+- unreachable code, branches to themselves and loops that never exit,
+- reads of possibly-uninitialized registers and writes to the R5-R7
+  registers the core presets with block / thread ids,
+- barriers (SYNC / SYNCB) that are only reached under thread-divergent
+  control flow.
+
+The CFG follows TinyGPU's execution semantics: a branch whose target is its
+own PC leaves the PC unchanged, which the core treats as a fall-through, and
+running past the last instruction (or jumping out of range) ends the thread.
+"""
+
+from dataclasses import dataclass, field
+from .instructions import (
+    BARRIERS,
+    BRANCHES,
+    CONDITIONAL_BRANCHES,
+    FLAG_READERS,
+    FLAG_WRITERS,
+    PRESET_REGISTERS,
+    UNPREDICABLE,
+    operand_roles,
+    split_predicate,
+)
+
+# pseudo block index for "thread finished"
+EXIT = -1
+
+
+@dataclass
+class BasicBlock:
+    index: int
+    start: int  # first pc
+    end: int  # one past the last pc
+    succs: list = field(default_factory=list)  # block indices or EXIT
+    preds: list = field(default_factory=list)
+
+    @property
+    def pcs(self):
+        return range(self.start, self.end)
+
+
+@dataclass
+class Diagnostic:
+    severity: str  # "error" or "warning"
+    pc: int
+    message: str
+
+    def __str__(self):
+        return f"{self.severity}: pc {self.pc}: {self.message}"
+
+
+@dataclass
+class KernelReport:
+    blocks: list
+    block_of: list  # pc -> block index
+    live_in: list  # pc -> frozenset of registers live before the instruction
+    live_out: list  # pc -> frozenset of registers live after the instruction
+    registers_used: list
+    register_count: int
+    max_live: int
+    shared_size: int  # 1 + highest immediate shared address (0 if unused)
+    shared_dynamic: bool  # some SHLD/SHST address comes from a register
+    unreachable: list  # pcs that can never execute
+    diagnostics: list = field(default_factory=list)
+
+    @property
+    def errors(self):
+        return [d for d in self.diagnostics if d.severity == "error"]
+
+    @property
+    def warnings(self):
+        return [d for d in self.diagnostics if d.severity == "warning"]
+
+    def summary(self):
+        """Human-readable multi-line report."""
+        lines = [
+            f"blocks: {len(self.blocks)}",
+            f"registers: {self.register_count} "
+            f"(used {', '.join(f'R{r}' for r in self.registers_used) or 'none'}; "
+            f"max live {self.max_live})",
+            f"shared: {self.shared_size}"
+            + (" (+ register-addressed accesses)" if self.shared_dynamic else ""),
+        ]
+        lines.extend(str(d) for d in self.diagnostics)
+        return "\n".join(lines)
+
+
+def _reg(operand):
+    if isinstance(operand, tuple) and len(operand) == 2 and operand[0] == "R":
+        return int(operand[1])
+    return None
+
+
+def _is_predicated(instr):
+    return instr.startswith("@")
+
+
+def reads_flags(instr):
+    """Whether an instruction depends on the CMP flags."""
+    return instr in FLAG_READERS or _is_predicated(instr)
+
+
+def _roles(instr, args):
+    roles = operand_roles(instr)
+    if roles is None or len(roles) != len(args):
+        # unknown form: treat every register operand as read
+        return ("src",) * len(args)
+    return roles
+
+
+def uses_defs(instr, args):
+    """Return (registers read, registers written) by one instruction."""
+    uses, defs = set(), set()
+    for role, operand in zip(_roles(instr, args), args, strict=True):
+        r = _reg(operand)
+        if r is None:
+            continue
+        if role == "dst":
+            defs.add(r)
+            if _is_predicated(instr):  # lanes that skip it keep the old value
+                uses.add(r)
+        else:
+            uses.add(r)
+    return uses, defs
+
+
+def branch_target(instr, args):
+    """Immediate target of a branch, or None when it is not a resolved int."""
+    if instr not in BRANCHES or not args:
+        return None
+    target = args[-1]
+    if isinstance(target, bool) or not isinstance(target, int):
+        return None
+    return target
+
+
+def basic_block_leaders(program):
+    """Return the sorted start PCs of the basic blocks of ``program``."""
+    n = len(program)
+    leaders = {0}
+    for pc, (instr, args) in enumerate(program):
+        if instr in BRANCHES:
+            leaders.add(pc + 1)
+            target = branch_target(instr, args)
+            if target is not None and 0 <= target < n:
+                leaders.add(target)
+    return sorted(p for p in leaders if p < n) or [0]
+
+
+def _successors(program, block, blocks, block_at):
+    last = block.end - 1
+    instr, args = program[last]
+    fallthrough = block_at(block.end)
+    if instr not in BRANCHES:
+        return [fallthrough]
+    target = branch_target(instr, args)
+    if target is None and _reg(args[-1] if args else None) is not None:
+        # register-indirect branch: may go anywhere
+        succs = [blk.index for blk in blocks] + [EXIT]
+    elif target is None or target == last:
+        # unresolved label (reported separately) or self-branch
+        succs = [fallthrough]
+    else:
+        succs = [block_at(target)]
+    if instr in CONDITIONAL_BRANCHES:
+        succs.append(fallthrough)
+    return list(dict.fromkeys(succs))
+
+
+def build_cfg(program):
+    """Split ``program`` into basic blocks and connect them.
+
+    Returns ``(blocks, block_of)`` where ``block_of[pc]`` is the index of the
+    block containing ``pc``.
+    """
+    n = len(program)
+    if n == 0:
+        return [], []
+    leaders = basic_block_leaders(program)
+    bounds = leaders + [n]
+    blocks = [BasicBlock(i, bounds[i], bounds[i + 1]) for i in range(len(leaders))]
+    block_of = [0] * n
+    for b in blocks:
+        for pc in b.pcs:
+            block_of[pc] = b.index
+
+    def block_at(pc):
+        return block_of[pc] if 0 <= pc < n else EXIT
+
+    for b in blocks:
+        b.succs = _successors(program, b, blocks, block_at)
+        for s in b.succs:
+            if s != EXIT:
+                blocks[s].preds.append(b.index)
+    return blocks, block_of
+
+
+def reachable_blocks(blocks):
+    """Indices of the blocks reachable from the entry block."""
+    seen = set()
+    stack = [0] if blocks else []
+    while stack:
+        b = stack.pop()
+        if b in seen or b == EXIT:
+            continue
+        seen.add(b)
+        stack.extend(blocks[b].succs)
+    return seen
+
+
+def dominators(blocks, reachable):
+    """Map each reachable block to the set of blocks dominating it."""
+    order = sorted(reachable)
+    dom = {b: set(order) for b in order}
+    if 0 in dom:
+        dom[0] = {0}
+    changed = True
+    while changed:
+        changed = False
+        for b in order:
+            if b == 0:
+                continue
+            preds = [dom[p] for p in blocks[b].preds if p in reachable]
+            new = {b} | (set.intersection(*preds) if preds else set())
+            if new != dom[b]:
+                dom[b] = new
+                changed = True
+    return dom
+
+
+def _reaches_exit(blocks):
+    seen = set()
+    stack = [b.index for b in blocks if EXIT in b.succs]
+    while stack:
+        b = stack.pop()
+        if b in seen:
+            continue
+        seen.add(b)
+        stack.extend(blocks[b].preds)
+    return seen
+
+
+def _live_at_end(block, block_in):
+    live = set()
+    for s in block.succs:
+        if s != EXIT:
+            live |= block_in[s]
+    return live
+
+
+def liveness(program, blocks, ud=None):
+    """Backward dataflow; returns per-pc ``(live_in, live_out)`` sets.
+
+    ``ud`` optionally supplies precomputed per-pc ``(uses, defs)`` pairs,
+    e.g. extended with pseudo-registers such as the flags.
+    """
+    n = len(program)
+    if ud is None:
+        ud = [uses_defs(instr, args) for instr, args in program]
+    block_in = [frozenset()] * len(blocks)
+    changed = True
+    while changed:
+        changed = False
+        for b in reversed(blocks):
+            live = _live_at_end(b, block_in)
+            for pc in reversed(b.pcs):
+                uses, defs = ud[pc]
+                live = (live - defs) | uses
+            live = frozenset(live)
+            if live != block_in[b.index]:
+                block_in[b.index] = live
+                changed = True
+
+    live_in, live_out = [frozenset()] * n, [frozenset()] * n
+    for b in blocks:
+        live = _live_at_end(b, block_in)
+        for pc in reversed(b.pcs):
+            live_out[pc] = frozenset(live)
+            uses, defs = ud[pc]
+            live = (live - defs) | uses
+            live_in[pc] = frozenset(live)
+    return live_in, live_out
+
+
+def _initialized_in(blocks, b, reachable, block_out, entry):
+    """Meet (intersection) of the initialized sets flowing into block ``b``.
+
+    ``None`` stands for "not computed yet" (the lattice top).
+    """
+    incoming = [entry] if b == 0 else []
+    incoming += [block_out[p] for p in blocks[b].preds if p in reachable]
+    known = [state for state in incoming if state is not None]
+    return frozenset.intersection(*known) if known else None
+
+
+def _uninitialized_reads(program, blocks, reachable, initial):
+    """Forward must-analysis of definitely-initialized registers."""
+    entry = frozenset(initial)
+    defs = [uses_defs(instr, args)[1] for instr, args in program]
+    block_out = dict.fromkeys(reachable)
+    changed = True
+    while changed:
+        changed = False
+        for b in sorted(reachable):
+            state = _initialized_in(blocks, b, reachable, block_out, entry)
+            if state is None:
+                continue
+            state = state.union(*(defs[pc] for pc in blocks[b].pcs))
+            if state != block_out[b]:
+                block_out[b] = state
+                changed = True
+
+    found = []
+    for b in sorted(reachable):
+        state = _initialized_in(blocks, b, reachable, block_out, entry) or frozenset()
+        for pc in blocks[b].pcs:
+            uses = uses_defs(*program[pc])[0]
+            found.extend((pc, r) for r in sorted(uses - state))
+            state = state | defs[pc]
+    return found
+
+
+def _postdominators(blocks, reaches_exit):
+    """Post-dominator sets; blocks that never exit get a virtual exit edge."""
+    nodes = [b.index for b in blocks]
+    pdom = {EXIT: {EXIT}}
+    for b in nodes:
+        pdom[b] = set(nodes) | {EXIT}
+    changed = True
+    while changed:
+        changed = False
+        for b in reversed(nodes):
+            succs = list(blocks[b].succs)
+            if b not in reaches_exit:
+                succs.append(EXIT)
+            new = {b} | set.intersection(*(pdom[s] for s in succs))
+            if new != pdom[b]:
+                pdom[b] = new
+                changed = True
+    ipdom = {}
+    for b in nodes:
+        strict = pdom[b] - {b}
+        for p in strict:
+            if pdom[p] == strict:
+                ipdom[b] = p
+                break
+    return ipdom
+
+
+def _control_dependents(blocks, ipdom, branch_block):
+    """Blocks whose execution depends on the branch ending ``branch_block``."""
+    stop = ipdom.get(branch_block, EXIT)
+    deps = set()
+    for s in blocks[branch_block].succs:
+        runner = s
+        while runner not in (stop, EXIT) and runner not in deps:
+            deps.add(runner)
+            runner = ipdom.get(runner, EXIT)
+    return deps
+
+
+def _taint_in(blocks, b, reachable, taint_out):
+    regs = set(PRESET_REGISTERS) if b == 0 else set()
+    flags = False
+    for p in blocks[b].preds:
+        if p in reachable:
+            regs |= taint_out[p][0]
+            flags = flags or taint_out[p][1]
+    return regs, flags
+
+
+def _taint_step(instr, args, regs, flags, forced):
+    uses, defs = uses_defs(instr, args)
+    tainted = forced or bool(uses & regs) or (_is_predicated(instr) and flags)
+    if instr in FLAG_WRITERS:
+        flags = tainted
+    return (regs | defs) if tainted else (regs - defs), flags
+
+
+def _taint(program, blocks, reachable, forced_blocks):
+    """Forward may-analysis of thread-varying registers and flags."""
+    taint_out = {b: (frozenset(), False) for b in reachable}
+    changed = True
+    while changed:
+        changed = False
+        for b in sorted(reachable):
+            regs, flags = _taint_in(blocks, b, reachable, taint_out)
+            for pc in blocks[b].pcs:
+                regs, flags = _taint_step(*program[pc], regs, flags, b in forced_blocks)
+            state = (frozenset(regs), flags)
+            if state != taint_out[b]:
+                taint_out[b] = state
+                changed = True
+    return taint_out
+
+
+def _ends_in_varying_branch(program, blocks, b, reachable, taint_out, forced):
+    block = blocks[b]
+    last = block.end - 1
+    instr, args = program[last]
+    if instr not in CONDITIONAL_BRANCHES:
+        return False
+    regs, flags = _taint_in(blocks, b, reachable, taint_out)
+    for pc in range(block.start, last):
+        regs, flags = _taint_step(*program[pc], regs, flags, forced)
+    if instr in FLAG_READERS:
+        return flags
+    return bool(uses_defs(instr, args)[0] & regs)
+
+
+def _divergent_branches(program, blocks, reachable, ipdom):
+    """Blocks ending in a branch whose outcome may differ between threads.
+
+    Registers preset with ids (R5-R7) are thread-varying; so are values
+    computed from varying registers, loads from varying addresses and any
+    definition made under divergent control flow.
+    """
+    divergent = set()
+    while True:
+        forced = set()
+        for d in divergent:
+            forced |= _control_dependents(blocks, ipdom, d)
+        taint_out = _taint(program, blocks, reachable, forced)
+        found = {
+            b
+            for b in reachable
+            if _ends_in_varying_branch(
+                program, blocks, b, reachable, taint_out, b in forced
+            )
+        }
+        if found == divergent:
+            return divergent
+        divergent = found
+
+
+def _shared_usage(program):
+    size, dynamic = 0, False
+    for instr, args in program:
+        instr = split_predicate(instr)[1]
+        if instr == "SHLD" and len(args) == 2:
+            addr = args[1]
+        elif instr == "SHST" and len(args) == 2:
+            addr = args[0]
+        else:
+            continue
+        if isinstance(addr, int):
+            size = max(size, addr + 1)
+        else:
+            dynamic = True
+    return size, dynamic
+
+
+def _operand_diagnostics(pc, instr, args, num_registers):
+    diags = []
+    roles = operand_roles(instr)
+    if roles is None:
+        diags.append(Diagnostic("error", pc, f"unknown opcode {instr}"))
+    elif _is_predicated(instr) and split_predicate(instr)[1] in UNPREDICABLE:
+        diags.append(Diagnostic("error", pc, f"{instr} cannot be predicated"))
+    elif len(roles) != len(args):
+        msg = f"{instr} expects {len(roles)} operands, got {len(args)}"
+        diags.append(Diagnostic("error", pc, msg))
+    for role, operand in zip(roles or (), args, strict=False):
+        r = _reg(operand)
+        if role == "dst" and r is None:
+            diags.append(Diagnostic("error", pc, f"{instr} target must be a register"))
+        elif role == "dst" and r in PRESET_REGISTERS:
+            msg = f"overwrites R{r} ({PRESET_REGISTERS[r]} preset by the core)"
+            diags.append(Diagnostic("warning", pc, msg))
+        elif role == "src" and r is None and not isinstance(operand, int):
+            diags.append(Diagnostic("error", pc, f"bad operand {operand!r}"))
+    for operand in args:
+        r = _reg(operand)
+        if r is not None and num_registers is not None and r >= num_registers:
+            msg = f"R{r} exceeds the {num_registers}-register file"
+            diags.append(Diagnostic("error", pc, msg))
+    return diags
+
+
+def _branch_diagnostics(pc, instr, args, n):
+    if instr not in BRANCHES or not args:
+        return []
+    target = args[-1]
+    if isinstance(target, str):
+        return [Diagnostic("error", pc, f"undefined label {target!r}")]
+    if target == pc:
+        msg = (
+            "branch to itself: the PC does not change, so TinyGPU falls "
+            "through instead of looping"
+        )
+        return [Diagnostic("warning", pc, msg)]
+    if isinstance(target, int) and not 0 <= target <= n:
+        return [Diagnostic("warning", pc, f"branch target {target} is out of range")]
+    return []
+
+
+def analyze(program, labels=None, num_args=0, num_registers=None):
+    """
+    Analyze an assembled program (as returned by assemble_file).
+
+    - num_args: number of kernel arguments written to R0..R(num_args-1)
+      by load_kernel (treated as initialized on entry)
+    - num_registers: when given, report registers beyond the register file
+
+    Returns a KernelReport.
+    """
+    program = list(program)
+    blocks, block_of = build_cfg(program)
+    reachable = reachable_blocks(blocks)
+    exits = _reaches_exit(blocks)
+    live_in, live_out = liveness(program, blocks)
+
+    diags = []
+    for pc, (instr, args) in enumerate(program):
+        diags += _operand_diagnostics(pc, instr, args, num_registers)
+        diags += _branch_diagnostics(pc, instr, args, len(program))
+
+    unreachable = [pc for b in blocks if b.index not in reachable for pc in b.pcs]
+    for b in blocks:
+        if b.index not in reachable:
+            diags.append(
+                Diagnostic(
+                    "warning", b.start, f"unreachable code (pc {b.start}..{b.end - 1})"
+                )
+            )
+
+    for b in sorted(reachable - exits):
+        diags.append(
+            Diagnostic(
+                "warning",
+                blocks[b].start,
+                f"infinite loop: pc {blocks[b].start}..{blocks[b].end - 1} "
+                "can never reach the end of the program",
+            )
+        )
+
+    initial = set(PRESET_REGISTERS) | set(range(num_args))
+    for pc, r in _uninitialized_reads(program, blocks, reachable, initial):
+        diags.append(Diagnostic("warning", pc, f"R{r} may be read before it is set"))
+
+    ipdom = _postdominators(blocks, exits)
+    for d in sorted(_divergent_branches(program, blocks, reachable, ipdom)):
+        for b in sorted(_control_dependents(blocks, ipdom, d)):
+            for pc in blocks[b].pcs:
+                if program[pc][0] in BARRIERS:
+                    diags.append(
+                        Diagnostic(
+                            "warning",
+                            pc,
+                            f"{program[pc][0]} is inside the thread-divergent "
+                            f"branch at pc {blocks[d].end - 1}; threads that skip "
+                            "it never arrive at this barrier",
+                        )
+                    )
+
+    used = sorted(
+        {r for _instr, args in program for a in args if (r := _reg(a)) is not None}
+    )
+    shared_size, shared_dynamic = _shared_usage(program)
+    diags.sort(key=lambda d: (d.pc, d.severity != "error"))
+    return KernelReport(
+        blocks=blocks,
+        block_of=block_of,
+        live_in=live_in,
+        live_out=live_out,
+        registers_used=used,
+        register_count=(used[-1] + 1) if used else 1,
+        max_live=max((len(s) for s in live_in), default=0),
+        shared_size=shared_size,
+        shared_dynamic=shared_dynamic,
+        unreachable=unreachable,
+        diagnostics=diags,
+    )
@@ -1,3 +1,94 @@
+"""
+TinyGPU assembler.
+
+Besides instructions, labels, registers and integers, sources may use:
+
+- ``.const NAME expr``: integer constant (expressions may use + - * / % <<
+  >> & | ^ ~, parentheses, other constants and labels)
+- ``.define NAME text``: textual alias for an operand (e.g. ``.define ACC R4``)
+- ``.macro NAME a, b`` ... ``.endm``: macro with parameters ``\\a``, ``\\b``;
+  ``\\@`` expands to a number unique per expansion (for local labels)
+- ``.include "file.tgpu"``: path relative to the including file
+- ``.data [addr]`` ... ``.text``: memory initializers; lines hold
+  comma-separated values (optionally after ``.word``) or ``.fill count[,
+  value]``, labels name data addresses
+
+Constants and defines can be overridden at assemble time with
+``assemble_file(path, defines={"N": 16})``, so one source serves every
+problem size. Results are cached per (path, defines) until a source file
+changes.
+
+An instruction prefixed with ``@<cond>`` (Z/EQ, NZ/NE, LT, LE, GT, GE)
+only executes where the CMP flags match, e.g. ``@GT SET R1, 0``.
+
+Assembly is a single pass with forward references patched at the end.
+Opcodes and operand counts are checked against the instruction tables
+(destination operands must be registers) and undefined symbols are errors,
+all reported as AssemblyError with ``file:line:column``.
+"""
+
+import ast
+import os
+import re
+from .instructions import INSTRUCTIONS, OPERANDS, PREDICATES, UNPREDICABLE
+
+_REGISTER = re.compile(r"^[Rr](\d+)$")
+_IDENT = re.compile(r"^[A-Za-z_.$][\w.$]*$")
+_MAX_EXPANSION_DEPTH = 64
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1  # operand and .word range
+_CACHE_SIZE = 64
+_cache = {}
+
+
+class AssemblyError(ValueError):
+    """Assembly failed; the message starts with ``file:line:column``."""
+
+    def __init__(self, path, line, message, column=None):
+        self.path = path
+        self.line = line
+        self.column = column
+        where = f"{path}:{line}" if column is None else f"{path}:{line}:{column}"
+        super().__init__(f"{where}: {message}")
+
+
+class Program(list):
+    """
+    Assembled instructions (a list of ``(instr, args)``) plus:
+
+    - data: ``[(address, [values])]`` memory initializers from ``.data``,
+      written into memory by TinyGPU.load_program
+    - symbols: constants and data labels by name
+    """
+
+    def __init__(self, instructions=(), data=(), symbols=None):
+        super().__init__(instructions)
+        self.data = [(int(addr), list(values)) for addr, values in data]
+        self.symbols = dict(symbols or {})
+
+
+class _Line:
+    """A source line without comment; ``column`` is where ``text`` starts."""
+
+    __slots__ = ("text", "path", "line", "column")
+
+    def __init__(self, text, path, line, column=1):
+        self.text = text
+        self.path = path
+        self.line = line
+        self.column = column
+
+    @classmethod
+    def parse(cls, raw, path, line):
+        text = _strip_and_remove_comment(raw)
+        if not text:
+            return None
+        return cls(text, path, line, len(raw) - len(raw.lstrip()) + 1)
+
+    def error(self, message, offset=0):
+        """AssemblyError pointing ``offset`` characters into ``text``."""
+        return AssemblyError(self.path, self.line, message, self.column + offset)
+
+
 def _strip_and_remove_comment(line):
     line = line.strip()
     if not line:
@@ -7,50 +98,437 @@ def _strip_and_remove_comment(line):
     return line
 
 
-def _collect_labels(lines):
-    labels = {}
-    pc = 0
-    for line in lines:
-        line = _strip_and_remove_comment(line)
-        if not line:
+def _operands(text, start=0, commas_only=False):
+    """Split operands (on commas, else on whitespace) as (token, offset)."""
+    if not text.strip():
+        return []
+    if "," not in text and not commas_only:
+        return [(m.group(), start + m.start()) for m in re.finditer(r"\S+", text)]
+    tokens, offset = [], start
+    for part in text.split(","):
+        stripped = part.strip()
+        tokens.append((stripped, offset + len(part) - len(part.lstrip())))
+        offset += len(part) + 1
+    return tokens
+
+
+def _split_operands(text):
+    return [token for token, _offset in _operands(text)]
+
+
+# --- expressions ---
+
+_BINOPS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a // b,
+    ast.FloorDiv: lambda a, b: a // b,
+    ast.Mod: lambda a, b: a % b,
+    ast.LShift: lambda a, b: a << b,
+    ast.RShift: lambda a, b: a >> b,
+    ast.BitAnd: lambda a, b: a & b,
+    ast.BitOr: lambda a, b: a | b,
+    ast.BitXor: lambda a, b: a ^ b,
+}
+_UNARYOPS = {ast.USub: lambda a: -a, ast.UAdd: lambda a: a, ast.Invert: lambda a: ~a}
+
+
+def _eval_node(node, lookup):
+    if isinstance(node, ast.Expression):
+        return _eval_node(node.body, lookup)
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return node.value
+    if isinstance(node, ast.Name):
+        return lookup(node.id)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        left = _eval_node(node.left, lookup)
+        right = _eval_node(node.right, lookup)
+        return _BINOPS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARYOPS:
+        return _UNARYOPS[type(node.op)](_eval_node(node.operand, lookup))
+    raise ValueError("unsupported expression")
+
+
+def evaluate(expr, lookup):
+    """Evaluate an integer expression; ``lookup(name)`` resolves symbols."""
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+        return int(_eval_node(tree, lookup))
+    except (SyntaxError, ValueError, ZeroDivisionError) as exc:
+        raise ValueError(f"bad expression {expr!r}: {exc}") from None
+
+
+# --- includes and macros ---
+
+
+def _read_source(path, files, stack=()):
+    """Lines of ``path`` with .include directives expanded."""
+    path = os.path.abspath(path)
+    if path in stack:
+        raise AssemblyError(path, 0, "recursive .include")
+    with open(path, "r") as f:
+        raw = f.readlines()
+    files.add(path)
+    return _expand_includes(raw, path, os.path.dirname(path), files, stack + (path,))
+
+
+def _expand_includes(raw, path, base, files, stack):
+    """Parsed lines of ``raw`` with .include paths resolved against ``base``."""
+    lines = []
+    for lineno, text in enumerate(raw, start=1):
+        line = _Line.parse(text, path, lineno)
+        if line is None:
             continue
-        if line.endswith(":"):
-            label = line[:-1].strip()
-            labels[label] = pc
+        if line.text.split(None, 1)[0].lower() != ".include":
+            lines.append(line)
             continue
-        pc += 1
-    return labels
+        target = line.text.split(None, 1)[1].strip() if " " in line.text else ""
+        target = target.strip("\"'")
+        if not target:
+            raise line.error(".include needs a file name")
+        target = os.path.join(base, target)
+        if not os.path.exists(target):
+            raise line.error(f"include file not found: {target}")
+        lines.extend(_read_source(target, files, stack))
+    return lines
+
 
+def _collect_macros(lines):
+    """Remove .macro ... .endm blocks; returns (lines, {name: (params, body)})."""
+    macros, out, current = {}, [], None
+    for line in lines:
+        word = line.text.split(None, 1)[0].lower()
+        if word == ".macro":
+            if current is not None:
+                raise line.error("nested .macro definition")
+            head = line.text.split(None, 1)[1] if " " in line.text else ""
+            parts = head.replace(",", " ").split()
+            if not parts:
+                raise line.error(".macro needs a name")
+            current = (parts[0].upper(), parts[1:], [], line)
+        elif word == ".endm":
+            if current is None:
+                raise line.error(".endm without .macro")
+            name, params, body, _start = current
+            macros[name] = (params, body)
+            current = None
+        elif current is not None:
+            current[2].append(line)
+        else:
+            out.append(line)
+    if current is not None:
+        raise current[3].error(f"unterminated .macro {current[0]}")
+    return out, macros
+
+
+class _MacroExpander:
+    def __init__(self, macros):
+        self.macros = macros
+        self.counter = 0
+
+    def expand(self, lines, depth=0):
+        out = []
+        for line in lines:
+            head, _, rest = line.text.partition(" ")
+            if head.endswith(":") or head.upper() not in self.macros:
+                out.append(line)
+                continue
+            if depth >= _MAX_EXPANSION_DEPTH:
+                raise line.error(f"macro expansion too deep in {head}")
+            out.extend(self.expand(self._instantiate(line, head, rest), depth + 1))
+        return out
+
+    def _instantiate(self, line, name, rest):
+        params, body = self.macros[name.upper()]
+        values = _split_operands(rest.strip())
+        if len(values) != len(params):
+            raise line.error(
+                f"macro {name} takes {len(params)} arguments, got {len(values)}"
+            )
+        self.counter += 1
+        # longest names first so \ab is not replaced by the value of \a
+        order = sorted(zip(params, values, strict=True), key=lambda p: -len(p[0]))
+        expanded = []
+        for body_line in body:
+            text = body_line.text.replace("\\@", str(self.counter))
+            for param, value in order:
+                text = text.replace("\\" + param, value)
+            expanded.append(
+                _Line(text, body_line.path, body_line.line, body_line.column)
+            )
+        return expanded
+
+
+# --- symbols, sections and code ---
+
+
+class _Undefined(Exception):
+    """A symbol is not defined (yet): the operand is patched at the end."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class _Assembler:
+    """
+    Single pass over the (include- and macro-expanded) lines: instructions
+    are validated and their operands evaluated as they are read. Operands
+    naming symbols that are defined later (forward branches, constants or
+    data labels below) are recorded as fixups and patched at the end.
+    """
+
+    def __init__(self):
+        self.consts = {}  # name -> (expression, line)
+        self.aliases = {}  # .define name -> operand text
+        self.labels = {}  # code label -> pc
+        self.data_labels = {}  # data label -> address
+        self.program = Program()
+        self.fixups = []  # (target list, index, expression, line, offset)
+        self.address = 0  # next data address
+        self.overridden = set()
+        self._evaluating = set()
+
+    def override(self, defines):
+        """Assemble-time values replace (or add) .const / .define symbols;
+        strings are textual like .define, anything else is a constant."""
+        for name, value in (defines or {}).items():
+            self.overridden.add(name)
+            if isinstance(value, str):
+                self.aliases[name] = value
+            else:
+                self.consts[name] = (str(int(value)), None)
+
+    def feed(self, lines):
+        in_data = False
+        for line in lines:
+            text = line.text
+            if text.endswith(":"):
+                self._define_label(line, text[:-1].strip(), in_data)
+                continue
+            word, _, rest = text.partition(" ")
+            directive = word.lower()
+            if directive in (".const", ".define"):
+                self._define_symbol(line, directive, rest.strip())
+            elif directive == ".data":
+                in_data = True
+                if rest.strip():
+                    self.address = self._now(rest.strip(), line, len(word) + 1)
+            elif directive == ".text":
+                in_data = False
+            elif in_data:
+                self._data_line(line, directive, rest)
+            elif directive.startswith("."):
+                raise line.error(f"unknown directive {word}")
+            elif word.startswith("@"):
+                self._predicated(line, word, rest)
+            else:
+                self._instruction(line, word.upper(), rest)
+
+    def _define_label(self, line, name, in_data):
+        if not _IDENT.match(name):
+            raise line.error(f"invalid label {name!r}")
+        if name in self.labels or name in self.data_labels:
+            raise line.error(f"duplicate label {name!r}")
+        if in_data:
+            self.data_labels[name] = self.address
+        else:
+            self.labels[name] = len(self.program)
+
+    def _define_symbol(self, line, directive, rest):
+        name, _, value = rest.partition(" ")
+        if not _IDENT.match(name) or not value.strip():
+            raise line.error(f"usage: {directive} NAME value")
+        if name in self.overridden:
+            return
+        if directive == ".define":
+            self.aliases[name] = value.strip()
+        else:
+            self.consts[name] = (value.strip(), line)
 
-def _parse_args(parts, labels):
-    args = []
-    for token in parts[1:]:
-        if token.upper().startswith("R"):
-            args.append(("R", int(token[1:])))
-        elif token.lstrip("-").isdigit():
-            args.append(int(token))
+    def _data_line(self, line, directive, rest):
+        if directive == ".fill":
+            args = _operands(rest, len(directive) + 1)
+            if len(args) not in (1, 2):
+                raise line.error("usage: .fill count[, value]")
+            count = self._now(args[0][0], line, args[0][1])
+            tokens = [args[1] if len(args) == 2 else ("0", 0)] * count
+        elif directive == ".word":
+            tokens = _operands(rest, len(directive) + 1, commas_only=True)
         else:
-            args.append(labels.get(token, token))
-    return args
+            tokens = _operands(line.text, commas_only=True)
+        values = []
+        for index, (token, offset) in enumerate(tokens):
+            values.append(self._value(values, index, token, line, offset))
+        self.program.data.append((self.address, values))
+        self.address += len(values)
+
+    def _predicated(self, line, word, rest):
+        cond = word[1:].upper()
+        if cond not in PREDICATES:
+            raise line.error(f"unknown predicate {word!r}")
+        instr, _, operands = rest.strip().partition(" ")
+        offset = len(line.text) - len(rest.lstrip())
+        if instr.upper() in UNPREDICABLE:
+            raise line.error(f"{instr.upper()} cannot be predicated", offset)
+        self._instruction(line, instr.upper(), operands, f"@{cond} ", offset)
+
+    def _instruction(self, line, instr, rest, prefix="", start=0):
+        if instr not in INSTRUCTIONS:
+            raise line.error(f"unknown instruction {instr!r}", start)
+        tokens = _operands(rest, start + len(instr) + 1)
+        roles = OPERANDS.get(instr)
+        if roles is not None and len(tokens) != len(roles):
+            raise line.error(f"{instr} takes {len(roles)} operands, got {len(tokens)}")
+        args = []
+        for index, (token, offset) in enumerate(tokens):
+            role = roles[index] if roles is not None else "src"
+            args.append(self._operand(args, index, token, role, line, offset))
+        self.program.append((prefix + instr, args))
+
+    def _operand(self, args, index, token, role, line, offset, depth=0):
+        if not token:
+            raise line.error("missing operand", offset)
+        if token in self.aliases:
+            if depth >= _MAX_EXPANSION_DEPTH:
+                raise line.error(f"recursive .define {token!r}", offset)
+            token = self.aliases[token]
+            return self._operand(args, index, token, role, line, offset, depth + 1)
+        match = _REGISTER.match(token)
+        if match:
+            return ("R", int(match.group(1)))
+        if role == "dst":
+            raise line.error(f"expected a register, got {token!r}", offset)
+        return self._value(args, index, token, line, offset)
+
+    def _value(self, target, index, expr, line, offset):
+        """Evaluate ``expr`` now, or record a fixup if a symbol is missing."""
+        try:
+            return self._eval(expr, line, offset)
+        except _Undefined:
+            self.fixups.append((target, index, expr, line, offset))
+            return 0
+
+    def _now(self, expr, line, offset):
+        """Evaluate ``expr``, which may not use symbols defined later."""
+        try:
+            return self._eval(expr, line, offset)
+        except _Undefined as exc:
+            raise line.error(
+                f"{exc.name!r} must be defined before this line", offset
+            ) from None
+
+    # symbol lookup
+    def _lookup(self, name):
+        if name in self.labels:
+            return self.labels[name]
+        if name in self.data_labels:
+            return self.data_labels[name]
+        if name in self.aliases:
+            return self._lookup_expr(self.aliases[name], None)
+        if name not in self.consts:
+            raise _Undefined(name)
+        if name in self._evaluating:
+            raise ValueError(f"constant {name!r} depends on itself")
+        self._evaluating.add(name)
+        try:
+            expr, where = self.consts[name]
+            return self._lookup_expr(expr, where)
+        finally:
+            self._evaluating.discard(name)
+
+    def _lookup_expr(self, expr, where):
+        try:
+            return evaluate(expr, self._lookup)
+        except AssemblyError:
+            raise
+        except ValueError as exc:
+            if where is None:
+                raise
+            raise where.error(str(exc), len(where.text) - len(expr)) from None
+
+    def _eval(self, expr, line, offset):
+        try:
+            value = evaluate(expr, self._lookup)
+        except (AssemblyError, _Undefined):
+            raise
+        except ValueError as exc:
+            raise line.error(str(exc), offset) from None
+        if not _INT32_MIN <= value <= _INT32_MAX:
+            raise line.error(f"value {value} of {expr!r} does not fit in int32", offset)
+        return value
+
+    def finish(self):
+        """Patch forward references; returns (Program, labels)."""
+        for target, index, expr, line, offset in self.fixups:
+            try:
+                target[index] = self._eval(expr, line, offset)
+            except _Undefined as exc:
+                raise line.error(f"undefined symbol {exc.name!r}", offset) from None
+        symbols = dict(self.data_labels)
+        for name in self.consts:
+            try:
+                symbols[name] = self._lookup(name)
+            except _Undefined as exc:
+                _expr, where = self.consts[name]
+                raise where.error(f"undefined symbol {exc.name!r}") from None
+        self.program.symbols = symbols
+        return self.program, dict(self.labels)
+
 
+def assemble_lines(lines, defines=None):
+    """Assemble preprocessed _Line objects; returns (Program, labels)."""
+    lines, macros = _collect_macros(lines)
+    lines = _MacroExpander(macros).expand(lines)
+    asm = _Assembler()
+    asm.override(defines)
+    asm.feed(lines)
+    return asm.finish()
 
-def assemble_file(path):
+
+def assemble(source, defines=None, path="<string>"):
+    """Assemble source text (``.include`` is resolved relative to the cwd)."""
+    lines = _expand_includes(source.splitlines(), path, os.getcwd(), set(), ())
+    return assemble_lines(lines, defines)
+
+
+def _stamp(files):
+    return tuple(sorted((f, os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in files))
+
+
+def _copy(program, labels):
+    return (
+        Program(
+            [(instr, list(args)) for instr, args in program],
+            program.data,
+            program.symbols,
+        ),
+        dict(labels),
+    )
+
+
+def assemble_file(path, defines=None, cache=True):
     """
     Assembles .tgpu file with label support.
     Returns (program, labels)
-    program: list of (instr, args)
+    program: Program, a list of (instr, args) with .data and .symbols
+    defines: {name: value} overriding .const / .define symbols
     """
-    with open(path, "r") as f:
-        lines = f.readlines()
+    key = (os.path.abspath(path), tuple(sorted((defines or {}).items())))
+    if cache and key in _cache:
+        stamp, program, labels = _cache[key]
+        try:
+            if _stamp(f for f, _m, _s in stamp) == stamp:
+                return _copy(program, labels)
+        except OSError:
+            pass
 
-    labels = _collect_labels(lines)
-    program = []
-    for line in lines:
-        line = _strip_and_remove_comment(line)
-        if not line or line.endswith(":"):
-            continue
-        parts = [p.strip() for p in line.replace(",", " ").split() if p.strip()]
-        instr = parts[0].upper()
-        args = _parse_args(parts, labels)
-        program.append((instr, args))
+    files = set()
+    lines = _read_source(path, files)
+    program, labels = assemble_lines(lines, defines)
+    if cache:
+        if len(_cache) >= _CACHE_SIZE:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = (_stamp(files), program, labels)
+        return _copy(program, labels)
     return program, labels
@@ -0,0 +1,237 @@
+# src/tinygpu/autotune.py
+"""
+Autotuning of launch configurations.
+
+An Autotuner runs a kernel once per configuration of a search space (grid,
+shared memory size and optionally kernel args), in parallel worker
+processes, measures it with PerfCounters, verifies the output and keeps the
+cheapest correct configuration. Results are cached on disk per (kernel
+hash, problem size), so later launches reuse them without tuning again::
+
+    tuner = Autotuner()
+    result = tuner.tune(
+        program, labels,
+        space={"num_blocks": [1, 2, 4], "threads_per_block": [2, 4, 8]},
+        setup=init_inputs,                       # setup(gpu, config)
+        verify=ExpectMemory(16, expected),       # verify(gpu) -> bool
+        problem_size=8,
+    )
+    tuner.load_kernel(gpu, program, labels, problem_size=8)
+
+``setup`` and ``verify`` must be picklable (module-level functions or
+instances like ExpectMemory) when ``processes`` is not 1.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import hashlib
+import itertools
+import json
+import os
+from pathlib import Path
+import numpy as np
+from .gpu import TinyGPU
+from .perf import PerfCounters
+from .trace import _encode_program
+
+_GRID_KEYS = ("num_blocks", "threads_per_block", "shared_size", "args")
+
+
+def default_cache_dir():
+    """$TINYGPU_CACHE_DIR, or ~/.cache/tinygpu."""
+    root = os.environ.get("TINYGPU_CACHE_DIR")
+    return Path(root) if root else Path.home() / ".cache" / "tinygpu"
+
+
+def kernel_hash(program, labels=None):
+    """Stable hash of an assembled program (and its labels)."""
+    payload = json.dumps(
+        [_encode_program(program), sorted((labels or {}).items())],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def expand_space(space):
+    """A dict of value lists becomes the list of all combinations; a list of
+    configuration dicts is returned as is."""
+    if isinstance(space, dict):
+        keys = list(space)
+        return [
+            dict(zip(keys, values, strict=True))
+            for values in itertools.product(*(space[k] for k in keys))
+        ]
+    return [dict(config) for config in space]
+
+
+class ExpectMemory:
+    """Picklable verifier: ``gpu.memory[offset:offset + len(expected)]``."""
+
+    def __init__(self, offset, expected):
+        self.offset = offset
+        self.expected = np.asarray(expected)
+
+    def __call__(self, gpu):
+        got = gpu.memory[self.offset : self.offset + self.expected.size]
+        return np.array_equal(got, self.expected)
+
+
+@dataclass
+class Trial:
+    config: dict
+    ok: bool
+    counters: dict = field(default_factory=dict)
+    error: str = None
+
+
+@dataclass
+class TuneResult:
+    best: dict  # None if no configuration passed
+    cost: float
+    trials: list  # empty when the result came from the cache
+    cached: bool = False
+
+
+def run_trial(program, labels, config, setup=None, verify=None, **options):
+    """Run one configuration; returns a Trial (errors are caught)."""
+    config = dict(config)
+    unknown = set(config) - set(_GRID_KEYS)
+    if unknown:
+        return Trial(config, False, error=f"unknown config keys {sorted(unknown)}")
+    num_blocks = config.get("num_blocks", 1)
+    tpb = config.get("threads_per_block", 1)
+    try:
+        gpu = TinyGPU(
+            num_threads=num_blocks * tpb,
+            num_registers=options.get("num_registers", 8),
+            mem_size=options.get("mem_size", 256),
+            record_history=False,
+            engine=options.get("engine", "vector"),
+        )
+        if setup is not None:
+            setup(gpu, config)
+        counters = PerfCounters()
+        gpu.attach(counters)
+        gpu.load_kernel(
+            program,
+            labels,
+            grid=(num_blocks, tpb),
+            args=config.get("args"),
+            shared_size=config.get("shared_size", 0),
+        )
+        gpu.run(max_cycles=options.get("max_cycles", 10000))
+    except Exception as exc:  # a failing configuration is just rejected
+        return Trial(config, False, error=f"{type(exc).__name__}: {exc}")
+    if gpu.active.any():
+        return Trial(config, False, counters.as_dict(), "did not finish")
+    ok = verify(gpu) if verify is not None else True
+    return Trial(config, bool(ok), counters.as_dict(), None if ok else "wrong output")
+
+
+def _run_trial_args(args):
+    program, labels, config, setup, verify, options = args
+    return run_trial(program, labels, config, setup, verify, **options)
+
+
+class Autotuner:
+    """
+    Sweep launch configurations and cache the best one on disk.
+
+    - objective: counter to minimize ("cycles", "instructions", ...) or a
+      callable(trial) -> cost
+    - processes: worker processes for the sweep (None: CPU count, 1: in
+      process)
+    - cache_dir: where results are kept (default_cache_dir())
+    - options: num_registers, mem_size, engine and max_cycles of the trial
+      GPUs
+    """
+
+    def __init__(self, objective="cycles", processes=None, cache_dir=None, **options):
+        self.objective = objective
+        self.processes = processes
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.options = options
+
+    def _cost(self, trial):
+        if callable(self.objective):
+            return self.objective(trial)
+        return trial.counters[self.objective]
+
+    def _cache_path(self, program, labels):
+        return self.cache_dir / "autotune" / f"{kernel_hash(program, labels)}.json"
+
+    def _read_cache(self, program, labels):
+        path = self._cache_path(program, labels)
+        if not path.exists():
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def best(self, program, labels=None, problem_size=None):
+        """Cached best configuration for ``problem_size`` (or None)."""
+        entry = self._read_cache(program, labels).get(json.dumps(problem_size))
+        return entry["config"] if entry else None
+
+    def _store(self, program, labels, problem_size, result):
+        entries = self._read_cache(program, labels)
+        entries[json.dumps(problem_size)] = {
+            "config": result.best,
+            "cost": result.cost,
+        }
+        path = self._cache_path(program, labels)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(tmp, path)
+
+    def _sweep(self, program, labels, configs, setup, verify):
+        jobs = [
+            (program, labels, config, setup, verify, self.options) for config in configs
+        ]
+        if self.processes == 1 or len(jobs) <= 1:
+            return [_run_trial_args(job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            return list(pool.map(_run_trial_args, jobs))
+
+    def tune(
+        self,
+        program,
+        labels=None,
+        space=None,
+        setup=None,
+        verify=None,
+        problem_size=None,
+        force=False,
+    ):
+        """
+        Return the TuneResult for ``problem_size``, from the cache unless
+        ``force`` is set; otherwise sweep ``space`` and cache the winner.
+        """
+        if not force:
+            entry = self._read_cache(program, labels).get(json.dumps(problem_size))
+            if entry:
+                return TuneResult(entry["config"], entry["cost"], [], cached=True)
+
+        trials = self._sweep(program, labels, expand_space(space), setup, verify)
+        passed = [t for t in trials if t.ok]
+        if not passed:
+            return TuneResult(None, float("inf"), trials)
+        winner = min(passed, key=self._cost)
+        result = TuneResult(winner.config, self._cost(winner), trials)
+        self._store(program, labels, problem_size, result)
+        return result
+
+    def load_kernel(self, gpu, program, labels=None, problem_size=None, args=None):
+        """gpu.load_kernel with the cached best configuration."""
+        config = self.best(program, labels, problem_size)
+        if config is None:
+            raise KeyError(f"no tuned configuration for problem size {problem_size!r}")
+        gpu.load_kernel(
+            program,
+            labels,
+            grid=(config.get("num_blocks", 1), config.get("threads_per_block", 1)),
+            args=args if args is not None else config.get("args"),
+            shared_size=config.get("shared_size", 0),
+        )
+        return config
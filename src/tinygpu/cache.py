@@ -0,0 +1,218 @@
+# src/tinygpu/cache.py
+"""
+Cache hierarchy simulator for global memory accesses.
+
+A CacheHierarchy is a GPU observer that models a per-block L1 cache in front
+of a shared L2 and counts hits and misses; data still lives in
+``gpu.memory``, so attaching one never changes results::
+
+    cache = CacheHierarchy(
+        l1=CacheConfig(size=64, line_size=8, assoc=2),
+        l2=CacheConfig(size=512, line_size=16, assoc=4, policy="fifo"),
+    )
+    gpu.attach(cache)
+    gpu.run()
+    print(cache.summary())
+
+Sizes are in memory words. Every cache instance keeps its tags and
+replacement stamps in ``(sets, ways)`` arrays (one extra leading axis for
+the per-block L1s). Both levels allocate on reads and writes; an L1 miss
+looks up L2, and a line is filled into every level that missed.
+
+Statistics are kept per kernel (each load_program starts a new KernelCacheStats),
+and within a kernel per PC and per block. Cache contents stay warm across
+kernels unless ``flush_on_load`` is set.
+"""
+
+from dataclasses import dataclass, field
+import numpy as np
+
+REPLACEMENT_POLICIES = ("lru", "fifo")
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    size: int = 64  # words
+    line_size: int = 4  # words
+    assoc: int = 1  # ways per set
+    policy: str = "lru"  # "lru" or "fifo"
+
+    def __post_init__(self):
+        if self.policy not in REPLACEMENT_POLICIES:
+            raise ValueError(
+                f"policy must be one of {REPLACEMENT_POLICIES}, got {self.policy!r}"
+            )
+        if min(self.size, self.line_size, self.assoc) <= 0:
+            raise ValueError("cache size, line size and associativity must be > 0")
+        if self.size % (self.line_size * self.assoc):
+            raise ValueError("cache size must be a multiple of line_size * assoc")
+
+    @property
+    def num_sets(self):
+        return self.size // (self.line_size * self.assoc)
+
+
+class Cache:
+    """Tag store of ``instances`` identical caches (e.g. one L1 per block)."""
+
+    def __init__(self, config, instances=1):
+        self.config = config
+        self.reset(instances)
+
+    def reset(self, instances=None):
+        if instances is not None:
+            self.instances = int(instances)
+        shape = (self.instances, self.config.num_sets, self.config.assoc)
+        self.tags = np.full(shape, -1, dtype=np.int64)
+        # last use (LRU) or fill time (FIFO); 0 = never filled
+        self.stamps = np.zeros(shape, dtype=np.int64)
+        self.clock = 0
+
+    def access(self, instances, addrs):
+        """Look up and fill one address per entry, in order; returns hit mask."""
+        cfg = self.config
+        lines = np.asarray(addrs, dtype=np.int64) // cfg.line_size
+        sets = lines % cfg.num_sets
+        hits = np.zeros(lines.shape, dtype=bool)
+        lru = cfg.policy == "lru"
+        for i, (inst, s, line) in enumerate(
+            zip(
+                np.asarray(instances).tolist(),
+                sets.tolist(),
+                lines.tolist(),
+                strict=True,
+            )
+        ):
+            self.clock += 1
+            tags = self.tags[inst, s]
+            way = np.flatnonzero(tags == line)
+            if way.size:
+                hits[i] = True
+                if lru:
+                    self.stamps[inst, s, way[0]] = self.clock
+                continue
+            victim = int(np.argmin(self.stamps[inst, s]))
+            tags[victim] = line
+            self.stamps[inst, s, victim] = self.clock
+        return hits
+
+
+@dataclass
+class LevelStats:
+    """Hit / miss counters of one cache level, in total, per PC and per block."""
+
+    name: str
+    pc_hits: np.ndarray
+    pc_misses: np.ndarray
+    block_hits: np.ndarray
+    block_misses: np.ndarray
+
+    @classmethod
+    def empty(cls, name, num_pcs, num_blocks):
+        def zeros(n):
+            return np.zeros(n, dtype=np.int64)
+
+        return cls(
+            name, zeros(num_pcs), zeros(num_pcs), zeros(num_blocks), zeros(num_blocks)
+        )
+
+    @property
+    def hits(self):
+        return int(self.pc_hits.sum())
+
+    @property
+    def misses(self):
+        return int(self.pc_misses.sum())
+
+    @property
+    def accesses(self):
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.accesses if self.accesses else 0.0
+
+    def add(self, pcs, blocks, hits):
+        np.add.at(self.pc_hits, pcs[hits], 1)
+        np.add.at(self.pc_misses, pcs[~hits], 1)
+        np.add.at(self.block_hits, blocks[hits], 1)
+        np.add.at(self.block_misses, blocks[~hits], 1)
+
+
+@dataclass
+class KernelCacheStats:
+    name: str
+    levels: dict = field(default_factory=dict)  # "L1"/"L2" -> LevelStats
+    reads: int = 0
+    writes: int = 0
+
+    def __getitem__(self, level):
+        return self.levels[level]
+
+    def summary(self):
+        lines = [f"kernel {self.name}: {self.reads} reads, {self.writes} writes"]
+        for stats in self.levels.values():
+            lines.append(
+                f"  {stats.name}: {stats.hits} hits, {stats.misses} misses "
+                f"({stats.hit_rate:.1%} hit rate)"
+            )
+            for pc in np.flatnonzero(stats.pc_hits + stats.pc_misses).tolist():
+                h, m = int(stats.pc_hits[pc]), int(stats.pc_misses[pc])
+                lines.append(f"    pc {pc}: {h} hits, {m} misses")
+        return "\n".join(lines)
+
+
+class CacheHierarchy:
+    """
+    Per-block L1 caches backed by one shared L2 (pass ``l2=None`` for L1 only).
+
+    Attach with ``gpu.attach(cache)``; ``cache.kernels`` holds the statistics
+    of every kernel run since, ``cache.stats`` those of the current one.
+    """
+
+    def __init__(self, l1=None, l2=None, flush_on_load=False):
+        self.l1 = Cache(l1 or CacheConfig())
+        self.l2 = Cache(l2) if l2 is not None else None
+        self.flush_on_load = flush_on_load
+        self.kernels = []
+
+    @property
+    def stats(self):
+        return self.kernels[-1] if self.kernels else None
+
+    def on_attach(self, gpu):
+        if self.l1.instances != gpu.num_blocks:
+            self.l1.reset(gpu.num_blocks)
+
+    def on_load(self, gpu):
+        if self.flush_on_load or self.l1.instances != gpu.num_blocks:
+            self.l1.reset(gpu.num_blocks)
+        if self.flush_on_load and self.l2 is not None:
+            self.l2.reset()
+        num_pcs = max(len(gpu.program), 1)
+        levels = {"L1": LevelStats.empty("L1", num_pcs, gpu.num_blocks)}
+        if self.l2 is not None:
+            levels["L2"] = LevelStats.empty("L2", num_pcs, gpu.num_blocks)
+        self.kernels.append(KernelCacheStats(f"#{len(self.kernels)}", levels))
+
+    def on_access(self, gpu, tids, addrs, write):
+        if self.stats is None:  # attached after load_program
+            self.on_load(gpu)
+        stats = self.stats
+        if write:
+            stats.writes += len(tids)
+        else:
+            stats.reads += len(tids)
+        blocks = np.clip(tids // max(gpu.threads_per_block, 1), 0, gpu.num_blocks - 1)
+        pcs = np.clip(gpu.pc[tids], 0, len(stats["L1"].pc_hits) - 1)
+
+        hits = self.l1.access(blocks, addrs)
+        stats["L1"].add(pcs, blocks, hits)
+        if self.l2 is None or hits.all():
+            return
+        miss = ~hits
+        l2_hits = self.l2.access(np.zeros(int(miss.sum()), dtype=np.int64), addrs[miss])
+        stats["L2"].add(pcs[miss], blocks[miss], l2_hits)
+
+    def summary(self):
+        return "\n".join(k.summary() for k in self.kernels)
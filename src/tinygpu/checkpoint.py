@@ -0,0 +1,184 @@
+# src/tinygpu/checkpoint.py
+"""
+Device-state checkpoints.
+
+save_state() writes the complete machine state of a TinyGPU (registers,
+global, shared and constant memory, PCs, active / flag / barrier masks,
+grid and resident blocks, kernel args, program and labels with their hash,
+cycle and instruction counters, recorded faults) to one binary file;
+load_state() resumes from it::
+
+    gpu.run(max_cycles=10**7, checkpoint_every=100_000,
+            checkpoint_path="run.ckpt")
+    ...
+    gpu = TinyGPU.load_state("run.ckpt")     # after a crash
+    gpu.run(max_cycles=10**7 - gpu.cycle)
+
+The file is a fixed header (magic, version, header length), a JSON header
+and the raw state arrays, each 64-byte aligned. load_state() maps the arrays
+copy-on-write (``mmap_mode="c"``), so restoring a large memory is
+zero-copy: pages are read when first touched and the checkpoint is never
+modified. History and observers are not part of the state.
+"""
+
+import json
+import os
+import struct
+import numpy as np
+from .assembler import Program
+from .autotune import kernel_hash
+from .gpu import TinyGPU
+from .trace import _decode_program, _encode_program
+
+MAGIC = b"TGPUCKPT"
+CHECKPOINT_VERSION = 1
+_PREFIX = struct.Struct("<8sII")  # magic, version, header length
+_ALIGN = 64
+
+STATE_ARRAYS = (
+    "registers",
+    "memory",
+    "shared",
+    "pc",
+    "active",
+    "flags",
+    "sync_waiting",
+    "sync_waiting_block",
+    "constants",
+    "slot_blocks",
+)
+_CONFIG_FIELDS = (
+    "num_threads",
+    "num_registers",
+    "mem_size",
+    "num_blocks",
+    "threads_per_block",
+    "shared_size",
+    "block_offset",
+    "grid_blocks",
+    "engine",
+    "fault_policy",
+    "record_history",
+)
+_CONSTRUCTOR_FIELDS = (
+    "num_threads",
+    "num_registers",
+    "mem_size",
+    "engine",
+    "fault_policy",
+    "record_history",
+)
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def save_state(gpu, path):
+    """Write the state of ``gpu`` to ``path`` (atomically replaced)."""
+    labels = {k: int(v) for k, v in (gpu.labels or {}).items()}
+    header = {
+        "config": {name: getattr(gpu, name) for name in _CONFIG_FIELDS},
+        "cycle": int(gpu.cycle),
+        "next_block": int(gpu.next_block),
+        "instructions_executed": int(gpu.instructions_executed),
+        "kernel_args": [int(a) for a in gpu.kernel_args],
+        "faults": gpu.faults,
+        "program": _encode_program(gpu.program),
+        "labels": labels,
+        "program_hash": kernel_hash(gpu.program, labels),
+        "data": getattr(gpu.program, "data", []),
+        "arrays": {},
+    }
+    arrays = {name: np.ascontiguousarray(getattr(gpu, name)) for name in STATE_ARRAYS}
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _aligned(offset + array.nbytes)
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    base = _aligned(_PREFIX.size + len(encoded))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, CHECKPOINT_VERSION, len(encoded)))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(base + header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(base + offset)
+    os.replace(tmp, path)
+
+
+def read_header(path):
+    """Return (header dict, offset of the array section) of a checkpoint."""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path}: not a TinyGPU checkpoint")
+        magic, version, length = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a TinyGPU checkpoint")
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path}: unsupported checkpoint version {version}")
+        header = json.loads(f.read(length))
+    return header, _aligned(_PREFIX.size + length)
+
+
+def _read_array(path, base, spec, mmap_mode):
+    dtype = np.dtype(spec["dtype"])
+    shape = tuple(spec["shape"])
+    if mmap_mode is None or 0 in shape:
+        count = int(np.prod(shape))
+        with open(path, "rb") as f:
+            f.seek(base + spec["offset"])
+            return np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+    return np.memmap(path, dtype, mmap_mode, base + spec["offset"], shape)
+
+
+def load_state(path, mmap_mode="c", gpu_factory=TinyGPU, **overrides):
+    """
+    Return a GPU in the state saved at ``path``, ready to continue running.
+
+    - mmap_mode: "c" maps the arrays copy-on-write (zero-copy restore), "r"
+      read-only, None reads them into memory
+    - gpu_factory: TinyGPU-compatible class to build
+    - overrides: constructor arguments replacing the saved ones (engine,
+      fault_policy, record_history)
+
+    Raises ValueError if the file is not a checkpoint or its program does
+    not match the saved program hash.
+    """
+    header, base = read_header(path)
+    labels = header["labels"]
+    program = _decode_program(header["program"])
+    if kernel_hash(program, labels) != header["program_hash"]:
+        raise ValueError(f"{path}: program does not match its hash")
+    if header["data"]:
+        program = Program(program, header["data"])
+
+    cfg = header["config"]
+    kwargs = {name: cfg[name] for name in _CONSTRUCTOR_FIELDS}
+    kwargs.update(overrides)
+    gpu = gpu_factory(**kwargs)
+    gpu.set_grid(
+        cfg["num_blocks"],
+        cfg["threads_per_block"],
+        cfg["shared_size"],
+        block_offset=cfg["block_offset"],
+    )
+    for name, spec in header["arrays"].items():
+        setattr(gpu, name, _read_array(path, base, spec, mmap_mode))
+    gpu.constants.flags.writeable = False
+    gpu.grid_blocks = cfg.get("grid_blocks", gpu.num_blocks)
+    gpu.next_block = header.get("next_block", gpu.num_blocks)
+    gpu.program = program
+    gpu.labels = labels
+    gpu.kernel_args = header["kernel_args"]
+    gpu.cycle = header["cycle"]
+    gpu.instructions_executed = header["instructions_executed"]
+    gpu.faults = header["faults"]
+    return gpu
@@ -0,0 +1,241 @@
+# src/tinygpu/debug.py
+"""
+Breakpoints and watchpoints.
+
+A Debugger is a GPU observer whose conditions are checked with a few NumPy
+operations per cycle, so run() keeps its normal speed until one fires and
+then returns after that cycle::
+
+    dbg = Debugger(gpu)
+    dbg.break_at("loop_end", blocks=[3])        # pc (or label) for blocks
+    dbg.watch(40)                               # global address written
+    dbg.watch(2, space="shared", value=0)       # shared[*][2] becomes 0
+    dbg.break_on_barrier("sync")                # SYNC barrier released
+    hits = dbg.run(max_cycles=10**6)            # [] when nothing fired
+    print(hits[0])                              # cycle, condition, threads
+
+A cycle is atomic: breakpoints report every thread that executed the pc
+during the cycle (also inside straight-line runs), and the state seen after
+run() returns is the end of that cycle. Global watchpoints without a value
+fire on every write (seen through the memory access hook); shared ones fire
+when the cell changes. Value watchpoints fire when the cell becomes equal.
+"""
+
+from dataclasses import dataclass, field
+import itertools
+import numpy as np
+from .memory import block_of
+
+_ids = itertools.count(1)
+
+
+@dataclass(eq=False)
+class PCBreakpoint:
+    pc: int
+    threads: np.ndarray = None  # None: any thread
+    blocks: np.ndarray = None  # None: any block
+    id: int = field(default_factory=lambda: next(_ids))
+
+    def describe(self):
+        return f"breakpoint {self.id} at pc {self.pc}"
+
+
+@dataclass(eq=False)
+class Watchpoint:
+    address: int
+    space: str = "global"  # "global" or "shared"
+    value: int = None  # None: any write (global) / change (shared)
+    block: int = None  # shared memory block (None: every block)
+    id: int = field(default_factory=lambda: next(_ids))
+
+    def describe(self):
+        where = f"{self.space}[{self.address}]"
+        if self.space == "shared" and self.block is not None:
+            where = f"shared[{self.block}][{self.address}]"
+        if self.value is None:
+            return f"watchpoint {self.id} on {where}"
+        return f"watchpoint {self.id}: {where} == {self.value}"
+
+
+@dataclass(eq=False)
+class BarrierBreakpoint:
+    kind: str = "any"  # "sync", "syncb" or "any"
+    id: int = field(default_factory=lambda: next(_ids))
+
+    def describe(self):
+        return f"breakpoint {self.id} on {self.kind} barrier release"
+
+
+@dataclass
+class Hit:
+    cycle: int  # gpu.cycle at the end of the cycle it fired in
+    breakpoint: object
+    threads: np.ndarray  # threads involved (empty when not thread-specific)
+    blocks: np.ndarray = None  # released blocks (barrier breakpoints)
+
+    def __str__(self):
+        text = f"cycle {self.cycle}: {self.breakpoint.describe()}"
+        if len(self.threads):
+            text += f" (threads {self.threads.tolist()})"
+        if self.blocks is not None:
+            text += f" (blocks {self.blocks.tolist()})"
+        return text
+
+
+def _ids_or_none(values):
+    return None if values is None else np.atleast_1d(np.asarray(values, dtype=int))
+
+
+class Debugger:
+    def __init__(self, gpu):
+        self.gpu = gpu
+        self.breakpoints = []
+        self.hits = []  # hits of the last cycle that fired
+        self._pending = []
+        self._last = {}  # Watchpoint -> previous cell values / conditions
+        gpu.attach(self)
+
+    # --- conditions ---
+
+    def break_at(self, pc, threads=None, blocks=None):
+        """Break when a (selected) thread executes ``pc`` (int or label)."""
+        if isinstance(pc, str):
+            if pc not in self.gpu.labels:
+                raise KeyError(f"unknown label {pc!r}")
+            pc = self.gpu.labels[pc]
+        bp = PCBreakpoint(int(pc), _ids_or_none(threads), _ids_or_none(blocks))
+        return self._add(bp)
+
+    def watch(self, address, space="global", value=None, block=None):
+        """Break when a memory cell is written (or becomes ``value``)."""
+        if space not in ("global", "shared"):
+            raise ValueError(f"space must be 'global' or 'shared', got {space!r}")
+        return self._add(Watchpoint(int(address), space, value, block))
+
+    def break_on_barrier(self, kind="any"):
+        """Break when a SYNC ("sync"), SYNCB ("syncb") or any barrier releases."""
+        if kind not in ("sync", "syncb", "any"):
+            raise ValueError(f"kind must be 'sync', 'syncb' or 'any', got {kind!r}")
+        return self._add(BarrierBreakpoint(kind))
+
+    def remove(self, bp):
+        self.breakpoints.remove(bp)
+        self._last.pop(bp, None)
+        self._update_pc_watch()
+
+    def clear(self):
+        self.breakpoints.clear()
+        self._last.clear()
+        self._update_pc_watch()
+
+    def _add(self, bp):
+        self.breakpoints.append(bp)
+        if isinstance(bp, Watchpoint):
+            self._last[bp] = self._cells(bp)
+        self._update_pc_watch()
+        return bp
+
+    # --- running ---
+
+    def run(self, max_cycles=1000, **kwargs):
+        """gpu.run until a condition fires; returns its hits ([] if none)."""
+        reason = self.gpu.run(max_cycles, **kwargs)
+        return reason if isinstance(reason, list) else []
+
+    def detach(self):
+        self.gpu.detach(self)
+        self.gpu.pc_watch = None
+
+    # --- observer hooks ---
+
+    def on_load(self, gpu):
+        for wp in self._last:
+            self._last[wp] = self._cells(wp)
+        self._update_pc_watch()
+
+    def on_access(self, gpu, tids, addrs, write):
+        if not write:
+            return
+        for bp in self.breakpoints:
+            if isinstance(bp, Watchpoint) and bp.space == "global":
+                if bp.value is None:
+                    hit = addrs == bp.address
+                    if hit.any():
+                        self._pending.append(Hit(gpu.cycle + 1, bp, tids[hit]))
+
+    def on_barrier(self, gpu, blocks):
+        kind = "sync" if blocks is None else "syncb"
+        for bp in self.breakpoints:
+            if isinstance(bp, BarrierBreakpoint) and bp.kind in (kind, "any"):
+                self._pending.append(Hit(gpu.cycle + 1, bp, np.array([], int), blocks))
+
+    def on_cycle(self, gpu):
+        hits, self._pending = self._pending, []
+        if gpu.pc_hits:
+            hits.extend(self._pc_hits(gpu))
+            gpu.pc_hits = []
+        for wp, last in list(self._last.items()):
+            hit = self._check_cells(wp, last)
+            if hit is not None:
+                hits.append(hit)
+        if hits:
+            self.hits = hits
+            gpu.halt(hits)
+
+    # --- evaluation ---
+
+    def _update_pc_watch(self):
+        pcs = [bp.pc for bp in self.breakpoints if isinstance(bp, PCBreakpoint)]
+        n = len(self.gpu.program)
+        if not pcs:
+            self.gpu.pc_watch = None
+            return
+        watch = np.zeros(n, dtype=bool)
+        watch[[pc for pc in pcs if 0 <= pc < n]] = True
+        self.gpu.pc_watch = watch
+        self.gpu.pc_hits = []
+
+    def _pc_hits(self, gpu):
+        pcs = np.concatenate([np.atleast_1d(p) for p, _t in gpu.pc_hits])
+        tids = np.concatenate([np.atleast_1d(t) for _p, t in gpu.pc_hits])
+        hits = []
+        for bp in self.breakpoints:
+            if not isinstance(bp, PCBreakpoint):
+                continue
+            mask = pcs == bp.pc
+            if bp.threads is not None:
+                mask &= np.isin(tids, bp.threads)
+            if bp.blocks is not None:
+                blocks = gpu.slot_blocks[block_of(gpu, tids)]
+                mask &= np.isin(blocks, bp.blocks)
+            if mask.any():
+                hits.append(Hit(gpu.cycle, bp, np.unique(tids[mask])))
+        return hits
+
+    def _cells(self, wp):
+        """Current watched values (global: scalar, shared: one per block)."""
+        gpu = self.gpu
+        if wp.space == "global":
+            if not 0 <= wp.address < gpu.mem_size:
+                raise IndexError(f"global address {wp.address} out of range")
+            return gpu.memory[wp.address : wp.address + 1].copy()
+        if not 0 <= wp.address < gpu.shared_size:
+            raise IndexError(f"shared address {wp.address} out of range")
+        column = gpu.shared[:, wp.address]
+        return (column if wp.block is None else column[[wp.block]]).copy()
+
+    def _check_cells(self, wp, last):
+        if wp.space == "global" and wp.value is None:
+            return None  # handled by on_access
+        current = self._cells(wp)
+        self._last[wp] = current
+        if wp.value is None:
+            fired = current != last
+        else:
+            fired = (current == wp.value) & (last != wp.value)
+        if not fired.any():
+            return None
+        blocks = None
+        if wp.space == "shared":
+            blocks = np.flatnonzero(fired) if wp.block is None else np.array([wp.block])
+        return Hit(self.gpu.cycle, wp, np.array([], int), blocks)
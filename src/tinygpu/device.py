@@ -0,0 +1,297 @@
+# src/tinygpu/device.py
+"""
+Multi-device simulation.
+
+A Context manages several simulated devices, each a TinyGPU whose global
+memory lives in a ``multiprocessing.shared_memory`` block. With
+``processes=True`` (the default) every device runs in its own worker
+process; kernels launched on several devices then execute in parallel.
+
+Copies never serialize data: the host and every worker map the same shared
+memory, so host->device, device->host and device->device copies are single
+``np.copyto`` calls between mapped arrays::
+
+    with Context(num_devices=2, mem_size=64) as ctx:
+        ctx.broadcast(a, offset=0)       # A and B on every device
+        ctx.broadcast(b, offset=8)
+        ctx.launch(program, labels, grid=(2, 4))   # blocks split by device
+        c = ctx.gather(offset=16, count=8, grid=(2, 4))
+
+launch() splits the grid's blocks into contiguous ranges, one per device;
+R5 and R7 hold grid-wide block / thread ids, so kernels written for one
+device index memory the same way when sharded. SYNC is a per-device
+barrier; kernels that need a grid-wide barrier must be split into several
+launches.
+"""
+
+from dataclasses import dataclass
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from .gpu import TinyGPU
+
+
+@dataclass
+class LaunchResult:
+    device: int
+    first_block: int
+    num_blocks: int
+    cycles: int
+    finished: bool  # every thread ran to completion within max_cycles
+
+
+def _attach_memory(shm, mem_size):
+    return np.ndarray((mem_size,), dtype=np.int32, buffer=shm.buf)
+
+
+def _run_kernel(gpu, kernel):
+    gpu.load_kernel(
+        kernel["program"],
+        kernel["labels"],
+        grid=(kernel["num_blocks"], kernel["threads_per_block"]),
+        args=kernel["args"],
+        shared_size=kernel["shared_size"],
+        block_offset=kernel["block_offset"],
+        constants=kernel.get("constants"),
+        resident_blocks=kernel.get("resident_blocks"),
+    )
+    gpu.run(max_cycles=kernel["max_cycles"])
+    return gpu.cycle, not gpu.active.any()
+
+
+def _worker(conn, shm_name, mem_size, gpu_kwargs):
+    """Worker process loop: run launch requests on a device-local TinyGPU."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    gpu = None
+    try:
+        gpu = TinyGPU(mem_size=mem_size, **gpu_kwargs)
+        gpu.memory = _attach_memory(shm, mem_size)
+        while True:
+            command, payload = conn.recv()
+            if command == "close":
+                break
+            try:
+                conn.send(("ok", _run_kernel(gpu, payload)))
+            except Exception as exc:  # reported to and re-raised by the host
+                conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        gpu = None  # drop the view before unmapping
+        shm.close()
+        conn.close()
+
+
+class Device:
+    """One simulated device: a TinyGPU plus its shared global memory."""
+
+    def __init__(self, index, mem_size, process=True, mp_context=None, **gpu_kwargs):
+        self.index = index
+        self.mem_size = int(mem_size)
+        self._shm = shared_memory.SharedMemory(create=True, size=self.mem_size * 4)
+        self.memory = _attach_memory(self._shm, self.mem_size)
+        self.memory[:] = 0
+        self.gpu = None
+        self._conn = None
+        self._process = None
+        self._pending = False
+        self._result = None
+        if process:
+            ctx = mp_context or mp.get_context()
+            self._conn, child = ctx.Pipe()
+            self._process = ctx.Process(
+                target=_worker,
+                args=(child, self._shm.name, self.mem_size, gpu_kwargs),
+                daemon=True,
+            )
+            self._process.start()
+            child.close()
+        else:
+            self.gpu = TinyGPU(mem_size=self.mem_size, **gpu_kwargs)
+            self.gpu.memory = self.memory
+
+    # --- copies (all zero-copy views of shared memory) ---
+
+    def copy_from_host(self, src, offset=0):
+        """memory[offset:offset + len(src)] = src."""
+        src = np.asarray(src)
+        np.copyto(
+            self.memory[offset : offset + src.size], src.ravel(), casting="unsafe"
+        )
+
+    def copy_to_host(self, offset=0, count=None, out=None):
+        """Return (or write into ``out``) memory[offset:offset + count]."""
+        if count is None:
+            count = self.mem_size - offset if out is None else len(out)
+        view = self.memory[offset : offset + count]
+        if out is None:
+            return view.copy()
+        np.copyto(out, view, casting="unsafe")
+        return out
+
+    def copy_to(self, peer, src_offset, dst_offset, count):
+        """Peer-to-peer copy of ``count`` words into another device."""
+        src = self.memory[src_offset : src_offset + count]
+        np.copyto(peer.memory[dst_offset : dst_offset + count], src)
+
+    # --- execution ---
+
+    def submit(self, kernel):
+        """Start a launch (see Context.launch); collect it with wait()."""
+        if self._process is None:
+            self._result = _run_kernel(self.gpu, kernel)
+        else:
+            self._conn.send(("launch", kernel))
+        self._pending = True
+
+    def wait(self):
+        """Return (cycles, finished) of the submitted launch."""
+        if not self._pending:
+            raise RuntimeError(f"device {self.index}: no kernel submitted")
+        self._pending = False
+        if self._process is None:
+            return self._result
+        status, result = self._conn.recv()
+        if status == "error":
+            raise RuntimeError(f"device {self.index}: {result}")
+        return result
+
+    def close(self):
+        if self._process is not None:
+            if self._process.is_alive():
+                self._conn.send(("close", None))
+                self._process.join(timeout=5)
+            self._conn.close()
+            self._process = None
+        if self._shm is not None:
+            self.gpu = None
+            self.memory = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class Context:
+    """
+    A set of simulated devices with copy and grid-splitting launch helpers.
+
+    Extra keyword arguments (num_registers, engine, fault_policy, ...) are
+    passed to every device's TinyGPU; history recording defaults to off.
+    """
+
+    def __init__(self, num_devices=2, mem_size=256, processes=True, **gpu_kwargs):
+        if num_devices < 1:
+            raise ValueError("num_devices must be >= 1")
+        gpu_kwargs.setdefault("record_history", False)
+        self.devices = []
+        try:
+            for i in range(num_devices):
+                self.devices.append(
+                    Device(i, mem_size, process=processes, **gpu_kwargs)
+                )
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __getitem__(self, index):
+        return self.devices[index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for device in self.devices:
+            device.close()
+
+    def split_blocks(self, num_blocks):
+        """Contiguous (first_block, count) ranges, one per device."""
+        sizes = [len(r) for r in np.array_split(np.arange(num_blocks), len(self))]
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1])).tolist()
+        return list(zip(starts, sizes, strict=True))
+
+    def broadcast(self, src, offset=0):
+        """Copy a host array into every device's memory at ``offset``."""
+        for device in self.devices:
+            device.copy_from_host(src, offset)
+
+    def scatter(self, src, offset, grid):
+        """Copy each device the slice of ``src`` its threads own under ``grid``.
+
+        Element i of ``src`` belongs to global thread i and lands at
+        ``offset + i`` on the device running that thread.
+        """
+        _num_blocks, tpb = grid
+        src = np.asarray(src)
+        for device, (first, count) in zip(
+            self.devices, self.split_blocks(grid[0]), strict=True
+        ):
+            lo, hi = first * tpb, min((first + count) * tpb, src.size)
+            if lo < hi:
+                device.copy_from_host(src[lo:hi], offset + lo)
+
+    def gather(self, offset, count, grid):
+        """Inverse of scatter: collect per-thread results into one array."""
+        _num_blocks, tpb = grid
+        out = np.zeros(count, dtype=np.int32)
+        for device, (first, blocks) in zip(
+            self.devices, self.split_blocks(grid[0]), strict=True
+        ):
+            lo, hi = first * tpb, min((first + blocks) * tpb, count)
+            if lo < hi:
+                device.copy_to_host(offset + lo, hi - lo, out=out[lo:hi])
+        return out
+
+    def launch(
+        self,
+        program,
+        labels=None,
+        grid=(1, 1),
+        args=None,
+        shared_size=0,
+        max_cycles=1000,
+        constants=None,
+        resident_blocks=None,
+    ):
+        """
+        Run a kernel with its grid's blocks split across the devices.
+
+        All devices run concurrently (in their worker processes); returns a
+        LaunchResult per device that received at least one block.
+        """
+        num_blocks, tpb = grid
+        launched = []
+        for device, (first, count) in zip(
+            self.devices, self.split_blocks(num_blocks), strict=True
+        ):
+            if count == 0:
+                continue
+            device.submit(
+                {
+                    "program": program,
+                    "labels": labels,
+                    "num_blocks": count,
+                    "threads_per_block": tpb,
+                    "args": args,
+                    "shared_size": shared_size,
+                    "block_offset": first,
+                    "max_cycles": max_cycles,
+                    "constants": constants,
+                    "resident_blocks": resident_blocks,
+                }
+            )
+            launched.append((device, first, count))
+        results, errors = [], []
+        for device, first, count in launched:
+            try:
+                cycles, finished = device.wait()
+            except RuntimeError as exc:  # keep collecting the other devices
+                errors.append(exc)
+                continue
+            results.append(LaunchResult(device.index, first, count, cycles, finished))
+        if errors:
+            raise errors[0]
+        return results
@@ -0,0 +1,365 @@
+# src/tinygpu/fuzz.py
+"""
+Randomized differential testing of execution engines.
+
+random_case() generates a random, terminating TinyGPU kernel together with a
+random grid and input memory; check_case() runs it on the reference
+per-thread engine (recording a replay log) and replays it on another engine,
+returning the first divergence; minimize() shrinks a failing case::
+
+    for failure in fuzz(iterations=500, seed=1, engines=("vector",)):
+        print(failure.divergence)
+        print(failure.minimized.program)
+
+Generated kernels use the integer ALU (including SEL and predicated forms),
+loops (uniform and thread-dependent trip counts), branches on CMP flags,
+CSWAP, SYNC / SYNCB and shared memory, but are race-free by construction,
+so every correct engine must produce bit-identical states:
+
+- global loads read a read-only input region or the thread's own output
+  slots; stores and CSWAP only touch the thread's own output slots,
+- shared memory is double-buffered: between two barriers a thread writes
+  only its own slot of the current buffer and reads the other buffer,
+- barriers only appear in uniform (top-level) control flow.
+"""
+
+from dataclasses import dataclass, replace
+import numpy as np
+from .gpu import TinyGPU
+from .instructions import ALU, BRANCHES, PREDICATES
+from .replay import ReplayRecorder
+
+# register roles in generated kernels
+_DATA = (0, 1)  # scratch values
+_ADDR = 2  # address temporary
+_COUNTERS = (3, 4)  # loop counters by nesting depth
+_OUT_SLOTS = 4  # private output words per thread
+
+
+@dataclass
+class FuzzCase:
+    program: list
+    num_blocks: int
+    threads_per_block: int
+    memory: np.ndarray  # initial global memory
+    shared_size: int
+    max_cycles: int = 2000
+    seed: int = None
+    # (start, end) pc ranges of generated statements, the units minimize()
+    # removes (None: single instructions)
+    units: list = None
+
+    @property
+    def num_threads(self):
+        return self.num_blocks * self.threads_per_block
+
+    def make_gpu(self, engine="thread", record_history=False):
+        gpu = TinyGPU(
+            num_threads=self.num_threads,
+            num_registers=8,
+            mem_size=len(self.memory),
+            record_history=record_history,
+            engine=engine,
+        )
+        gpu.memory[:] = self.memory
+        return gpu
+
+    def run(self, engine="thread", observers=()):
+        """Run the case on ``engine``; returns the GPU."""
+        gpu = self.make_gpu(engine)
+        for observer in observers:
+            gpu.attach(observer)
+        gpu.load_kernel(
+            self.program,
+            grid=(self.num_blocks, self.threads_per_block),
+            shared_size=self.shared_size,
+        )
+        gpu.run(max_cycles=self.max_cycles)
+        return gpu
+
+
+@dataclass
+class FuzzFailure:
+    case: FuzzCase
+    engine: str
+    divergence: object  # Divergence or a description of mismatching errors
+    minimized: FuzzCase = None
+
+
+class _Generator:
+    def __init__(self, rng, tpb, out_base, max_depth=2):
+        self.rng = rng
+        self.tpb = tpb
+        self.out_base = out_base
+        self.max_depth = max_depth
+        self.code = []  # instructions with symbolic ("@label") targets
+        self.units = []  # (start, end) code ranges of removable statements
+        self.phase = 0
+        self.labels = 0
+
+    def label(self):
+        self.labels += 1
+        return f"@{self.labels}"
+
+    def emit(self, instr, *args):
+        self.code.append((instr, list(args)))
+
+    def reg(self, choices=(0, 1, 5, 6, 7)):
+        return ("R", int(self.rng.choice(choices)))
+
+    def operand(self):
+        if self.rng.random() < 0.4:
+            return int(self.rng.integers(-8, 9))
+        return self.reg()
+
+    def alu(self):
+        dst = ("R", int(self.rng.choice(_DATA)))
+        kind = self.rng.integers(7)
+        if kind == 0:
+            self.emit("SET", dst, int(self.rng.integers(-50, 51)))
+        elif kind == 1:
+            self.emit("MUL", dst, self.reg(), int(self.rng.integers(-3, 4)))
+        elif kind == 2:
+            self.emit("SEL", dst, self.reg(), self.operand(), self.operand())
+        elif kind == 3:  # predicated on whatever the last CMP left
+            cond = str(self.rng.choice(sorted(PREDICATES)))
+            self.emit(f"@{cond} ADD", dst, self.reg(), self.operand())
+        elif kind == 4:
+            op = str(self.rng.choice(sorted(ALU)))
+            sources = [self.operand() for _ in range(ALU[op][0])]
+            self.emit(op, dst, self.reg(), *sources[1:])
+        else:
+            self.emit("ADD", dst, self.reg(), self.operand())
+
+    def own_slot(self):
+        """R_ADDR = address of one of this thread's output words."""
+        addr = ("R", _ADDR)
+        self.emit("MUL", addr, ("R", 7), _OUT_SLOTS)
+        k = int(self.rng.integers(_OUT_SLOTS))
+        self.emit("ADD", addr, addr, self.out_base + k)
+
+    def memory_op(self):
+        addr = ("R", _ADDR)
+        value = ("R", int(self.rng.choice(_DATA)))
+        kind = self.rng.integers(4)
+        if kind == 0:  # read-only input region
+            self.emit("ADD", addr, ("R", 7), int(self.rng.integers(8)))
+            self.emit("LD", value, addr)
+        elif kind == 1:
+            self.own_slot()
+            self.emit("LD", value, addr)
+        elif kind == 2:
+            self.own_slot()
+            self.emit("ST", addr, self.reg())
+        else:
+            self.own_slot()
+            other = self.out_base + int(self.rng.integers(_OUT_SLOTS))
+            self.emit("ADD", value, ("R", 7), 0)
+            self.emit("MUL", value, value, _OUT_SLOTS)
+            self.emit("ADD", value, value, other)
+            self.emit("CSWAP", addr, value)
+
+    def shared_op(self):
+        current = (self.phase % 2) * self.tpb
+        previous = ((self.phase + 1) % 2) * self.tpb
+        if self.rng.random() < 0.5:
+            self.emit("ADD", ("R", _ADDR), ("R", 6), current)
+            self.emit("SHST", ("R", _ADDR), self.reg())
+        else:
+            slot = previous + int(self.rng.integers(self.tpb))
+            self.emit("SHLD", ("R", int(self.rng.choice(_DATA))), slot)
+
+    def branch(self, depth):
+        else_label, end_label = self.label(), self.label()
+        self.emit("CMP", self.reg(), self.operand())
+        self.emit(str(self.rng.choice(["BRGT", "BRLT", "BRZ"])), else_label)
+        self.block(depth + 1, uniform=False)
+        self.emit("JMP", end_label)
+        self.code.append(else_label)
+        self.block(depth + 1, uniform=False)
+        self.code.append(end_label)
+
+    def loop(self, depth, uniform):
+        counter = ("R", _COUNTERS[depth])
+        start = self.label()
+        self.emit("SET", counter, 0)
+        self.code.append(start)
+        self.block(depth + 1, uniform=False)
+        self.emit("ADD", counter, counter, 1)
+        if uniform or self.rng.random() < 0.5:
+            self.emit("BNE", counter, int(self.rng.integers(1, 4)), start)
+        else:  # thread-dependent trip count: max(1, thread in block)
+            self.emit("CMP", counter, ("R", 6))
+            self.emit("BRLT", start)
+
+    def statement(self, depth, uniform):
+        start = len(self.code)
+        if self._statement(depth, uniform):
+            self.units.append((start, len(self.code)))
+
+    def _statement(self, depth, uniform):
+        """Emit one statement; returns False for barriers, which must stay
+        (removing one would let the two shared buffers race)."""
+        roll = self.rng.random()
+        nested = depth < self.max_depth
+        if roll < 0.35:
+            self.alu()
+        elif roll < 0.55:
+            self.memory_op()
+        elif roll < 0.7:
+            self.shared_op()
+        elif roll < 0.8 and nested:
+            self.branch(depth)
+        elif roll < 0.88 and nested:
+            self.loop(depth, uniform)
+        elif uniform and depth == 0:
+            self.emit(str(self.rng.choice(["SYNC", "SYNCB"])))
+            self.phase += 1
+            return False
+        else:
+            self.alu()
+        return True
+
+    def block(self, depth, uniform):
+        for _ in range(int(self.rng.integers(1, 5 if depth else 10))):
+            self.statement(depth, uniform)
+
+    def assemble(self):
+        """Resolve labels; returns (program, statement pc ranges)."""
+        program, targets, pc_at = [], {}, []
+        for item in self.code:
+            pc_at.append(len(program))
+            if isinstance(item, str):
+                targets[item] = len(program)
+            else:
+                program.append(item)
+        pc_at.append(len(program))
+        program = [
+            (instr, [targets.get(a, a) if isinstance(a, str) else a for a in args])
+            for instr, args in program
+        ]
+        units = [(pc_at[a], pc_at[b]) for a, b in self.units if pc_at[a] < pc_at[b]]
+        return program, units
+
+
+def random_case(seed=None, max_blocks=3, max_threads_per_block=4):
+    """Generate a random race-free kernel with grid and input memory."""
+    rng = np.random.default_rng(seed)
+    num_blocks = int(rng.integers(1, max_blocks + 1))
+    tpb = int(rng.integers(1, max_threads_per_block + 1))
+    threads = num_blocks * tpb
+    out_base = threads + 8  # input region: what R7 + [0, 8) can address
+    gen = _Generator(rng, tpb, out_base)
+    gen.block(0, uniform=True)
+    program, units = gen.assemble()
+    memory = rng.integers(-100, 101, size=out_base + threads * _OUT_SLOTS)
+    return FuzzCase(
+        program,
+        num_blocks,
+        tpb,
+        memory.astype(np.int32),
+        2 * tpb,
+        seed=seed,
+        units=units,
+    )
+
+
+def _outcome(case, engine, observers=()):
+    try:
+        return case.run(engine, observers), None
+    except Exception as exc:  # compared across engines
+        return None, exc
+
+
+def check_case(case, engine="vector", reference="thread"):
+    """
+    Run ``case`` on ``reference`` and replay it on ``engine``.
+
+    Returns None when both agree bit-for-bit (or raise the same exception
+    type), else a Divergence or a string describing mismatching errors.
+    """
+    recorder = ReplayRecorder()
+    _ref, ref_error = _outcome(case, reference, (recorder,))
+    if ref_error is not None:
+        _other, error = _outcome(case, engine)
+        if type(error) is type(ref_error):
+            return None
+        return f"{reference} raised {ref_error!r}, {engine} gave {error!r}"
+    try:
+        return recorder.log.diff(engine=engine)
+    except Exception as exc:
+        return f"{engine} raised {exc!r}, {reference} did not"
+
+
+def _remove(case, start, end):
+    """Drop pcs [start, end), retargeting branches and statement ranges."""
+    n = end - start
+
+    def shift(pc):
+        return pc - n if pc >= end else min(pc, start)
+
+    program = []
+    for pc, (instr, args) in enumerate(case.program):
+        if start <= pc < end:
+            continue
+        if instr in BRANCHES and isinstance(args[-1], int):
+            args = args[:-1] + [shift(args[-1])]
+        program.append((instr, list(args)))
+    units = [
+        (shift(a), shift(b))
+        for a, b in case.units or ()
+        if b <= start
+        or a >= end
+        or (a <= start and end <= b and (a, b) != (start, end))
+    ]
+    return replace(case, program=program, units=units)
+
+
+def minimize(case, failing, max_checks=2000):
+    """
+    Shrink ``case`` while ``failing(case)`` stays true: remove generated
+    statements (or single instructions for hand-written cases), last first,
+    until none can go, then drop blocks and threads.
+    """
+    if case.units is None:
+        case = replace(case, units=[(pc, pc + 1) for pc in range(len(case.program))])
+    checks, changed = 0, True
+    while changed and checks < max_checks:
+        changed = False
+        for start, end in sorted(case.units, key=lambda u: (-u[0], u[1])):
+            if (start, end) not in case.units or checks >= max_checks:
+                continue
+            candidate = _remove(case, start, end)
+            checks += 1
+            if failing(candidate):
+                case, changed = candidate, True
+    for name in ("num_blocks", "threads_per_block"):
+        while getattr(case, name) > 1 and checks < max_checks:
+            smaller = replace(case, **{name: getattr(case, name) - 1})
+            checks += 1
+            if not failing(smaller):
+                break
+            case = smaller
+    return case
+
+
+def fuzz(iterations=100, seed=0, engines=("vector",), reference="thread", **kwargs):
+    """
+    Check ``iterations`` random cases on every engine; returns a list of
+    FuzzFailure with minimized reproducers. Extra kwargs go to random_case.
+    """
+    failures = []
+    for i in range(iterations):
+        case = random_case(seed + i, **kwargs)
+        for engine in engines:
+            divergence = check_case(case, engine, reference)
+            if divergence is None:
+                continue
+
+            def failing(c, engine=engine):
+                return check_case(c, engine, reference) is not None
+
+            failures.append(
+                FuzzFailure(case, engine, divergence, minimize(case, failing))
+            )
+    return failures
@@ -1,10 +1,30 @@
 # src/tinygpu/gpu.py
 import numpy as np
-from .instructions import INSTRUCTIONS
+from .analyzer import analyze
+from .instructions import INSTRUCTIONS, split_predicate
+from .memory import FAULT_POLICIES
+from .vector import execute_cycle
+
+ENGINES = ("thread", "vector")
 
 
 class TinyGPU:
-    def __init__(self, num_threads=8, num_registers=8, mem_size=256):
+    def __init__(
+        self,
+        num_threads=8,
+        num_registers=8,
+        mem_size=256,
+        record_history=True,
+        engine="thread",
+        fault_policy="raise",
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+        if fault_policy not in FAULT_POLICIES:
+            raise ValueError(
+                f"fault_policy must be one of {FAULT_POLICIES}, got {fault_policy!r}"
+            )
+
         # core sizes
         self.num_threads = num_threads
         self.num_registers = num_registers
@@ -35,7 +55,29 @@ class TinyGPU:
             (1, 0), dtype=np.int32
         )  # shape (num_blocks, shared_size)
 
-        # history for visualization
+        # block residency (see load_kernel): the num_blocks resident slots
+        # run blocks slot_blocks (-1: retired) of a grid of grid_blocks
+        # blocks; next_block is the first block not launched yet
+        self.grid_blocks = 1
+        self.next_block = 1
+        self.slot_blocks = np.zeros(1, dtype=np.int64)
+
+        # execution engine ("thread": per-thread reference loop, "vector":
+        # NumPy over groups of threads sharing a PC, see tinygpu.vector)
+        self.engine = engine
+
+        # out-of-range memory accesses (see tinygpu.memory)
+        self.fault_policy = fault_policy
+        self.faults = []
+
+        # cycle counter and per-cycle observers (e.g. tinygpu.trace.TraceWriter)
+        self.cycle = 0
+        self.instructions_executed = 0  # thread-instructions since load
+        self.observers = []
+        self.access_observers = []  # observers with on_access (tinygpu.memory)
+
+        # history for visualization (disable for long runs streamed to disk)
+        self.record_history = record_history
         self.history_registers = []
         self.history_memory = []
         self.history_pc = []
@@ -45,36 +87,81 @@ class TinyGPU:
         self.program = []
         self.labels = {}
 
-        # initialize thread id in R7 and block/thread info in R5/R6 if possible
-        for tid in range(self.num_threads):
-            if self.num_registers > 7:
-                self.registers[tid, 7] = tid  # global thread id
-            else:
-                self.registers[tid, 0] = tid
+        # grid placement and kernel args of the last launch (see relaunch)
+        self.block_offset = 0
+        self.kernel_args = []
+        self.constants = np.zeros(0, dtype=np.int32)  # read-only, see LDC
 
-    def set_grid(self, num_blocks: int, threads_per_block: int, shared_size: int = 0):
+        # debugging (see tinygpu.debug): halt() ends run() after the current
+        # cycle; engines record (pcs, tids) of threads executing a pc marked
+        # in pc_watch into pc_hits
+        self.halted = None
+        self.pc_watch = None
+        self.pc_hits = []
+
+        # initialize thread id in R7 and block/thread info in R5/R6 if possible
+        tid_register = 7 if self.num_registers > 7 else 0
+        self.registers[:, tid_register] = np.arange(self.num_threads)
+
+    @classmethod
+    def for_kernel(
+        cls,
+        program,
+        labels=None,
+        num_threads=8,
+        mem_size=256,
+        num_args=0,
+        **kwargs,
+    ):
+        """
+        Create a TinyGPU whose register file is sized for ``program``.
+
+        The static analyzer determines the highest register the kernel
+        touches; the returned core has that many registers, but never fewer
+        than 8 so R5..R7 hold the block / thread ids exactly as on a default
+        core. Use ``analyze(program).shared_size``
+        for the shared-memory size to pass to set_grid/load_kernel. Other
+        keyword arguments (engine, fault_policy, ...) go to the constructor.
+        """
+        report = analyze(program, labels, num_args=num_args)
+        return cls(
+            num_threads=num_threads,
+            num_registers=max(report.register_count, 8),
+            mem_size=mem_size,
+            **kwargs,
+        )
+
+    def set_grid(
+        self,
+        num_blocks: int,
+        threads_per_block: int,
+        shared_size: int = 0,
+        block_offset: int = 0,
+    ):
         """
         Configure grid parameters and allocate shared memory.
         Must call before running (or call before load_program/run).
+
+        block_offset: index of this core's first block in a larger grid
+        split across devices (see tinygpu.device); R5 and R7 then hold the
+        grid-wide block and thread ids.
         """
         self.num_blocks = int(num_blocks)
         self.threads_per_block = int(threads_per_block)
         self.shared_size = int(shared_size)
+        self.block_offset = int(block_offset)
 
         total_threads = self.num_blocks * self.threads_per_block
         if total_threads != self.num_threads:
             # resize register and pc arrays to match requested total threads
-            old_regs = self.registers.copy()
-            old_num_threads = self.num_threads
+            old_regs = self.registers
+            min_threads = min(self.num_threads, total_threads)
             self.num_threads = total_threads
             self.registers = np.zeros(
                 (self.num_threads, self.num_registers), dtype=np.int32
             )
             # copy what fits
-            min_threads = min(old_num_threads, self.num_threads)
-            self.registers[:min_threads, : old_regs.shape[1]] = old_regs[
-                :min_threads, :
-            ]
+            self.registers[:min_threads] = old_regs[:min_threads]
 
             self.pc = np.zeros(self.num_threads, dtype=np.int32)
             self.active = np.ones(self.num_threads, dtype=bool)
@@ -82,33 +169,100 @@ class TinyGPU:
             self.sync_waiting = np.zeros(self.num_threads, dtype=bool)
             self.sync_waiting_block = np.zeros(self.num_threads, dtype=bool)
 
-        # allocate shared memory
-        self.shared = np.zeros((self.num_blocks, self.shared_size), dtype=np.int32)
-
-        # initialize block_id (R5) and thread_in_block (R6) registers
-        # for each thread if available
-        for tid in range(self.num_threads):
-            block_id = tid // self.threads_per_block
-            thread_in_block = tid % self.threads_per_block
-            if self.num_registers > 5:
-                self.registers[tid, 5] = block_id
-            if self.num_registers > 6:
-                self.registers[tid, 6] = thread_in_block
-            # keep R7 as global tid (already set in __init__)
+        # allocate shared memory (cleared in place if the shape is unchanged)
+        shape = (self.num_blocks, self.shared_size)
+        if self.shared.shape == shape:
+            self.shared.fill(0)
+        else:
+            self.shared = np.zeros(shape, dtype=np.int32)
+
+        self.grid_blocks = self.next_block = self.num_blocks
+        self.slot_blocks = np.arange(self.num_blocks)
+        self._init_thread_ids()
+
+    def _init_thread_ids(self, tids=None):
+        """Write block id (R5), thread in block (R6) and global tid (R7)."""
+        tids = np.arange(self.num_threads) if tids is None else tids
+        tpb = max(self.threads_per_block, 1)
+        blocks = self.block_offset + self.slot_blocks[tids // tpb]
+        if self.num_registers > 5:
+            self.registers[tids, 5] = blocks
+        if self.num_registers > 6:
+            self.registers[tids, 6] = tids % tpb
+        if self.num_registers > 7:
+            self.registers[tids, 7] = blocks * tpb + tids % tpb
+
+    def _write_kernel_args(self, args):
+        """Broadcast scalar kernel args into R0..Rk of every thread."""
+        self.kernel_args = [int(val) for val in args or []]
+        values = self.kernel_args[: self.num_registers]
+        if values:
+            self.registers[:, : len(values)] = np.asarray(
+                values, dtype=self.registers.dtype
+            )
 
     def load_program(self, program, labels=None):
+        self._install_program(program, labels)
+        self._load_data(getattr(program, "data", ()))
+        self._notify_load()
+
+    def _install_program(self, program, labels):
+        """Set the program and reset PCs, masks, counters and history."""
+        opcodes = {split_predicate(instr)[1] for instr, _args in program}
+        unknown = sorted(opcodes - INSTRUCTIONS.keys())
+        if unknown:
+            raise ValueError(f"unknown instructions: {', '.join(unknown)}")
         self.program = program
         self.labels = labels or {}
         self.pc[:] = 0
         self.sync_waiting[:] = False
         self.sync_waiting_block[:] = False
         self.active[:] = True
+        self.cycle = 0
+        self.instructions_executed = 0
+        self.faults = []
         self.history_registers = []
         self.history_memory = []
         self.history_pc = []
         self.history_flags = []
         self.history_shared = []
 
+    def _notify_load(self):
+        for observer in self.observers:
+            if hasattr(observer, "on_load"):
+                observer.on_load(self)
+
+    def _load_data(self, data):
+        """Write the ``.data`` initializers of an assembled Program."""
+        for address, values in data:
+            if address < 0 or address + len(values) > self.mem_size:
+                raise ValueError(
+                    f"data block [{address}, {address + len(values)}) does not "
+                    f"fit in memory of size {self.mem_size}"
+                )
+            self.memory[address : address + len(values)] = values
+
+    def attach(self, observer):
+        """Register an observer notified after every executed cycle.
+
+        Observers implement ``on_cycle(gpu)`` and/or ``on_access(gpu, tids,
+        addrs, write)`` (called by tinygpu.memory for every global memory
+        access), and may optionally implement ``on_attach(gpu)`` (called
+        here), ``on_load(gpu)`` (called by load_program) and
+        ``on_barrier(gpu, blocks)`` (called when a barrier releases).
+        """
+        self.observers.append(observer)
+        if hasattr(observer, "on_access"):
+            self.access_observers.append(observer)
+        if hasattr(observer, "on_attach"):
+            observer.on_attach(self)
+
+    def detach(self, observer):
+        """Stop notifying a previously attached observer."""
+        self.observers.remove(observer)
+        if observer in self.access_observers:
+            self.access_observers.remove(observer)
+
     def step(self):
         """
         Execute one cycle: each active thread executes one instruction at its PC.
@@ -122,9 +276,17 @@ class TinyGPU:
         # handle synchronization barriers (global and per-block)
         self._handle_global_barrier()
         self._handle_block_barriers()
+        if self.next_block < self.grid_blocks:
+            self._schedule_blocks()
+
+        self.cycle += 1
 
-        # record history snapshot
-        self._record_history()
+        # record history snapshot and notify observers
+        if self.record_history:
+            self._record_history()
+        for observer in self.observers:
+            if hasattr(observer, "on_cycle"):
+                observer.on_cycle(self)
 
     def _execute_threads(self):
         """Run instructions for each active thread for this cycle.
@@ -136,6 +298,10 @@ class TinyGPU:
         behavior where simple sequences (e.g., LOAD; ADD) execute in one
         cycle.
         """
+        if self.engine == "vector":
+            execute_cycle(self)
+            return
+
         for tid in range(self.num_threads):
             if not self.active[tid]:
                 continue
@@ -148,11 +314,16 @@ class TinyGPU:
                     break
 
                 instr, args = self.program[self.pc[tid]]
+                mask, instr = split_predicate(instr)
                 func = INSTRUCTIONS.get(instr)
                 before_pc = int(self.pc[tid])
+                if self.pc_watch is not None and self.pc_watch[before_pc]:
+                    self.pc_hits.append((before_pc, tid))
 
-                if func:
+                # predicated-off instructions are no-ops
+                if func and (mask is None or self.flags[tid] & mask):
                     func(self, tid, *args)
+                self.instructions_executed += 1
 
                 # if instruction changed PC or thread is waiting, stop
                 if (
@@ -167,31 +338,68 @@ class TinyGPU:
 
     def _handle_global_barrier(self):
         """Release all threads waiting at the global barrier when appropriate."""
-        if self.sync_waiting.any():
-            active_waiting = self.sync_waiting[self.active]
-            if active_waiting.size > 0 and active_waiting.all():
-                for tid in range(self.num_threads):
-                    if self.active[tid] and self.sync_waiting[tid]:
-                        self.pc[tid] = int(self.pc[tid]) + 1
-                        self.sync_waiting[tid] = False
+        if not self.sync_waiting.any():
+            return
+        active_waiting = self.sync_waiting[self.active]
+        if active_waiting.size > 0 and active_waiting.all():
+            released = self.active & self.sync_waiting
+            self.pc[released] += 1
+            self.sync_waiting[released] = False
+            self._notify_barrier(None)
 
     def _handle_block_barriers(self):
         """Check each block and release threads waiting at per-block barriers."""
         if not self.sync_waiting_block.any():
             return
 
-        for b in range(self.num_blocks):
-            start = b * self.threads_per_block
-            end = start + self.threads_per_block
-            block_active_mask = self.active[start:end]
-            if not block_active_mask.any():
-                continue
-            block_waiting = self.sync_waiting_block[start:end][block_active_mask]
-            if block_waiting.size > 0 and block_waiting.all():
-                for tid in range(start, end):
-                    if self.active[tid] and self.sync_waiting_block[tid]:
-                        self.pc[tid] = int(self.pc[tid]) + 1
-                        self.sync_waiting_block[tid] = False
+        shape = (self.num_blocks, self.threads_per_block)
+        active = self.active.reshape(shape)
+        waiting = self.sync_waiting_block.reshape(shape)
+        # blocks with active threads that all wait
+        ready = active.any(axis=1) & (waiting | ~active).all(axis=1)
+        if not ready.any():
+            return
+        released = (ready[:, None] & active & waiting).reshape(-1)
+        self.pc[released] += 1
+        self.sync_waiting_block[released] = False
+        self._notify_barrier(np.flatnonzero(ready))
+
+    def _schedule_blocks(self):
+        """Launch pending grid blocks into the slots of finished blocks.
+
+        A recycled slot keeps its register and shared-memory rows, which are
+        reset in place like a fresh launch.
+        """
+        tpb = self.threads_per_block
+        done = ~self.active.reshape(self.num_blocks, tpb).any(axis=1)
+        slots = np.flatnonzero(done & (self.slot_blocks >= 0))
+        if not slots.size:
+            return
+        count = min(slots.size, self.grid_blocks - self.next_block)
+        self.slot_blocks[slots[count:]] = -1
+        slots = slots[:count]
+        self.slot_blocks[slots] = np.arange(self.next_block, self.next_block + count)
+        self.next_block += count
+
+        tids = (slots[:, None] * tpb + np.arange(tpb)).ravel()
+        self.registers[tids] = 0
+        self.shared[slots] = 0
+        self.pc[tids] = 0
+        self.flags[tids] = 0
+        self.sync_waiting[tids] = False
+        self.sync_waiting_block[tids] = False
+        self._init_thread_ids(tids)
+        values = self.kernel_args[: self.num_registers]
+        if values:
+            self.registers[tids, : len(values)] = values
+        self.active[tids] = True
+
+    def _notify_barrier(self, blocks):
+        """on_barrier(gpu, blocks) hooks: blocks released by SYNCB, or None
+        for the global SYNC barrier."""
+        for observer in self.observers:
+            if hasattr(observer, "on_barrier"):
+                observer.on_barrier(self, blocks)
 
     def _record_history(self):
         self.history_registers.append(self.registers.copy())
@@ -200,11 +408,47 @@ class TinyGPU:
         self.history_flags.append(self.flags.copy())
         self.history_shared.append(self.shared.copy())
 
-    def run(self, max_cycles=1000):
+    def run(self, max_cycles=1000, checkpoint_every=None, checkpoint_path=None):
+        """
+        Run until every thread finished, for ``max_cycles`` cycles or until
+        an observer calls halt(); returns the halt reason (or None).
+
+        With ``checkpoint_every``, the state is saved to ``checkpoint_path``
+        (which may contain ``{cycle}``) whenever the cycle counter reaches a
+        multiple of it; resume with TinyGPU.load_state.
+        """
+        if checkpoint_every is not None and checkpoint_path is None:
+            raise ValueError("checkpoint_every needs a checkpoint_path")
+        self.halted = None
         for _cycle in range(max_cycles):
             if not self.active.any():
                 break
             self.step()
+            if checkpoint_every and self.cycle % checkpoint_every == 0:
+                self.save_state(str(checkpoint_path).format(cycle=self.cycle))
+            if self.halted is not None:
+                break
+        return self.halted
+
+    def halt(self, reason=True):
+        """Stop run() after the current cycle; run() returns ``reason``."""
+        self.halted = reason
+
+    # --- Checkpoints (see tinygpu.checkpoint) ---
+
+    def save_state(self, path):
+        """Write the complete machine state to ``path``."""
+        from .checkpoint import save_state
+
+        save_state(self, path)
+
+    @classmethod
+    def load_state(cls, path, mmap_mode="c", **overrides):
+        """Resume from a save_state file (memory-mapped copy-on-write by
+        default); ``overrides`` replace saved constructor arguments."""
+        from .checkpoint import load_state
+
+        return load_state(path, mmap_mode, cls, **overrides)
 
     # --- Step debugger helpers ---
 
@@ -222,7 +466,8 @@ class TinyGPU:
           or None for full memory.
         - regs_threads: list of thread indices to show registers for, or None
           for all.
-        Returns a dict.
+        Returns a dict of Python lists; for large grids use the read-only
+        views of tinygpu.inspection (state_view, thread_table) instead.
         """
         if mem_slice:
             start, end = mem_slice
@@ -238,7 +483,7 @@ class TinyGPU:
             regs_view = {tid: self.registers[tid, :].tolist() for tid in regs_threads}
 
         return {
-            "cycle": len(self.history_pc),
+            "cycle": self.cycle,
             "pc": self.pc.tolist(),
             "active": self.active.tolist(),
             "flags": self.flags.tolist(),
@@ -260,6 +505,7 @@ class TinyGPU:
 
         # target index after rewind
         target = len(self.history_registers) - cycles
+        self.cycle = target
         # restore last snapshot at index target-1 if target>0 else initial
         if target == 0:
             # reset to initial empty state
@@ -289,7 +535,15 @@ class TinyGPU:
             self.history_shared = self.history_shared[:target]
 
     def load_kernel(
-        self, program, labels=None, grid=(1, None), args=None, shared_size=0
+        self,
+        program,
+        labels=None,
+        grid=(1, None),
+        args=None,
+        shared_size=0,
+        block_offset=0,
+        constants=None,
+        resident_blocks=None,
     ):
         """
         Load a kernel program and configure grid/thread mapping.
@@ -299,6 +553,17 @@ class TinyGPU:
         - args: list of scalar kernel arguments. These will be written into
           registers R0..Rk for ALL threads.
         - shared_size: allocate per-block shared memory size (optional)
+        - block_offset: first grid block run by this core (see set_grid)
+        - constants: values of the read-only constant bank read with LDC
+          (None keeps the current bank, see set_constants)
+        - resident_blocks: run the grid with at most this many blocks
+          resident at once. State is allocated for the resident blocks only;
+          when every thread of one finishes, the next block of the grid is
+          launched into its slot, reusing its registers and shared memory.
+          R5 and R7 hold grid-wide ids as usual, but shared memory and
+          ``num_blocks`` refer to slots. SYNC waits for every thread of the
+          grid, so kernels using it raise ValueError unless the whole grid
+          is resident.
         """
         num_blocks, tpb = grid
         if tpb is None:
@@ -307,20 +572,66 @@ class TinyGPU:
                 if hasattr(self, "threads_per_block")
                 else (self.num_threads // num_blocks)
             )
+        num_blocks = int(num_blocks)
+        slots = num_blocks
+        if resident_blocks is not None:
+            if resident_blocks < 1:
+                raise ValueError(f"resident_blocks must be >= 1, got {resident_blocks}")
+            slots = min(num_blocks, int(resident_blocks))
+            if slots < num_blocks and any(instr == "SYNC" for instr, _ in program):
+                raise ValueError(
+                    f"SYNC needs all {num_blocks} blocks resident "
+                    f"(resident_blocks={resident_blocks})"
+                )
         # configure grid (this may resize internal thread arrays if total differs)
-        self.set_grid(int(num_blocks), int(tpb), shared_size=int(shared_size))
+        self.set_grid(
+            slots,
+            int(tpb),
+            shared_size=int(shared_size),
+            block_offset=int(block_offset),
+        )
+        self.grid_blocks = num_blocks
 
         # set kernel args into registers R0..Rk for every thread (if provided)
-        if args:
-            for tid in range(self.num_threads):
-                for i, val in enumerate(args):
-                    # write into register i (R0, R1, ...)
-                    if i < self.num_registers:
-                        self.registers[tid, i] = int(val)
+        self._write_kernel_args(args)
+        if constants is not None:
+            self.set_constants(constants)
 
         # finally load program and reset pcs/history
         self.load_program(program, labels)
 
+    def set_constants(self, values):
+        """
+        Set the constant bank: int32 values kernels read with ``LDC Rd,
+        addr``. The bank is read-only while the kernel runs.
+        """
+        constants = np.array(values, dtype=np.int32).ravel()
+        constants.flags.writeable = False
+        self.constants = constants
+
+    def relaunch(self, args=None, constants=None):
+        """
+        Launch the loaded kernel again on the same grid, resetting state in
+        place: registers are cleared and the thread ids and kernel args
+        (``args``, or those of the previous launch) rewritten, shared memory
+        is zeroed and PCs, barriers and history are reset. Global memory and
+        the constant bank (unless ``constants`` is given) are kept, so
+        repeated launches can consume earlier results. No state array is
+        reallocated.
+        """
+        if constants is not None:
+            self.set_constants(constants)
+        self.next_block = self.num_blocks
+        self.slot_blocks = np.arange(self.num_blocks)
+        self.registers.fill(0)
+        self.shared.fill(0)
+        self.flags.fill(0)
+        self._init_thread_ids()
+        self._write_kernel_args(self.kernel_args if args is None else args)
+        # like load_program, but .data initializers are not written again
+        self._install_program(self.program, self.labels)
+        self._notify_load()
+
     def run_kernel(self, max_cycles=1000):
         """
         Convenience wrapper: run until completion or max_cycles.
@@ -0,0 +1,145 @@
+# src/tinygpu/inspection.py
+"""
+Zero-copy state inspection.
+
+state_view() returns read-only NumPy views of the live GPU arrays, so
+inspecting a large grid costs nothing per element; thread_table() builds
+one structured array with a row per thread in a single vectorized pass::
+
+    view = state_view(gpu, blocks=3, registers=slice(0, 4), memory=(0, 64))
+    view.registers          # (threads of block 3, 4) int32, read-only
+    view.shared             # shared memory row of block 3
+    table = thread_table(gpu, blocks=(0, 8))
+    table[table["waiting_sync"]]["tid"]
+    pandas.DataFrame(table)  # or np.save("threads.npy", table)
+
+Selections are an int, a ``(start, stop)`` pair, a slice or a list of
+indices. Lists pick arbitrary rows and therefore copy; everything else is a
+view of the live state, so it follows later cycles (``.copy()`` to keep
+one). ``blocks`` selects resident block slots (the rows of ``gpu.shared``),
+``threads`` selects thread rows directly; they cannot be combined.
+"""
+
+from dataclasses import dataclass
+import numpy as np
+
+
+def _index(selection):
+    if selection is None:
+        return slice(None)
+    if isinstance(selection, slice):
+        return selection
+    if isinstance(selection, (int, np.integer)):
+        return slice(int(selection), int(selection) + 1)
+    if isinstance(selection, tuple) and len(selection) == 2:
+        return slice(*selection)
+    return np.asarray(selection, dtype=np.int64)
+
+
+def _thread_index(gpu, blocks, threads):
+    if blocks is None:
+        return _index(threads)
+    if threads is not None:
+        raise ValueError("select threads by blocks or by threads, not both")
+    blocks = _index(blocks)
+    tpb = gpu.threads_per_block
+    if tpb <= 0:
+        raise ValueError("block selection needs a grid (see set_grid)")
+    if isinstance(blocks, slice):
+        start, stop, step = blocks.indices(gpu.num_blocks)
+        if step == 1:
+            return slice(start * tpb, max(stop, start) * tpb)
+        blocks = np.arange(start, stop, step)
+    return (blocks[:, None] * tpb + np.arange(tpb)).ravel()
+
+
+def _readonly(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+@dataclass(frozen=True)
+class StateView:
+    cycle: int
+    tids: np.ndarray  # thread rows covered by the per-thread arrays
+    pc: np.ndarray
+    active: np.ndarray
+    flags: np.ndarray
+    waiting_sync: np.ndarray
+    waiting_syncb: np.ndarray
+    registers: np.ndarray  # (threads, registers)
+    memory: np.ndarray  # global memory window
+    shared: np.ndarray  # (blocks, shared_size)
+    constants: np.ndarray
+
+
+def state_view(gpu, blocks=None, threads=None, registers=None, memory=None):
+    """
+    Read-only views of the current state of ``gpu``.
+
+    - blocks / threads: thread rows to include (see module docstring)
+    - registers: register columns (None: all)
+    - memory: global memory window (None: all)
+
+    ``shared`` holds the rows of the selected blocks (all rows when only
+    ``threads`` is given).
+    """
+    rows = _thread_index(gpu, blocks, threads)
+    cols = _index(registers)
+    shared = gpu.shared if blocks is None else gpu.shared[_index(blocks)]
+    if isinstance(rows, slice):
+        regs = gpu.registers[rows, cols]
+    else:
+        regs = gpu.registers[rows][:, cols]
+    return StateView(
+        cycle=gpu.cycle,
+        tids=np.arange(gpu.num_threads)[rows],
+        pc=_readonly(gpu.pc[rows]),
+        active=_readonly(gpu.active[rows]),
+        flags=_readonly(gpu.flags[rows]),
+        waiting_sync=_readonly(gpu.sync_waiting[rows]),
+        waiting_syncb=_readonly(gpu.sync_waiting_block[rows]),
+        registers=_readonly(regs),
+        memory=_readonly(gpu.memory[_index(memory)]),
+        shared=_readonly(shared),
+        constants=_readonly(gpu.constants),
+    )
+
+
+def thread_table(gpu, blocks=None, threads=None, registers=None):
+    """
+    Structured array with one row per selected thread.
+
+    Fields: tid, block (grid block), thread (index in block), pc, active,
+    waiting_sync, waiting_syncb, flags and one int32 field per selected
+    register (R0, R1, ...). Flat fields keep it directly usable with
+    ``pandas.DataFrame`` and ``np.save``.
+    """
+    rows = _thread_index(gpu, blocks, threads)
+    tids = np.arange(gpu.num_threads)[rows]
+    numbers = np.arange(gpu.num_registers)[_index(registers)]
+    dtype = [
+        ("tid", np.int64),
+        ("block", np.int64),
+        ("thread", np.int64),
+        ("pc", np.int32),
+        ("active", bool),
+        ("waiting_sync", bool),
+        ("waiting_syncb", bool),
+        ("flags", np.int8),
+    ] + [(f"R{r}", np.int32) for r in numbers]
+    table = np.empty(len(tids), dtype=dtype)
+    tpb = max(gpu.threads_per_block, 1)
+    table["tid"] = tids
+    table["block"] = gpu.block_offset + gpu.slot_blocks[tids // tpb]
+    table["thread"] = tids % tpb
+    table["pc"] = gpu.pc[rows]
+    table["active"] = gpu.active[rows]
+    table["waiting_sync"] = gpu.sync_waiting[rows]
+    table["waiting_syncb"] = gpu.sync_waiting_block[rows]
+    table["flags"] = gpu.flags[rows]
+    regs = gpu.registers[rows]
+    for r in numbers:
+        table[f"R{r}"] = regs[:, r]
+    return table
@@ -1,3 +1,9 @@
+from functools import lru_cache
+import operator
+import numpy as np
+from . import memory
+
+
 def _resolve(gpu, tid, operand):
     if isinstance(operand, tuple) and operand[0] == "R":
         return int(gpu.registers[tid, operand[1]])
@@ -14,37 +20,106 @@ def op_set(gpu, tid, rd_operand, imm_operand):
     gpu.registers[tid, rd] = _resolve(gpu, tid, imm_operand)
 
 
-def op_add(gpu, tid, rd_operand, op1, op2):
-    if not (isinstance(rd_operand, tuple) and rd_operand[0] == "R"):
-        raise TypeError("ADD target must be a register")
-    rd = rd_operand[1]
-    v1 = _resolve(gpu, tid, op1)
-    v2 = _resolve(gpu, tid, op2)
-    gpu.registers[tid, rd] = int(v1 + v2)
+# --- integer ALU ---
+#
+# Every ALU instruction is "OP Rd, a[, b]" and is defined once, as a function
+# that works on Python ints (per-thread engine) and int64 arrays (vectorized
+# engine). Results wrap to int32 (two's complement), and:
+#   DIV truncates toward zero; x / 0 = -1 and INT_MIN / -1 = INT_MIN
+#   MOD has the sign of the dividend; x % 0 = x and INT_MIN % -1 = 0
+#   SHL / SHR use the low 5 bits of the shift count; SHR is arithmetic
+#   ABS(INT_MIN) = INT_MIN
+
+
+def wrap32(values):
+    """Wrap integers (Python ints or int64 arrays) to int32, two's complement."""
+    if isinstance(values, int):
+        return (values + 2**31) % 2**32 - 2**31
+    return np.asarray(values, dtype=np.int64).astype(np.int32)
+
+
+def _div(a, b):
+    safe = np.where(b == 0, 1, b)
+    q = (np.abs(a) // np.abs(safe)) * np.sign(a) * np.sign(safe)
+    return np.where(b == 0, -1, q)
+
+
+def _mod(a, b):
+    safe = np.where(b == 0, 1, b)
+    return np.where(b == 0, a, a - _div(a, safe) * safe)
+
+
+# opcode -> (number of source operands, function of ints or int64 arrays)
+ALU = {
+    "ADD": (2, operator.add),
+    "SUB": (2, operator.sub),
+    "MUL": (2, operator.mul),
+    "DIV": (2, _div),
+    "MOD": (2, _mod),
+    "AND": (2, operator.and_),
+    "OR": (2, operator.or_),
+    "XOR": (2, operator.xor),
+    "NOT": (1, operator.invert),
+    "SHL": (2, lambda a, b: a << (b & 31)),
+    "SHR": (2, lambda a, b: a >> (b & 31)),
+    "MIN": (2, np.minimum),
+    "MAX": (2, np.maximum),
+    "ABS": (1, abs),
+}
 
 
-def op_mul(gpu, tid, rd_operand, op1, op2):
-    if not (isinstance(rd_operand, tuple) and rd_operand[0] == "R"):
-        raise TypeError("MUL target must be a register")
-    rd = rd_operand[1]
-    v1 = _resolve(gpu, tid, op1)
-    v2 = _resolve(gpu, tid, op2)
-    gpu.registers[tid, rd] = int(v1 * v2)
+def _alu_op(name):
+    func = ALU[name][1]
+
+    def handler(gpu, tid, rd_operand, *operands):
+        if not (isinstance(rd_operand, tuple) and rd_operand[0] == "R"):
+            raise TypeError(f"{name} target must be a register")
+        values = [int(_resolve(gpu, tid, op)) for op in operands]
+        gpu.registers[tid, rd_operand[1]] = wrap32(func(*values))
+
+    handler.__name__ = handler.__qualname__ = f"op_{name.lower()}"
+    return handler
+
+
+op_add = _alu_op("ADD")
+op_sub = _alu_op("SUB")
+op_mul = _alu_op("MUL")
+op_div = _alu_op("DIV")
+op_mod = _alu_op("MOD")
+op_and = _alu_op("AND")
+op_or = _alu_op("OR")
+op_xor = _alu_op("XOR")
+op_not = _alu_op("NOT")
+op_shl = _alu_op("SHL")
+op_shr = _alu_op("SHR")
+op_min = _alu_op("MIN")
+op_max = _alu_op("MAX")
+op_abs = _alu_op("ABS")
 
 
 def op_ld(gpu, tid, rd_operand, addr_operand):
     if not (isinstance(rd_operand, tuple) and rd_operand[0] == "R"):
         raise TypeError("LD destination must be a register")
     rd = rd_operand[1]
-    a = _resolve(gpu, tid, addr_operand)
-    a = int(a)
-    gpu.registers[tid, rd] = int(gpu.memory[a])
+    a = int(_resolve(gpu, tid, addr_operand))
+    gpu.registers[tid, rd] = memory.load(gpu, tid, a)
+
+
+def op_ldc(gpu, tid, rd_operand, caddr_operand):
+    """
+    LDC Rd, caddr  -> Rd = constants[caddr] (read-only constant bank set
+    at launch, see TinyGPU.set_constants)
+    """
+    if not (isinstance(rd_operand, tuple) and rd_operand[0] == "R"):
+        raise TypeError("LDC destination must be a register")
+    caddr = int(_resolve(gpu, tid, caddr_operand))
+    gpu.registers[tid, rd_operand[1]] = memory.const_load(gpu, tid, caddr)
 
 
 def op_st(gpu, tid, addr_operand, rs_operand):
     a = int(_resolve(gpu, tid, addr_operand))
     val = int(_resolve(gpu, tid, rs_operand))
-    gpu.memory[a] = val
+    memory.store(gpu, tid, a, val)
 
 
 # control flow ops
@@ -87,15 +162,8 @@ def op_cswap(gpu, tid, addr_a_operand, addr_b_operand):
     """
     a = int(_resolve(gpu, tid, addr_a_operand))
     b = int(_resolve(gpu, tid, addr_b_operand))
-
-    # bounds check (defensive)
-    if a < 0 or a >= gpu.mem_size or b < 0 or b >= gpu.mem_size:
-        return
-
-    va = int(gpu.memory[a])
-    vb = int(gpu.memory[b])
-    if va > vb:
-        gpu.memory[a], gpu.memory[b] = vb, va
+    # out-of-range addresses are handled by the GPU's fault policy
+    memory.cswap(gpu, tid, a, b)
 
 
 # Flags helper: set bitmask in gpu.flags[tid]
@@ -153,25 +221,10 @@ def op_shld(gpu, tid, rd_operand, saddr_operand):
     if not (isinstance(rd_operand, tuple) and rd_operand[0] == "R"):
         raise TypeError("SHLD target must be a register")
     rd = rd_operand[1]
-    # resolve shared address index
+    # shared[block_id] is selected from tid and threads_per_block (more
+    # robust than relying on register R5 which user code can overwrite)
     sidx = int(_resolve(gpu, tid, saddr_operand))
-    # bounds check
-    if sidx < 0 or sidx >= gpu.shared_size:
-        gpu.registers[tid, rd] = 0
-        return
-    # determine block id from tid and current threads_per_block (more robust
-    # than relying on register R5 which user code can overwrite)
-    if getattr(gpu, "threads_per_block", 0) > 0:
-        block_id = int(tid // gpu.threads_per_block)
-    else:
-        block_id = int(gpu.registers[tid, 5]) if gpu.num_registers > 5 else 0
-
-    # bounds-check block_id against allocated shared memory
-    if block_id < 0 or block_id >= getattr(gpu, "num_blocks", 1):
-        gpu.registers[tid, rd] = 0
-        return
-
-    gpu.registers[tid, rd] = int(gpu.shared[block_id, sidx])
+    gpu.registers[tid, rd] = memory.shared_load(gpu, tid, sidx)
 
 
 def op_shst(gpu, tid, saddr_operand, rs_operand):
@@ -179,19 +232,16 @@ def op_shst(gpu, tid, saddr_operand, rs_operand):
     SHST saddr, Rs  -> shared[block_id][saddr] = Rs
     """
     sidx = int(_resolve(gpu, tid, saddr_operand))
-    if sidx < 0 or sidx >= gpu.shared_size:
-        return
-    # determine block id from tid and current threads_per_block to avoid
-    # relying on register R5 which user code may overwrite
-    if getattr(gpu, "threads_per_block", 0) > 0:
-        block_id = int(tid // gpu.threads_per_block)
-    else:
-        block_id = int(gpu.registers[tid, 5]) if gpu.num_registers > 5 else 0
     val = int(_resolve(gpu, tid, rs_operand))
-    # bounds-check block_id before writing
-    if block_id < 0 or block_id >= getattr(gpu, "num_blocks", 1):
-        return
-    gpu.shared[block_id, sidx] = val
+    memory.shared_store(gpu, tid, sidx, val)
+
+
+# SEL Rd, c, a, b  -> Rd = a if c != 0 else b (branch-free select)
+def op_sel(gpu, tid, rd_operand, cond, op1, op2):
+    if not (isinstance(rd_operand, tuple) and rd_operand[0] == "R"):
+        raise TypeError("SEL target must be a register")
+    chosen = op1 if _resolve(gpu, tid, cond) != 0 else op2
+    gpu.registers[tid, rd_operand[1]] = _resolve(gpu, tid, chosen)
 
 
 def op_syncb(gpu, tid):
@@ -207,8 +257,21 @@ def op_syncb(gpu, tid):
 INSTRUCTIONS = {
     "SET": op_set,
     "ADD": op_add,
+    "SUB": op_sub,
     "MUL": op_mul,
+    "DIV": op_div,
+    "MOD": op_mod,
+    "AND": op_and,
+    "OR": op_or,
+    "XOR": op_xor,
+    "NOT": op_not,
+    "SHL": op_shl,
+    "SHR": op_shr,
+    "MIN": op_min,
+    "MAX": op_max,
+    "ABS": op_abs,
     "LD": op_ld,
+    "LDC": op_ldc,
     "ST": op_st,
     "JMP": op_jmp,
     "BEQ": op_beq,
@@ -222,4 +285,82 @@ INSTRUCTIONS = {
     "SHLD": op_shld,
     "SHST": op_shst,
     "SYNCB": op_syncb,
+    "SEL": op_sel,
+}
+
+# Operand roles per opcode, used by the static tools (analyzer, optimizer):
+#   "dst"   register written by the instruction
+#   "src"   register or immediate value read by the instruction
+#   "label" branch target (immediate PC, resolved from a label)
+OPERANDS = {
+    "SET": ("dst", "src"),
+    "LD": ("dst", "src"),
+    "LDC": ("dst", "src"),
+    "ST": ("src", "src"),
+    "JMP": ("label",),
+    "BEQ": ("src", "src", "label"),
+    "BNE": ("src", "src", "label"),
+    "SYNC": (),
+    "CSWAP": ("src", "src"),
+    "CMP": ("src", "src"),
+    "BRGT": ("label",),
+    "BRLT": ("label",),
+    "BRZ": ("label",),
+    "SHLD": ("dst", "src"),
+    "SHST": ("src", "src"),
+    "SYNCB": (),
+    "SEL": ("dst", "src", "src", "src"),
+}
+OPERANDS.update({op: ("dst",) + ("src",) * arity for op, (arity, _f) in ALU.items()})
+
+# opcode classes
+BRANCHES = {"JMP", "BEQ", "BNE", "BRGT", "BRLT", "BRZ"}
+CONDITIONAL_BRANCHES = BRANCHES - {"JMP"}
+BARRIERS = {"SYNC", "SYNCB"}
+FLAG_WRITERS = {"CMP"}
+FLAG_READERS = {"BRGT", "BRLT", "BRZ"}
+MEMORY_WRITERS = {"ST", "CSWAP", "SHST"}
+MEMORY_READERS = {"LD", "CSWAP", "SHLD"}
+
+# Predicated forms "@<cond> <instr> ..." (e.g. "@GT ADD R1, R1, 1") only
+# execute for threads whose CMP flags match; the others treat them as a
+# no-op. Each condition is the set of flag bits (Z=1, N=2, G=4) of which
+# any must be set.
+PREDICATES = {
+    "Z": 0b001,
+    "EQ": 0b001,
+    "LT": 0b010,
+    "GT": 0b100,
+    "LE": 0b011,
+    "GE": 0b101,
+    "NZ": 0b110,
+    "NE": 0b110,
 }
+# instructions that cannot be predicated (use a flag branch instead)
+UNPREDICABLE = BRANCHES | BARRIERS
+
+
+@lru_cache(maxsize=None)
+def split_predicate(instr):
+    """Split "@GT ADD" into (flag mask, "ADD"); plain opcodes give (None, instr).
+
+    Raises ValueError for an unknown condition.
+    """
+    if not instr.startswith("@"):
+        return None, instr
+    cond, _, base = instr[1:].partition(" ")
+    if cond not in PREDICATES or not base:
+        raise ValueError(f"bad predicated instruction {instr!r}")
+    return PREDICATES[cond], base.strip()
+
+
+def operand_roles(instr):
+    """OPERANDS entry of an opcode, predicated or not (None if unknown)."""
+    try:
+        return OPERANDS.get(split_predicate(instr)[1])
+    except ValueError:
+        return None
+
+
+# registers preset by the core: R5 = block id, R6 = thread in block, R7 = tid
+PRESET_REGISTERS = {5: "block id", 6: "thread in block", 7: "thread id"}
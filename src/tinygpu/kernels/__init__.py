@@ -0,0 +1,39 @@
+# src/tinygpu/kernels/__init__.py
+"""
+Parallel primitives on NumPy arrays.
+
+Each function copies its inputs to a fresh TinyGPU, sizes the grid from
+the input, launches one or more kernels and returns the result::
+
+    from tinygpu import kernels
+
+    kernels.reduce(x)                      # also op="min" / "max"
+    kernels.inclusive_scan(x), kernels.exclusive_scan(x)
+    kernels.histogram(x, bins=16)
+    kernels.sort(x)                        # bitonic
+    kernels.matmul(a, b)                   # shared-memory tiles
+    kernels.stencil(x, [1, 2, 1])          # weights in constant memory
+
+Values are int32 and arithmetic wraps like the ALU. Every function takes
+``engine`` ("vector" by default) and ``stats``: a dict that receives the
+cycles, thread-instructions and launches used, e.g. for benchmarks
+(see examples/bench_kernels.py).
+"""
+
+from .histogram import histogram
+from .matmul import matmul
+from .reduce import reduce
+from .scan import exclusive_scan, inclusive_scan, scan
+from .sort import sort
+from .stencil import stencil
+
+__all__ = [
+    "exclusive_scan",
+    "histogram",
+    "inclusive_scan",
+    "matmul",
+    "reduce",
+    "scan",
+    "sort",
+    "stencil",
+]
@@ -0,0 +1,108 @@
+# src/tinygpu/kernels/_launch.py
+"""Host-side helpers shared by the kernel library."""
+
+from functools import lru_cache
+import numpy as np
+from ..assembler import assemble
+from ..gpu import TinyGPU
+
+NUM_REGISTERS = 24
+INT32_MIN, INT32_MAX = -(2**31), 2**31 - 1
+
+
+@lru_cache(maxsize=None)
+def _assembled(source, defines):
+    return assemble(source, dict(defines))
+
+
+def program(source, **defines):
+    """Assembled (program, labels) of a kernel source, cached per defines."""
+    return _assembled(source, tuple(sorted(defines.items())))
+
+
+def as_int32(values, name="values"):
+    """Flat int32 copy of ``values`` (ValueError if they do not fit)."""
+    array = np.asarray(values)
+    if array.size and array.dtype.kind not in "iub":
+        raise TypeError(f"{name} must be integers, got {array.dtype}")
+    if array.size and (array.min() < INT32_MIN or array.max() > INT32_MAX):
+        raise ValueError(f"{name} do not fit in int32")
+    return array.astype(np.int32).ravel()
+
+
+def pow2_at_least(n):
+    return 1 << max(int(n) - 1, 0).bit_length()
+
+
+def block_size(n, max_threads=64):
+    """
+    Power-of-two threads per block for ``n`` work items (2..max_threads).
+
+    The kernels halve and pair threads within a block, so ``max_threads``
+    must be a power of two (ValueError otherwise).
+    """
+    max_threads = int(max_threads)
+    if max_threads < 2 or max_threads & (max_threads - 1):
+        raise ValueError(
+            f"threads_per_block must be a power of two >= 2, got {max_threads}"
+        )
+    return max(2, min(max_threads, pow2_at_least(n)))
+
+
+class Session:
+    """
+    One TinyGPU plus a bump allocator over its global memory.
+
+    Kernels put their inputs, allocate outputs and launch one or more
+    programs; ``stats`` accumulates cycles, thread-instructions and launches.
+    """
+
+    def __init__(self, engine="vector", max_cycles=10**7, stats=None):
+        self.gpu = TinyGPU(
+            num_threads=1,
+            num_registers=NUM_REGISTERS,
+            mem_size=0,
+            record_history=False,
+            engine=engine,
+        )
+        self.max_cycles = max_cycles
+        self.stats = stats if stats is not None else {}
+        for key in ("cycles", "instructions", "launches"):
+            self.stats.setdefault(key, 0)
+        self.top = 0
+
+    def alloc(self, n, fill=0):
+        """Address of ``n`` fresh words (memory grows as needed)."""
+        address, self.top = self.top, self.top + int(n)
+        gpu = self.gpu
+        if self.top > gpu.mem_size:
+            grown = np.zeros(max(self.top, 2 * gpu.mem_size), dtype=np.int32)
+            grown[: gpu.mem_size] = gpu.memory
+            gpu.memory, gpu.mem_size = grown, len(grown)
+        gpu.memory[address : self.top] = fill
+        return address
+
+    def put(self, values):
+        address = self.alloc(len(values))
+        self.gpu.memory[address : address + len(values)] = values
+        return address
+
+    def get(self, address, n):
+        return self.gpu.memory[address : address + n].copy()
+
+    def launch(self, kernel, grid, args=(), shared_size=0, constants=None):
+        """Run ``kernel`` ((program, labels)) to completion on ``grid``."""
+        gpu = self.gpu
+        gpu.load_kernel(
+            *kernel,
+            grid=grid,
+            args=list(args),
+            shared_size=shared_size,
+            constants=constants,
+        )
+        gpu.run(max_cycles=self.max_cycles)
+        if gpu.active.any():
+            raise RuntimeError(f"kernel did not finish in {self.max_cycles} cycles")
+        self.stats["cycles"] += gpu.cycle
+        self.stats["instructions"] += gpu.instructions_executed
+        self.stats["launches"] += 1
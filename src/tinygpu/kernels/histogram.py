@@ -0,0 +1,98 @@
+# src/tinygpu/kernels/histogram.py
+"""Histogram of small non-negative integers."""
+
+import numpy as np
+from ._launch import Session, as_int32, block_size, program
+
+# R0 = n, R1 = input, R2 = partial counts (chunks x bins), R3 = bins,
+# R4 = chunk length; constants: [bin groups, bins per group].
+# Block (chunk c, bin group g) counts, for each of its threads' bins, the
+# occurrences in chunk c. Every thread owns its output word, so no atomic
+# update is needed; all threads of a block read the same input word.
+COUNT = """
+    LDC R8, 0
+    LDC R9, 1
+    DIV R10, R5, R8        ; chunk
+    MOD R11, R5, R8        ; bin group
+    MUL R11, R11, R9
+    ADD R11, R11, R6       ; bin
+    MUL R12, R10, R4       ; i = chunk start
+    ADD R13, R12, R4
+    MIN R13, R13, R0       ; chunk end
+    SET R14, 0             ; count
+loop:
+    CMP R12, R13
+    BRLT body
+    JMP store
+body:
+    ADD R15, R1, R12
+    LD R15, R15
+    CMP R15, R11
+    @EQ ADD R14, R14, 1
+    ADD R12, R12, 1
+    JMP loop
+store:
+    CMP R11, R3
+    BRLT write
+    JMP done
+write:
+    MUL R15, R10, R3
+    ADD R15, R15, R11
+    ADD R15, R15, R2
+    ST R15, R14
+done:
+"""
+
+# R0 = rows, R1 = matrix (rows x cols), R2 = output, R3 = cols: thread j
+# writes the sum of column j.
+COLUMN_SUMS = """
+    CMP R7, R3
+    BRLT body
+    JMP done
+body:
+    SET R8, 0
+    SET R9, 0
+    ADD R10, R1, R7
+loop:
+    LD R11, R10
+    ADD R8, R8, R11
+    ADD R10, R10, R3
+    ADD R9, R9, 1
+    BNE R9, R0, loop
+    ADD R10, R2, R7
+    ST R10, R8
+done:
+"""
+
+
+def histogram(
+    values, bins, chunk=64, engine="vector", threads_per_block=64, stats=None
+):
+    """
+    Counts of each value 0..bins-1 in an integer array (other values are
+    ignored), like ``np.bincount(values, minlength=bins)[:bins]``. The
+    input is split into chunks of ``chunk`` elements whose per-bin counts
+    are computed in parallel and then summed per bin.
+    """
+    bins = int(bins)
+    if bins < 1:
+        raise ValueError(f"bins must be >= 1, got {bins}")
+    data = as_int32(values)
+    if data.size == 0:
+        return np.zeros(bins, dtype=np.int32)
+    session = Session(engine, stats=stats)
+    source = session.put(data)
+    chunks = -(-data.size // chunk)
+    partial = session.alloc(chunks * bins)
+    out = session.alloc(bins)
+
+    tpb = block_size(bins, threads_per_block)
+    groups = -(-bins // tpb)
+    session.launch(
+        program(COUNT),
+        (chunks * groups, tpb),
+        (data.size, source, partial, bins, chunk),
+        constants=[groups, tpb],
+    )
+    session.launch(program(COLUMN_SUMS), (groups, tpb), (chunks, partial, out, bins))
+    return session.get(out, bins)
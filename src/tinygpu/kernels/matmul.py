@@ -0,0 +1,105 @@
+# src/tinygpu/kernels/matmul.py
+"""Tiled integer matrix multiply."""
+
+import numpy as np
+from ._launch import Session, as_int32, program
+
+# R0 = M, R1 = K, R2 = N, R3 = A (M x K), R4 = B (K x N);
+# constants: [C address, column tiles]. TILE x TILE threads per block,
+# one per element of a C tile. For every K tile the block stages the A and
+# B tiles in shared memory (zero outside the matrices), synchronizes and
+# accumulates TILE products per thread from shared memory.
+MATMUL = """
+    DIV R8, R6, TILE       ; ty
+    MOD R9, R6, TILE       ; tx
+    LDC R21, 1
+    DIV R10, R5, R21
+    MUL R10, R10, TILE
+    ADD R10, R10, R8       ; row
+    MOD R11, R5, R21
+    MUL R11, R11, TILE
+    ADD R11, R11, R9       ; col
+    SET R12, 0             ; k0
+    SET R13, 0             ; acc
+tile:
+    ADD R14, R12, R9       ; A column
+    SUB R15, R10, R0
+    SUB R16, R14, R1
+    AND R15, R15, R16      ; < 0 when row < M and A column < K
+    MUL R16, R10, R1
+    ADD R16, R16, R14
+    ADD R16, R16, R3
+    SET R17, 0
+    CMP R15, 0
+    @LT LD R17, R16
+    SHST R6, R17
+    ADD R14, R12, R8       ; B row
+    SUB R15, R14, R1
+    SUB R16, R11, R2
+    AND R15, R15, R16
+    MUL R16, R14, R2
+    ADD R16, R16, R11
+    ADD R16, R16, R4
+    SET R17, 0
+    CMP R15, 0
+    @LT LD R17, R16
+    ADD R18, R6, TILE * TILE
+    SHST R18, R17
+    SYNCB
+    MUL R14, R8, TILE      ; As[ty][i]
+    ADD R15, R9, TILE * TILE   ; Bs[i][tx]
+    SET R16, 0
+dot:
+    SHLD R17, R14
+    SHLD R18, R15
+    MUL R17, R17, R18
+    ADD R13, R13, R17
+    ADD R14, R14, 1
+    ADD R15, R15, TILE
+    ADD R16, R16, 1
+    BNE R16, TILE, dot
+    SYNCB
+    ADD R12, R12, TILE
+    CMP R12, R1
+    BRLT tile
+    SUB R15, R10, R0
+    SUB R16, R11, R2
+    AND R15, R15, R16
+    CMP R15, 0
+    BRLT store
+    JMP done
+store:
+    LDC R20, 0
+    MUL R16, R10, R2
+    ADD R16, R16, R11
+    ADD R16, R16, R20
+    ST R16, R13
+done:
+"""
+
+
+def matmul(a, b, tile=4, engine="vector", stats=None):
+    """
+    Integer matrix product ``a @ b`` (int32, wrapping) of 2-D arrays.
+    Each block of ``tile x tile`` threads computes one tile of the result
+    from shared-memory tiles of ``a`` and ``b``.
+    """
+    a, b = np.asarray(a), np.asarray(b)
+    if a.ndim != 2 or b.ndim != 2 or a.shape[1] != b.shape[0]:
+        raise ValueError(f"cannot multiply shapes {a.shape} and {b.shape}")
+    (m, k), n = a.shape, b.shape[1]
+    if 0 in (m, k, n):
+        return np.zeros((m, n), dtype=np.int32)
+    session = Session(engine, stats=stats)
+    a_address = session.put(as_int32(a, "a"))
+    b_address = session.put(as_int32(b, "b"))
+    c_address = session.alloc(m * n)
+    row_tiles, col_tiles = -(-m // tile), -(-n // tile)
+    session.launch(
+        program(MATMUL, TILE=tile),
+        (row_tiles * col_tiles, tile * tile),
+        (m, k, n, a_address, b_address),
+        shared_size=2 * tile * tile,
+        constants=[c_address, col_tiles],
+    )
+    return session.get(c_address, m * n).reshape(m, n)
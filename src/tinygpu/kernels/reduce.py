@@ -0,0 +1,58 @@
+# src/tinygpu/kernels/reduce.py
+"""Tree reduction (sum / min / max)."""
+
+from ._launch import INT32_MAX, INT32_MIN, Session, as_int32, block_size, program
+
+# R0 = n, R1 = input address, R2 = output address (one word per block).
+# Each block reduces TPB elements in shared memory, halving the active
+# threads every step; thread 0 writes the block result.
+REDUCE = """
+    ADD R8, R1, R7
+    SET R9, IDENT
+    CMP R7, R0
+    @LT LD R9, R8          ; out-of-range threads contribute IDENT
+    SHST R6, R9
+    SET R10, TPB / 2
+step:
+    SYNCB
+    CMP R6, R10
+    ADD R11, R6, R10
+    @LT SHLD R12, R11
+    @LT {op} R9, R9, R12
+    @LT SHST R6, R9
+    SHR R10, R10, 1
+    BNE R10, 0, step
+    CMP R6, 0
+    @EQ ADD R11, R2, R5
+    @EQ ST R11, R9
+"""
+
+OPS = {"sum": ("ADD", 0), "min": ("MIN", INT32_MAX), "max": ("MAX", INT32_MIN)}
+
+
+def reduce(values, op="sum", engine="vector", threads_per_block=64, stats=None):
+    """
+    Reduce an integer array to one int32 value with ``op`` ("sum", "min"
+    or "max"; sums wrap around like the ALU). Each launch reduces every
+    block of ``threads_per_block`` elements to one partial; launches repeat
+    on the partials until one value is left.
+    """
+    if op not in OPS:
+        raise ValueError(f"op must be one of {sorted(OPS)}, got {op!r}")
+    data = as_int32(values)
+    if data.size == 0:
+        if op != "sum":
+            raise ValueError(f"{op} of an empty array")
+        return 0
+    opcode, identity = OPS[op]
+    session = Session(engine, stats=stats)
+    n, address = data.size, session.put(data)
+    while True:
+        tpb = block_size(n, threads_per_block)
+        blocks = -(-n // tpb)
+        out = session.alloc(blocks)
+        kernel = program(REDUCE.format(op=opcode), TPB=tpb, IDENT=identity)
+        session.launch(kernel, (blocks, tpb), (n, address, out), shared_size=tpb)
+        n, address = blocks, out
+        if n == 1:
+            return int(session.gpu.memory[address])
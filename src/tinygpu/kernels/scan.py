@@ -0,0 +1,101 @@
+# src/tinygpu/kernels/scan.py
+"""Inclusive and exclusive prefix sums."""
+
+import numpy as np
+from ._launch import Session, as_int32, block_size, program
+
+# R0 = n, R1 = input, R2 = output, R3 = block totals, R4 = 1 for exclusive.
+# Hillis-Steele scan of each block in shared memory: in the step with
+# distance d every thread adds the value d places to its left; the last
+# thread writes the block total.
+SCAN_BLOCK = """
+    ADD R8, R1, R7
+    SET R9, 0
+    CMP R7, R0
+    @LT LD R9, R8
+    ADD R13, R9, 0         ; own input (subtracted for an exclusive scan)
+    SHST R6, R9
+    SET R10, 1
+step:
+    SYNCB
+    CMP R6, R10
+    SUB R11, R6, R10
+    @GE SHLD R12, R11
+    @GE ADD R9, R9, R12
+    SYNCB
+    SHST R6, R9
+    SHL R10, R10, 1
+    BNE R10, TPB, step
+    CMP R6, TPB - 1
+    @EQ ADD R11, R3, R5
+    @EQ ST R11, R9
+    MUL R13, R13, R4
+    SUB R9, R9, R13
+    CMP R7, R0
+    ADD R8, R2, R7
+    @LT ST R8, R9
+"""
+
+# R0 = n, R1 = data, R2 = inclusive scan of the block totals: adds the sum
+# of all earlier blocks to the elements of every block but the first.
+ADD_OFFSETS = """
+    CMP R7, R0
+    BRLT body
+    JMP done
+body:
+    CMP R5, 0
+    BRZ done
+    ADD R8, R2, R5
+    SUB R8, R8, 1
+    LD R9, R8
+    ADD R10, R1, R7
+    LD R11, R10
+    ADD R11, R11, R9
+    ST R10, R11
+done:
+"""
+
+
+def _scan(session, n, source, dest, exclusive, max_threads):
+    tpb = block_size(n, max_threads)
+    blocks = -(-n // tpb)
+    totals = session.alloc(blocks)
+    session.launch(
+        program(SCAN_BLOCK, TPB=tpb),
+        (blocks, tpb),
+        (n, source, dest, totals, int(exclusive)),
+        shared_size=tpb,
+    )
+    if blocks > 1:
+        offsets = session.alloc(blocks)
+        _scan(session, blocks, totals, offsets, False, max_threads)
+        session.launch(
+            program(ADD_OFFSETS), (blocks, tpb), (n, dest, offsets), shared_size=0
+        )
+
+
+def scan(values, exclusive=False, engine="vector", threads_per_block=64, stats=None):
+    """
+    Prefix sums of an integer array (int32, wrapping). Element i of the
+    inclusive scan is ``values[0] + ... + values[i]``; the exclusive scan
+    stops at ``values[i - 1]`` (0 for i = 0). Blocks are scanned in shared
+    memory, their totals scanned recursively and added back.
+    """
+    data = as_int32(values)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.int32)
+    session = Session(engine, stats=stats)
+    source = session.put(data)
+    dest = session.alloc(data.size)
+    _scan(session, data.size, source, dest, exclusive, threads_per_block)
+    return session.get(dest, data.size)
+
+
+def inclusive_scan(values, **kwargs):
+    """scan(values, exclusive=False, ...)."""
+    return scan(values, exclusive=False, **kwargs)
+
+
+def exclusive_scan(values, **kwargs):
+    """scan(values, exclusive=True, ...)."""
+    return scan(values, exclusive=True, **kwargs)
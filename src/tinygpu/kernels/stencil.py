@@ -0,0 +1,84 @@
+# src/tinygpu/kernels/stencil.py
+"""1-D convolution stencil."""
+
+import numpy as np
+from ._launch import Session, as_int32, block_size, program
+
+# R0 = n, R1 = input, R2 = output, R3 = radius; constants: the 2r + 1
+# weights. Each block stages its TPB elements plus r halo elements on
+# each side in shared memory (indices clamped to the array, so edge values
+# repeat), then every thread sums weight * neighbour from shared memory.
+STENCIL = """
+    SUB R8, R0, 1          ; last index
+    MIN R9, R7, R8
+    ADD R9, R9, R1
+    LD R10, R9
+    ADD R11, R6, R3
+    SHST R11, R10          ; centre
+    CMP R6, R3
+    BRLT halo
+    JMP compute
+halo:
+    SUB R9, R7, R3         ; left halo
+    MAX R9, R9, 0
+    MIN R9, R9, R8
+    ADD R9, R9, R1
+    LD R10, R9
+    SHST R6, R10
+    ADD R9, R7, TPB        ; right halo
+    MIN R9, R9, R8
+    ADD R9, R9, R1
+    LD R10, R9
+    ADD R11, R6, R3
+    ADD R11, R11, TPB
+    SHST R11, R10
+compute:
+    SYNCB
+    SET R12, 0             ; acc
+    SET R13, 0             ; weight index
+    SHL R14, R3, 1
+    ADD R14, R14, 1        ; 2r + 1 weights
+weights:
+    LDC R15, R13
+    ADD R16, R6, R13
+    SHLD R17, R16
+    MUL R17, R17, R15
+    ADD R12, R12, R17
+    ADD R13, R13, 1
+    BNE R13, R14, weights
+    CMP R7, R0
+    BRLT store
+    JMP done
+store:
+    ADD R9, R2, R7
+    ST R9, R12
+done:
+"""
+
+
+def stencil(values, weights, engine="vector", threads_per_block=64, stats=None):
+    """
+    Apply an odd-length integer stencil: ``out[i] = sum_j weights[j] *
+    values[i + j - r]`` with ``r = len(weights) // 2`` and indices clamped
+    to the array (edge values repeat). Weights live in constant memory and
+    are read with uniform LDC broadcasts.
+    """
+    data = as_int32(values)
+    weights = as_int32(weights, "weights")
+    if weights.size % 2 == 0:
+        raise ValueError("weights must have an odd length")
+    if data.size == 0:
+        return np.zeros(0, dtype=np.int32)
+    radius = weights.size // 2
+    session = Session(engine, stats=stats)
+    source = session.put(data)
+    dest = session.alloc(data.size)
+    tpb = max(block_size(data.size, threads_per_block), radius)
+    session.launch(
+        program(STENCIL, TPB=tpb),
+        (-(-data.size // tpb), tpb),
+        (data.size, source, dest, radius),
+        shared_size=tpb + 2 * radius,
+        constants=weights,
+    )
+    return session.get(dest, data.size)
@@ -0,0 +1,297 @@
+# src/tinygpu/memory.py
+"""
+Bounds-checked access to global, shared and constant memory.
+
+Every memory opcode goes through this module: the per-thread handlers use the
+scalar helpers (load/store/...), the vectorized engine the gather/scatter
+helpers, which check a whole group of threads with one vectorized bounds
+test. Out-of-range accesses are handled according to ``gpu.fault_policy``:
+
+- "raise":  raise MemoryFault (an IndexError) naming the thread, PC and address
+- "clamp":  clamp the address into the valid range
+- "ignore": loads read 0, stores (and CSWAP) are dropped
+- "record": like "ignore", but append a record to ``gpu.faults``
+
+Observers attached to the GPU with an ``on_access(gpu, tids, addrs, write)``
+method (e.g. tinygpu.cache.CacheHierarchy) see every in-range global memory
+access, in program order within a group; ``tids`` and ``addrs`` are arrays.
+"""
+
+import numpy as np
+
+FAULT_POLICIES = ("raise", "clamp", "ignore", "record")
+
+
+class MemoryFault(IndexError):
+    """Out-of-range memory access (fault policy "raise")."""
+
+    def __init__(self, space, tid, pc, address, size):
+        self.space = space
+        self.tid = tid
+        self.pc = pc
+        self.address = address
+        self.size = size
+        super().__init__(
+            f"{space} memory fault: thread {tid} at pc {pc} accessed "
+            f"address {address} (valid range 0..{size - 1})"
+        )
+
+
+def _record(gpu, space, tid, address):
+    gpu.faults.append(
+        {
+            "cycle": gpu.cycle,
+            "space": space,
+            "tid": int(tid),
+            "pc": int(gpu.pc[tid]),
+            "address": int(address),
+        }
+    )
+
+
+def _fault(gpu, space, tid, address, size):
+    """Apply the fault policy to one bad access.
+
+    Returns the address to use instead, or None to skip the access.
+    """
+    policy = gpu.fault_policy
+    if policy == "raise":
+        raise MemoryFault(space, int(tid), int(gpu.pc[tid]), int(address), size)
+    if policy == "clamp":
+        return min(max(int(address), 0), size - 1) if size > 0 else None
+    if policy == "record":
+        _record(gpu, space, tid, address)
+    elif policy != "ignore":
+        raise ValueError(f"unknown fault policy {policy!r}")
+    return None
+
+
+def _checked(gpu, space, tids, addrs, size):
+    """Vectorized bounds check for one group of threads.
+
+    Returns ``(addrs, valid)`` where ``valid`` is None when every lane may
+    access ``addrs`` (the common, fast case) and a boolean lane mask
+    otherwise.
+    """
+    ok = (addrs >= 0) & (addrs < size)
+    if ok.all():
+        return addrs, None
+    policy = gpu.fault_policy
+    bad = np.flatnonzero(~ok)
+    if policy == "clamp" and size > 0:
+        return np.clip(addrs, 0, size - 1), None
+    if policy == "raise" or policy not in FAULT_POLICIES:
+        _fault(gpu, space, tids[bad[0]], addrs[bad[0]], size)
+    if policy == "record":
+        for i in bad:
+            _record(gpu, space, tids[i], addrs[i])
+    return addrs, ok
+
+
+def _notify(gpu, tids, addrs, write):
+    for observer in gpu.access_observers:
+        observer.on_access(gpu, tids, addrs, write)
+
+
+def _notify_one(gpu, tid, addr, write):
+    if gpu.access_observers:
+        _notify(gpu, np.array([tid]), np.array([addr]), write)
+
+
+def block_of(gpu, tids):
+    """Block index of each thread (scalar or array of tids)."""
+    if gpu.threads_per_block > 0:
+        return tids // gpu.threads_per_block
+    return gpu.registers[tids, 5] if gpu.num_registers > 5 else tids * 0
+
+
+# --- scalar helpers (per-thread engine) ---
+
+
+def load(gpu, tid, addr):
+    """Return memory[addr] for thread ``tid``."""
+    if not 0 <= addr < gpu.mem_size:
+        addr = _fault(gpu, "global", tid, addr, gpu.mem_size)
+        if addr is None:
+            return 0
+    _notify_one(gpu, tid, addr, False)
+    return int(gpu.memory[addr])
+
+
+def store(gpu, tid, addr, value):
+    """memory[addr] = value for thread ``tid``."""
+    if not 0 <= addr < gpu.mem_size:
+        addr = _fault(gpu, "global", tid, addr, gpu.mem_size)
+        if addr is None:
+            return
+    _notify_one(gpu, tid, addr, True)
+    gpu.memory[addr] = value
+
+
+def cswap(gpu, tid, a, b):
+    """If memory[a] > memory[b], swap them (skipped when either faults)."""
+    size = gpu.mem_size
+    if not 0 <= a < size:
+        a = _fault(gpu, "global", tid, a, size)
+    if not 0 <= b < size:
+        b = _fault(gpu, "global", tid, b, size)
+    if a is None or b is None:
+        return
+    _notify_one(gpu, tid, a, False)
+    _notify_one(gpu, tid, b, False)
+    va = int(gpu.memory[a])
+    vb = int(gpu.memory[b])
+    if va > vb:
+        _notify_one(gpu, tid, a, True)
+        _notify_one(gpu, tid, b, True)
+        gpu.memory[a], gpu.memory[b] = vb, va
+
+
+def const_load(gpu, tid, caddr):
+    """Return constants[caddr] for thread ``tid``."""
+    size = len(gpu.constants)
+    if not 0 <= caddr < size:
+        caddr = _fault(gpu, "constant", tid, caddr, size)
+        if caddr is None:
+            return 0
+    return int(gpu.constants[caddr])
+
+
+def _shared_index(gpu, tid, saddr):
+    block = int(block_of(gpu, tid))
+    if not 0 <= block < gpu.num_blocks:
+        return None, None
+    if not 0 <= saddr < gpu.shared_size:
+        saddr = _fault(gpu, "shared", tid, saddr, gpu.shared_size)
+    return block, saddr
+
+
+def shared_load(gpu, tid, saddr):
+    """Return shared[block_of(tid)][saddr]."""
+    block, saddr = _shared_index(gpu, tid, saddr)
+    if saddr is None:
+        return 0
+    return int(gpu.shared[block, saddr])
+
+
+def shared_store(gpu, tid, saddr, value):
+    """shared[block_of(tid)][saddr] = value."""
+    block, saddr = _shared_index(gpu, tid, saddr)
+    if saddr is not None:
+        gpu.shared[block, saddr] = value
+
+
+# --- vectorized helpers (vector engine) ---
+
+
+def _observe(gpu, tids, addrs, valid, write):
+    if valid is not None:
+        tids, addrs = tids[valid], addrs[valid]
+    _notify(gpu, tids, addrs, write)
+
+
+def _observe_cswap(gpu, tids, a, b, swap):
+    # per thread: read a, read b, then (if swapped) write a, write b
+    _notify(gpu, np.repeat(tids, 2), np.column_stack((a, b)).ravel(), False)
+    if swap.any():
+        pairs = np.column_stack((a[swap], b[swap])).ravel()
+        _notify(gpu, np.repeat(tids[swap], 2), pairs, True)
+
+
+def _lanes(values, n):
+    return np.broadcast_to(np.asarray(values, dtype=np.int64), (n,))
+
+
+def gather(gpu, tids, addrs):
+    """Return memory[addrs] for a group of threads."""
+    addrs, valid = _checked(gpu, "global", tids, _lanes(addrs, len(tids)), gpu.mem_size)
+    if gpu.access_observers:
+        _observe(gpu, tids, addrs, valid, False)
+    if valid is None:
+        return gpu.memory[addrs]
+    out = np.zeros(len(tids), dtype=gpu.memory.dtype)
+    out[valid] = gpu.memory[addrs[valid]]
+    return out
+
+
+def scatter(gpu, tids, addrs, values):
+    """memory[addrs] = values for a group of threads (last thread wins)."""
+    n = len(tids)
+    addrs, valid = _checked(gpu, "global", tids, _lanes(addrs, n), gpu.mem_size)
+    values = _lanes(values, n)
+    if gpu.access_observers:
+        _observe(gpu, tids, addrs, valid, True)
+    if valid is None:
+        gpu.memory[addrs] = values
+    else:
+        gpu.memory[addrs[valid]] = values[valid]
+
+
+def cswap_many(gpu, tids, a, b):
+    """Vectorized CSWAP; pairs of different threads must not overlap."""
+    n = len(tids)
+    a, valid_a = _checked(gpu, "global", tids, _lanes(a, n), gpu.mem_size)
+    b, valid_b = _checked(gpu, "global", tids, _lanes(b, n), gpu.mem_size)
+    if valid_a is not None or valid_b is not None:
+        keep = np.ones(n, dtype=bool)
+        for mask in (valid_a, valid_b):
+            if mask is not None:
+                keep &= mask
+        tids, a, b = tids[keep], a[keep], b[keep]
+    va = gpu.memory[a]
+    vb = gpu.memory[b]
+    swap = va > vb
+    if gpu.access_observers:
+        _observe_cswap(gpu, tids, a, b, swap)
+    gpu.memory[a[swap]] = vb[swap]
+    gpu.memory[b[swap]] = va[swap]
+
+
+def const_gather(gpu, tids, caddrs):
+    """Return constants[caddrs] for a group of threads.
+
+    A uniform address (an immediate, or the same register value in every
+    lane) is a single read broadcast to the group.
+    """
+    size = len(gpu.constants)
+    if np.ndim(caddrs) == 0 or (caddrs == caddrs[0]).all():
+        caddr = int(np.ravel(caddrs)[0]) if np.ndim(caddrs) else int(caddrs)
+        if 0 <= caddr < size:
+            return np.full(len(tids), gpu.constants[caddr], dtype=np.int32)
+    caddrs, valid = _checked(gpu, "constant", tids, _lanes(caddrs, len(tids)), size)
+    if valid is None:
+        return gpu.constants[caddrs]
+    out = np.zeros(len(tids), dtype=np.int32)
+    out[valid] = gpu.constants[caddrs[valid]]
+    return out
+
+
+def _shared_lanes(gpu, tids, saddrs):
+    blocks = block_of(gpu, tids)
+    saddrs, valid = _checked(
+        gpu, "shared", tids, _lanes(saddrs, len(tids)), gpu.shared_size
+    )
+    in_grid = (blocks >= 0) & (blocks < gpu.num_blocks)
+    if not in_grid.all():
+        valid = in_grid if valid is None else valid & in_grid
+    return blocks, saddrs, valid
+
+
+def shared_gather(gpu, tids, saddrs):
+    """Return shared[block][saddrs] for a group of threads."""
+    blocks, saddrs, valid = _shared_lanes(gpu, tids, saddrs)
+    if valid is None:
+        return gpu.shared[blocks, saddrs]
+    out = np.zeros(len(tids), dtype=gpu.shared.dtype)
+    out[valid] = gpu.shared[blocks[valid], saddrs[valid]]
+    return out
+
+
+def shared_scatter(gpu, tids, saddrs, values):
+    """shared[block][saddrs] = values for a group of threads."""
+    blocks, saddrs, valid = _shared_lanes(gpu, tids, saddrs)
+    values = _lanes(values, len(tids))
+    if valid is None:
+        gpu.shared[blocks, saddrs] = values
+    else:
+        gpu.shared[blocks[valid], saddrs[valid]] = values[valid]
@@ -0,0 +1,157 @@
+# src/tinygpu/monitor.py
+"""
+Live sampling monitor.
+
+A Monitor samples a running GPU from a background thread every
+``interval`` seconds, so run() pays nothing per cycle::
+
+    with Monitor(gpu, interval=0.5, progress=True, jsonl="run.jsonl"):
+        gpu.run(max_cycles=10**7)
+
+Each sample is a dict (see Monitor.sample) passed to ``callback``, appended
+as one JSON line to ``jsonl`` and, with ``progress``, shown as a single
+refreshing terminal line. ``idle`` is the time since the last executed
+instruction, and ``waiting_sync`` / ``waiting_syncb`` show threads parked
+at barriers, which makes stalled or deadlocked kernels visible early.
+
+Samples read the GPU arrays without locking, so a sample may mix values
+from two consecutive cycles.
+"""
+
+import json
+import sys
+import threading
+import time
+import numpy as np
+
+
+class Monitor:
+    def __init__(
+        self,
+        gpu,
+        interval=1.0,
+        callback=None,
+        jsonl=None,
+        progress=False,
+        stream=None,
+    ):
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        self.gpu = gpu
+        self.interval = interval
+        self.callback = callback
+        self.jsonl = jsonl  # path or writable text file
+        self.progress = progress
+        self.stream = stream
+        self.samples = 0
+        self.last = None  # most recent sample
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- lifecycle ---
+
+    def start(self):
+        if self._thread is not None:
+            raise RuntimeError("monitor already started")
+        gpu = self.gpu
+        self._baseline = np.array(gpu.memory, copy=True)
+        self._start = self._prev_time = self._progress_time = time.perf_counter()
+        self._prev_cycle = gpu.cycle
+        self._prev_instructions = gpu.instructions_executed
+        self._out = self.jsonl
+        if isinstance(self.jsonl, str):
+            self._out = open(self.jsonl, "a", encoding="utf-8")
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="tinygpu-monitor", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling after one final sample; returns it."""
+        if self._thread is None:
+            return self.last
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._emit(self.sample())
+        if self.progress:
+            print(file=self.stream or sys.stderr, flush=True)
+        if self._out is not self.jsonl:
+            self._out.close()
+        return self.last
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._emit(self.sample())
+
+    # --- sampling ---
+
+    def sample(self):
+        """Current metrics (rates are since the previous sample)."""
+        gpu = self.gpu
+        now = time.perf_counter()
+        cycle, instructions = gpu.cycle, gpu.instructions_executed
+        dt = now - self._prev_time
+        if instructions != self._prev_instructions:
+            self._progress_time = now
+        waiting = gpu.sync_waiting_block
+        if gpu.threads_per_block > 0:
+            waiting = waiting.reshape(gpu.num_blocks, gpu.threads_per_block)
+        else:
+            waiting = waiting.reshape(1, -1)
+        memory = gpu.memory
+        touched = (
+            np.count_nonzero(memory != self._baseline)
+            if memory.shape == self._baseline.shape
+            else None
+        )
+        sample = {
+            "time": time.time(),
+            "elapsed": now - self._start,
+            "cycle": int(cycle),
+            "instructions": int(instructions),
+            "cycles_per_sec": (cycle - self._prev_cycle) / dt if dt > 0 else 0.0,
+            "instructions_per_sec": (
+                (instructions - self._prev_instructions) / dt if dt > 0 else 0.0
+            ),
+            "active": int(np.count_nonzero(gpu.active)),
+            "waiting_sync": int(np.count_nonzero(gpu.sync_waiting)),
+            "waiting_syncb": waiting.sum(axis=1).tolist(),
+            "memory_touched": None if touched is None else int(touched),
+            "idle": now - self._progress_time,
+        }
+        self._prev_time, self._prev_cycle = now, cycle
+        self._prev_instructions = instructions
+        return sample
+
+    def _emit(self, sample):
+        self.samples += 1
+        self.last = sample
+        if self.callback is not None:
+            self.callback(sample)
+        if self._out is not None:
+            self._out.write(json.dumps(sample) + "\n")
+            self._out.flush()
+        if self.progress:
+            print("\r" + format_sample(sample), end="", file=self.stream or sys.stderr)
+
+
+def format_sample(sample):
+    """One-line summary of a sample for terminal display."""
+    syncb = sum(sample["waiting_syncb"])
+    text = (
+        f"cycle {sample['cycle']:,} | {sample['instructions_per_sec']:,.0f} instr/s"
+        f" | active {sample['active']} | sync {sample['waiting_sync']}"
+        f" | syncb {syncb} | mem touched {sample['memory_touched']}"
+    )
+    if sample["idle"] >= 1.0:
+        text += f" | idle {sample['idle']:.1f}s"
+    return text
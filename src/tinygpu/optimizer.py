@@ -0,0 +1,505 @@
+# src/tinygpu/optimizer.py
+"""
+Optional optimizer for assembled programs.
+
+Sits between assemble_file and load_program / load_kernel::
+
+    program, labels = assemble_file("examples/reduce_sum.tgpu")
+    program, labels = optimize(program, labels, num_registers=12)
+
+Passes (repeated until nothing changes):
+
+- removal of unreachable code and no-op branches (self-branches and branches
+  to the next instruction),
+- constant propagation and folding of every ALU instruction (with the
+  engines' int32 wrap-around), including branches on constants,
+  predicated instructions and SEL with known conditions and algebraic
+  identities (x + 0, x * 1, x * 0),
+- copy propagation of ``SET Rd, Rs``,
+- dead-store elimination of SET / ALU / SEL / CMP results nobody reads,
+- loop-invariant code motion into a loop preheader; when ``num_registers``
+  leaves spare registers, invariant expressions are also hoisted into a
+  fresh register when their destination is redefined inside the loop,
+
+with branch targets and labels fixed up after every edit.
+
+Memory and shared-memory effects, barrier order and control flow are
+preserved for race-free kernels. Final values of registers that the kernel
+never reads again are not: dead temporaries may be left unset, and where a
+thread's straight-line run ends within a cycle can change (which only
+matters for kernels that race on memory).
+"""
+
+from .analyzer import (
+    EXIT,
+    analyze,
+    build_cfg,
+    dominators,
+    liveness,
+    reachable_blocks,
+    reads_flags,
+    uses_defs,
+)
+from .instructions import (
+    ALU,
+    BRANCHES,
+    FLAG_WRITERS,
+    PRESET_REGISTERS,
+    operand_roles,
+    split_predicate,
+    wrap32,
+)
+
+# pseudo-register standing for the CMP flags in the dataflow analyses
+FLAGS = "F"
+
+# instructions without side effects besides their register / flag results
+_PURE = {"SET", "SEL"} | set(ALU)
+_REMOVABLE = _PURE | {"CMP"}
+
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+
+# flag bits as set by CMP, and the bit each flag branch tests
+_FLAG_BIT = {"BRGT": 0b100, "BRLT": 0b010, "BRZ": 0b001}
+
+
+def _reg(operand):
+    if isinstance(operand, tuple) and len(operand) == 2 and operand[0] == "R":
+        return int(operand[1])
+    return None
+
+
+def _is_imm(operand):
+    return isinstance(operand, int) and not isinstance(operand, bool)
+
+
+def _ud(instr, args):
+    """uses/defs including the FLAGS pseudo-register."""
+    uses, defs = uses_defs(instr, args)
+    if instr in FLAG_WRITERS:
+        defs = defs | {FLAGS}
+    if reads_flags(instr):
+        uses = uses | {FLAGS}
+    return uses, defs
+
+
+def _flags_for(diff):
+    return (diff == 0) | ((diff < 0) << 1) | ((diff > 0) << 2)
+
+
+def _rebuild(program, labels, edits, inner=()):
+    """
+    Apply per-pc edits and fix up branch targets and labels.
+
+    ``edits`` maps pc -> (before, own): the ``before`` instructions are
+    inserted in front of pc and the instruction itself is replaced by
+    ``own`` (None deletes it). Branches go to the first instruction emitted
+    for their old target; branches located at a pc in ``inner`` go to the
+    target's own instruction instead (loop back edges skip a preheader).
+    Labels follow the instruction they named.
+    """
+    n = len(program)
+    out, origin = [], []
+    start_of, own_of = [0] * (n + 1), [0] * (n + 1)
+    for pc in range(n):
+        before, own = edits.get(pc, ((), program[pc]))
+        start_of[pc] = len(out)
+        out.extend(before)
+        origin.extend([None] * len(before))
+        own_of[pc] = len(out)
+        if own is not None:
+            out.append(own)
+            origin.append(pc)
+    start_of[n] = own_of[n] = len(out)
+
+    def remap(target, table):
+        if not _is_imm(target):
+            return target
+        if 0 <= target <= n:
+            return table[target]
+        return target if target < 0 else len(out) + target - n
+
+    result = []
+    for (instr, args), pc in zip(out, origin, strict=True):
+        args = list(args)
+        if instr in BRANCHES and args:
+            args[-1] = remap(args[-1], own_of if pc in inner else start_of)
+        result.append((instr, args))
+    new_labels = {name: remap(pc, own_of) for name, pc in (labels or {}).items()}
+    return result, new_labels
+
+
+def _check(program, num_registers):
+    report = analyze(program, num_registers=num_registers)
+    problems = [str(d) for d in report.errors]
+    for pc, (instr, args) in enumerate(program):
+        if instr in BRANCHES and args and not _is_imm(args[-1]):
+            problems.append(f"error: pc {pc}: indirect branch target {args[-1]!r}")
+    if problems:
+        raise ValueError("cannot optimize program:\n" + "\n".join(problems))
+    return report
+
+
+# --- pass: unreachable code and no-op branches ---
+
+
+def _remove_unreachable(program, labels, _ctx):
+    blocks, _block_of = build_cfg(program)
+    reachable = reachable_blocks(blocks)
+    edits = {}
+    for b in blocks:
+        for pc in b.pcs:
+            instr, args = program[pc]
+            if b.index not in reachable:
+                edits[pc] = ((), None)
+            elif instr in BRANCHES and args and args[-1] in (pc, pc + 1):
+                # the PC ends up at pc + 1 either way
+                edits[pc] = ((), None)
+            elif instr == "SET" and args[0] == args[1]:
+                edits[pc] = ((), None)
+    return _rebuild(program, labels, edits) if edits else (program, labels)
+
+
+# --- pass: constant propagation and folding ---
+
+
+def _value(operand, state):
+    if _is_imm(operand):
+        return operand
+    r = _reg(operand)
+    return state.get(r) if r is not None else None
+
+
+def _fits(value):
+    return value is not None and _INT32_MIN <= value <= _INT32_MAX
+
+
+def _const_step(instr, args, state):
+    """Transfer function: update the known register/flag constants."""
+    state = dict(state)
+    _uses, defs = _ud(instr, args)
+    result = None
+    if instr == "SET":
+        result = _value(args[1], state)
+    elif instr in ALU:
+        result = _evaluate(instr, [_value(a, state) for a in args[1:]])
+    elif instr == "SEL":
+        c = _value(args[1], state)
+        if c is not None:
+            result = _value(args[2] if c != 0 else args[3], state)
+    elif instr == "CMP":
+        a, b = _value(args[0], state), _value(args[1], state)
+        if a is not None and b is not None:
+            state[FLAGS] = _flags_for(a - b)
+            return state
+    for d in defs:
+        state.pop(d, None)
+    if _fits(result) and instr in _PURE:
+        state[_reg(args[0])] = result
+    return state
+
+
+def _const_in(blocks, b, reachable, out):
+    incoming = [{}] if b == 0 else []
+    incoming += [out[p] for p in blocks[b].preds if p in reachable]
+    known = [s for s in incoming if s is not None]
+    if not known:
+        return None
+    first, rest = known[0], known[1:]
+    return {k: v for k, v in first.items() if all(s.get(k) == v for s in rest)}
+
+
+def _constant_states(program, blocks, reachable):
+    out = dict.fromkeys(reachable)
+    changed = True
+    while changed:
+        changed = False
+        for b in sorted(reachable):
+            state = _const_in(blocks, b, reachable, out)
+            if state is None:
+                continue
+            for pc in blocks[b].pcs:
+                state = _const_step(*program[pc], state)
+            if state != out[b]:
+                out[b] = state
+                changed = True
+    return out
+
+
+def _substitute(instr, args, state):
+    """Replace register reads with known constants."""
+    roles = operand_roles(instr)
+    new = []
+    for role, operand in zip(roles, args, strict=True):
+        value = _value(operand, state) if role == "src" else None
+        new.append(value if value is not None else operand)
+    return new
+
+
+def _evaluate(instr, values):
+    """Result of an ALU instruction on known operands (wrapped like the
+    engines do), or None."""
+    if any(v is None or not _fits(v) for v in values):
+        return None
+    return int(wrap32(ALU[instr][1](*values)))
+
+
+def _fold_arithmetic(instr, args):
+    d, *sources = args
+    if all(_is_imm(v) for v in sources):
+        value = _evaluate(instr, sources)
+        return ("SET", [d, value]) if value is not None else (instr, args)
+    if instr not in ("ADD", "MUL"):
+        return (instr, args)
+    a, b = sources
+    if instr == "ADD" and 0 in (a, b):
+        return ("SET", [d, b if a == 0 else a])
+    if instr == "MUL" and 0 in (a, b):
+        return ("SET", [d, 0])
+    if instr == "MUL" and 1 in (a, b):
+        return ("SET", [d, b if a == 1 else a])
+    return (instr, args)
+
+
+def _fold(instr, args, state):
+    """Return the folded instruction, or None to delete it."""
+    mask, base = split_predicate(instr)
+    if mask is not None and FLAGS in state:  # predicate known: drop or keep
+        return (base, args) if state[FLAGS] & mask else None
+    if instr in ALU:
+        return _fold_arithmetic(instr, args)
+    if instr == "SEL" and _is_imm(args[1]):
+        return ("SET", [args[0], args[2] if args[1] != 0 else args[3]])
+    if instr in ("BEQ", "BNE") and _is_imm(args[0]) and _is_imm(args[1]):
+        taken = (args[0] == args[1]) == (instr == "BEQ")
+        return ("JMP", [args[2]]) if taken else None
+    if instr in _FLAG_BIT and FLAGS in state:
+        taken = bool(state[FLAGS] & _FLAG_BIT[instr])
+        return ("JMP", [args[0]]) if taken else None
+    return (instr, args)
+
+
+def _fold_constants(program, labels, _ctx):
+    blocks, _block_of = build_cfg(program)
+    reachable = reachable_blocks(blocks)
+    out = _constant_states(program, blocks, reachable)
+    edits = {}
+    for b in sorted(reachable):
+        state = _const_in(blocks, b, reachable, out) or {}
+        for pc in blocks[b].pcs:
+            instr, args = program[pc]
+            folded = _fold(instr, _substitute(instr, args, state), state)
+            if folded != (instr, list(args)):
+                edits[pc] = ((), folded)
+            state = _const_step(instr, args, state)
+    return _rebuild(program, labels, edits) if edits else (program, labels)
+
+
+# --- pass: copy propagation ---
+
+
+def _copy_step(instr, args, copies):
+    _uses, defs = uses_defs(instr, args)
+    copies = {(d, s) for d, s in copies if d not in defs and s not in defs}
+    if instr == "SET":
+        d, s = _reg(args[0]), _reg(args[1])
+        if s is not None and s != d:
+            copies.add((d, s))
+    return frozenset(copies)
+
+
+def _copy_in(blocks, b, reachable, out):
+    incoming = [frozenset()] if b == 0 else []
+    incoming += [out[p] for p in blocks[b].preds if p in reachable]
+    known = [s for s in incoming if s is not None]
+    return frozenset.intersection(*known) if known else None
+
+
+def _rename_reads(instr, args, copies):
+    mapping = dict(copies)
+    new = []
+    for role, operand in zip(operand_roles(instr), args, strict=True):
+        r = _reg(operand)
+        if role == "src" and r in mapping:
+            operand = ("R", mapping[r])
+        new.append(operand)
+    return new
+
+
+def _propagate_copies(program, labels, _ctx):
+    blocks, _block_of = build_cfg(program)
+    reachable = reachable_blocks(blocks)
+    out = dict.fromkeys(reachable)
+    changed = True
+    while changed:
+        changed = False
+        for b in sorted(reachable):
+            copies = _copy_in(blocks, b, reachable, out)
+            if copies is None:
+                continue
+            for pc in blocks[b].pcs:
+                instr, args = program[pc]
+                copies = _copy_step(instr, _rename_reads(instr, args, copies), copies)
+            if copies != out[b]:
+                out[b] = copies
+                changed = True
+
+    edits = {}
+    for b in sorted(reachable):
+        copies = _copy_in(blocks, b, reachable, out) or frozenset()
+        for pc in blocks[b].pcs:
+            instr, args = program[pc]
+            renamed = _rename_reads(instr, args, copies)
+            if renamed != list(args):
+                edits[pc] = ((), (instr, renamed))
+            copies = _copy_step(instr, renamed, copies)
+    return _rebuild(program, labels, edits) if edits else (program, labels)
+
+
+# --- pass: dead-store elimination ---
+
+
+def _eliminate_dead_stores(program, labels, _ctx):
+    blocks, _block_of = build_cfg(program)
+    ud = [_ud(instr, args) for instr, args in program]
+    _live_in, live_out = liveness(program, blocks, ud)
+    edits = {}
+    for pc, (instr, _args) in enumerate(program):
+        defs = ud[pc][1]
+        if instr in _REMOVABLE and defs and not (defs & live_out[pc]):
+            edits[pc] = ((), None)
+    return _rebuild(program, labels, edits) if edits else (program, labels)
+
+
+# --- pass: loop-invariant code motion ---
+
+
+def _natural_loops(blocks, reachable, dom):
+    """Map loop header block -> set of blocks in its natural loop(s)."""
+    loops = {}
+    for b in sorted(reachable):
+        for h in blocks[b].succs:
+            if h == EXIT or h not in dom[b]:
+                continue
+            body = loops.setdefault(h, {h})
+            stack = [b]
+            while stack:
+                x = stack.pop()
+                if x in body:
+                    continue
+                body.add(x)
+                stack.extend(p for p in blocks[x].preds if p in reachable)
+    return loops
+
+
+def _preheader_ok(program, blocks, block_of, header, body):
+    """The loop can get a preheader inserted right before its header."""
+    start = blocks[header].start
+    if start == 0:
+        return True
+    prev = block_of[start - 1]
+    return prev not in body or program[start - 1][0] == "JMP"
+
+
+def _loop_candidates(program, blocks, header, body, dom, live, ctx):
+    """Yield (pc, hoisted instruction, replacement) for invariant code."""
+    pcs = [pc for b in sorted(body) for pc in blocks[b].pcs]
+    defined = {}
+    for pc in pcs:
+        for d in uses_defs(*program[pc])[1]:
+            defined[d] = defined.get(d, 0) + 1
+    live_in, live_out = live
+    header_start = blocks[header].start
+    exiting = [
+        b for b in body if any(s == EXIT or s not in body for s in blocks[b].succs)
+    ]
+    exit_live = set()
+    for b in exiting:
+        exit_live |= live_out[blocks[b].end - 1]
+
+    for pc in pcs:
+        instr, args = program[pc]
+        if instr not in _PURE:
+            continue
+        uses, _defs = uses_defs(instr, args)
+        d = _reg(args[0])
+        if any(u in defined for u in uses):
+            continue
+        block = next(b for b in body if pc in blocks[b].pcs)
+        dominates_exits = all(block in dom[b] for b in exiting)
+        if (
+            defined[d] == 1
+            and d not in live_in[header_start]
+            and (d not in exit_live or dominates_exits)
+        ):
+            yield pc, (instr, list(args)), None
+        elif instr != "SET" and ctx["free"]:
+            fresh = ctx["free"].pop(0)
+            hoisted = (instr, [("R", fresh)] + list(args[1:]))
+            yield pc, hoisted, ("SET", [args[0], ("R", fresh)])
+
+
+def _hoist_loop_invariants(program, labels, ctx):
+    blocks, block_of = build_cfg(program)
+    reachable = reachable_blocks(blocks)
+    dom = dominators(blocks, reachable)
+    live = liveness(program, blocks, [_ud(i, a) for i, a in program])
+    for header, body in sorted(_natural_loops(blocks, reachable, dom).items()):
+        if not _preheader_ok(program, blocks, block_of, header, body):
+            continue
+        found = list(_loop_candidates(program, blocks, header, body, dom, live, ctx))
+        if not found:
+            continue
+        edits = {pc: ((), replacement) for pc, _hoisted, replacement in found}
+        start = blocks[header].start
+        before, own = edits.get(start, ((), program[start]))
+        edits[start] = (tuple(h for _pc, h, _r in found) + tuple(before), own)
+        inner = {pc for b in body for pc in blocks[b].pcs}
+        return _rebuild(program, labels, edits, inner=inner)
+    return program, labels
+
+
+DEFAULT_PASSES = (
+    _remove_unreachable,
+    _fold_constants,
+    _propagate_copies,
+    _eliminate_dead_stores,
+    _hoist_loop_invariants,
+)
+
+
+def optimize(program, labels=None, num_registers=None, max_rounds=20):
+    """
+    Optimize an assembled program; returns a new ``(program, labels)``.
+
+    - num_registers: size of the register file the kernel will run with.
+      Registers in it that the kernel never touches (excluding the preset
+      R5-R7) may be used to hoist loop-invariant expressions.
+    - max_rounds: upper bound on pass-pipeline iterations.
+
+    Raises ValueError for programs the analyzer rejects (unknown opcodes,
+    undefined labels, indirect branches).
+    """
+    source = program
+    program = [(instr, list(args)) for instr, args in program]
+    labels = dict(labels or {})
+    report = _check(program, num_registers)
+    used = set(report.registers_used)
+    free = []
+    if num_registers is not None:
+        free = [
+            r
+            for r in range(num_registers)
+            if r not in used and r not in PRESET_REGISTERS
+        ]
+    ctx = {"free": free}
+
+    for _round in range(max_rounds):
+        before = program
+        for opt_pass in DEFAULT_PASSES:
+            program, labels = opt_pass(program, labels, ctx)
+        if program == before:
+            break
+    if hasattr(source, "data"):  # keep an assembled Program's data and symbols
+        program = type(source)(program, source.data, source.symbols)
+    return program, labels
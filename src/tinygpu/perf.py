@@ -0,0 +1,60 @@
+# src/tinygpu/perf.py
+"""
+Performance counters.
+
+PerfCounters is a GPU observer collecting, for the current kernel, the
+number of cycles, executed thread-instructions, global loads / stores and
+barrier-waiting thread-cycles::
+
+    counters = PerfCounters()
+    gpu.attach(counters)
+    gpu.run()
+    print(counters.as_dict())
+"""
+
+
+class PerfCounters:
+    def __init__(self):
+        self.reset()
+
+    def reset(self, gpu=None):
+        self.cycles = 0
+        self.instructions = 0
+        self.loads = 0
+        self.stores = 0
+        self.wait_cycles = 0  # thread-cycles spent at SYNC / SYNCB
+        self.num_threads = gpu.num_threads if gpu is not None else 0
+        self._base = gpu.instructions_executed if gpu is not None else 0
+
+    def on_attach(self, gpu):
+        self.reset(gpu)
+
+    def on_load(self, gpu):
+        self.reset(gpu)
+
+    def on_access(self, gpu, tids, addrs, write):
+        if write:
+            self.stores += len(tids)
+        else:
+            self.loads += len(tids)
+
+    def on_cycle(self, gpu):
+        self.cycles += 1
+        self.instructions = gpu.instructions_executed - self._base
+        self.wait_cycles += int((gpu.sync_waiting | gpu.sync_waiting_block).sum())
+
+    @property
+    def utilization(self):
+        """Executed thread-instructions per thread per cycle."""
+        slots = self.cycles * self.num_threads
+        return self.instructions / slots if slots else 0.0
+
+    def as_dict(self):
+        return {
+            "cycles": self.cycles,
+            "instructions": self.instructions,
+            "loads": self.loads,
+            "stores": self.stores,
+            "wait_cycles": self.wait_cycles,
+            "utilization": self.utilization,
+        }
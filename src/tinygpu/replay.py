@@ -0,0 +1,291 @@
+# src/tinygpu/replay.py
+"""
+Deterministic replay logs and differential testing of execution engines.
+
+A ReplayRecorder attached to a TinyGPU captures the initial state (program,
+grid, registers, memory, ...) when the kernel is loaded and a handful of
+64-bit state hashes after every cycle::
+
+    recorder = ReplayRecorder()
+    gpu.attach(recorder)
+    gpu.load_kernel(program, labels, grid=(2, 4))
+    gpu.run()
+    log = recorder.log
+    log.save("run.replay.npz")
+
+    divergence = ReplayLog.load("run.replay.npz").diff(engine="vector")
+    if divergence:
+        print(divergence)   # first diverging cycle, thread and cell
+
+Hashes are linear (sum of value * per-cell random weight, mod 2**64) and
+kept per region. Global memory is hashed in pages and only pages written in
+a cycle (seen through the memory access hook) are rehashed, so the cost per
+cycle does not grow with the memory size.
+
+diff() replays the log on another engine, finds the first cycle whose
+hashes differ, then re-executes both engines up to that cycle and compares
+their full states to name the thread and the register / memory cell.
+"""
+
+from dataclasses import dataclass
+import json
+import numpy as np
+from .gpu import TinyGPU
+from .trace import _capture, _decode_program, _encode_program
+
+REPLAY_VERSION = 1
+
+# hash columns of ReplayLog.hashes
+HASH_FIELDS = ("control", "registers", "memory", "shared")
+_CONTROL_FIELDS = ("pc", "active", "flags", "sync_waiting", "sync_waiting_block")
+# compared (in this order) when locating a divergence
+_STATE_FIELDS = _CONTROL_FIELDS + ("registers", "memory", "shared")
+_CONFIG_FIELDS = (
+    "num_threads",
+    "num_registers",
+    "mem_size",
+    "num_blocks",
+    "threads_per_block",
+    "shared_size",
+    "block_offset",
+    "grid_blocks",
+    "kernel_args",
+    "engine",
+    "fault_policy",
+)
+
+
+def _weights(n, salt):
+    rng = np.random.default_rng(0x7167 + salt)
+    return rng.integers(1, 2**63, size=n, dtype=np.uint64) | np.uint64(1)
+
+
+def _hash(values, weights):
+    flat = values.reshape(-1).astype(np.int64).astype(np.uint64)
+    return int((flat * weights[: flat.size]).sum(dtype=np.uint64))
+
+
+class StateHasher:
+    """Incremental per-region state hashes of one TinyGPU."""
+
+    def __init__(self, gpu, page_size=1024):
+        self.page_size = page_size
+        self.num_pages = -(-gpu.mem_size // page_size)
+        self.memory_weights = _weights(self.num_pages * page_size, 1)
+        self.register_weights = _weights(gpu.registers.size, 2)
+        self.shared_weights = _weights(gpu.shared.size, 3)
+        self.control_weights = _weights(5 * gpu.num_threads, 4)
+        self.page_hashes = np.array(
+            [self._page_hash(gpu, p) for p in range(self.num_pages)], dtype=np.uint64
+        )
+        self.dirty = set()
+
+    def _page_hash(self, gpu, page):
+        lo = page * self.page_size
+        hi = lo + self.page_size
+        return _hash(gpu.memory[lo:hi], self.memory_weights[lo:hi])
+
+    def mark_written(self, addrs):
+        self.dirty.update((np.asarray(addrs) // self.page_size).tolist())
+
+    def hashes(self, gpu):
+        """Return the HASH_FIELDS hashes of the current state."""
+        for page in self.dirty:
+            self.page_hashes[page] = self._page_hash(gpu, page)
+        self.dirty.clear()
+        control = np.concatenate([getattr(gpu, name) for name in _CONTROL_FIELDS])
+        return (
+            _hash(control, self.control_weights),
+            _hash(gpu.registers, self.register_weights),
+            int(self.page_hashes.sum(dtype=np.uint64)),
+            _hash(gpu.shared, self.shared_weights),
+        )
+
+
+@dataclass
+class Divergence:
+    cycle: int  # gpu.cycle after the first cycle whose end state differs
+    field: str  # "pc", "registers", "memory", ...
+    thread: int  # first differing thread (None for memory / shared)
+    index: tuple  # differing cell, e.g. (tid, reg), (addr,), (block, saddr)
+    expected: int
+    actual: int
+
+    def __str__(self):
+        where = f"thread {self.thread} " if self.thread is not None else ""
+        return (
+            f"cycle {self.cycle}: {where}{self.field}{list(self.index)} "
+            f"expected {self.expected}, got {self.actual}"
+        )
+
+
+@dataclass
+class ReplayLog:
+    config: dict  # TinyGPU sizes, grid, engine and fault policy
+    program: list
+    labels: dict
+    start_cycle: int
+    initial: dict  # captured state arrays
+    hashes: np.ndarray  # (cycles, len(HASH_FIELDS)) uint64
+
+    @property
+    def num_cycles(self):
+        return len(self.hashes)
+
+    def restore(self, engine=None, gpu_factory=TinyGPU):
+        """Return a fresh GPU in the recorded initial state.
+
+        ``engine`` overrides the recorded engine; ``gpu_factory`` builds the
+        core (any TinyGPU-compatible class).
+        """
+        cfg = self.config
+        gpu = gpu_factory(
+            num_threads=cfg["num_threads"],
+            num_registers=cfg["num_registers"],
+            mem_size=cfg["mem_size"],
+            record_history=False,
+            engine=engine or cfg["engine"],
+            fault_policy=cfg["fault_policy"],
+        )
+        gpu.set_grid(
+            cfg["num_blocks"],
+            cfg["threads_per_block"],
+            cfg["shared_size"],
+            block_offset=cfg["block_offset"],
+        )
+        gpu.grid_blocks = cfg.get("grid_blocks", gpu.num_blocks)
+        gpu.kernel_args = cfg.get("kernel_args", [])
+        gpu.load_program(self.program, self.labels)
+        for name, value in self.initial.items():
+            if name == "constants":
+                gpu.set_constants(value)
+            else:
+                getattr(gpu, name)[...] = value
+        gpu.cycle = self.start_cycle
+        return gpu
+
+    def replay(self, engine=None, gpu_factory=TinyGPU, cycles=None):
+        """Re-execute ``cycles`` (default: all recorded) cycles; return the GPU."""
+        gpu = self.restore(engine, gpu_factory)
+        for _ in range(self.num_cycles if cycles is None else cycles):
+            gpu.step()
+        return gpu
+
+    def diff(self, engine=None, gpu_factory=TinyGPU):
+        """
+        Replay on ``engine`` and return the first Divergence, or None when
+        every recorded cycle hash matches.
+        """
+        gpu = self.restore(engine, gpu_factory)
+        hasher = _HashObserver(gpu)
+        gpu.attach(hasher)
+        for cycle in range(self.num_cycles):
+            gpu.step()
+            if hasher.last != tuple(int(h) for h in self.hashes[cycle]):
+                expected = self.replay(cycles=cycle + 1)
+                return _first_difference(expected, gpu, gpu.cycle)
+        return None
+
+    def save(self, path):
+        meta = {
+            "version": REPLAY_VERSION,
+            "config": self.config,
+            "program": _encode_program(self.program),
+            "labels": {k: int(v) for k, v in (self.labels or {}).items()},
+            "start_cycle": self.start_cycle,
+        }
+        np.savez_compressed(
+            path,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            hashes=self.hashes,
+            **{f"initial_{k}": v for k, v in self.initial.items()},
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes())
+            if meta["version"] != REPLAY_VERSION:
+                raise ValueError(f"unsupported replay log version {meta['version']}")
+            initial = {
+                k[len("initial_") :]: data[k]
+                for k in data.files
+                if k.startswith("initial_")
+            }
+            return cls(
+                meta["config"],
+                _decode_program(meta["program"]),
+                meta["labels"],
+                meta["start_cycle"],
+                initial,
+                data["hashes"],
+            )
+
+
+def _first_difference(expected, actual, cycle):
+    for name in _STATE_FIELDS:
+        a, b = getattr(expected, name), getattr(actual, name)
+        if a.shape != b.shape:
+            return Divergence(cycle, name, None, (), a.size, b.size)
+        cells = np.argwhere(a != b)
+        if len(cells):
+            index = tuple(int(i) for i in cells[0])
+            thread = None if name in ("memory", "shared") else index[0]
+            return Divergence(cycle, name, thread, index, int(a[index]), int(b[index]))
+    # equal states with different hashes cannot happen for identical setups
+    return Divergence(cycle, "hash", None, (), 0, 0)
+
+
+class _HashObserver:
+    def __init__(self, gpu):
+        self.hasher = StateHasher(gpu)
+        self.last = None
+
+    def on_access(self, gpu, tids, addrs, write):
+        if write:
+            self.hasher.mark_written(addrs)
+
+    def on_cycle(self, gpu):
+        self.last = self.hasher.hashes(gpu)
+
+
+class ReplayRecorder:
+    """
+    Observer recording a ReplayLog of the kernel run on the attached GPU.
+
+    The initial state is captured when the recorder is attached and again
+    whenever a program is loaded; ``log`` is available at any point during
+    or after the run.
+    """
+
+    def __init__(self, page_size=1024):
+        self.page_size = page_size
+        self._hasher = None
+        self._start = {}
+        self._hashes = []
+
+    def on_attach(self, gpu):
+        self.on_load(gpu)
+
+    def on_load(self, gpu):
+        self._start = {
+            "config": {name: getattr(gpu, name) for name in _CONFIG_FIELDS},
+            "program": list(gpu.program),
+            "labels": dict(gpu.labels or {}),
+            "start_cycle": gpu.cycle,
+            "initial": dict(_capture(gpu), constants=gpu.constants.copy()),
+        }
+        self._hasher = StateHasher(gpu, self.page_size)
+        self._hashes = []
+
+    def on_access(self, gpu, tids, addrs, write):
+        if write:
+            self._hasher.mark_written(addrs)
+
+    def on_cycle(self, gpu):
+        self._hashes.append(self._hasher.hashes(gpu))
+
+    @property
+    def log(self):
+        hashes = np.array(self._hashes, dtype=np.uint64).reshape(-1, len(HASH_FIELDS))
+        return ReplayLog(hashes=hashes, **self._start)
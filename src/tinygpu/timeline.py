@@ -0,0 +1,278 @@
+# src/tinygpu/timeline.py
+"""
+Chrome Trace Event / Perfetto timeline export.
+
+Converts per-thread execution into the Chrome Trace Event JSON format
+(load it in ui.perfetto.dev or chrome://tracing):
+
+- one process per block and one track per thread,
+- a span for every stretch a thread spends inside one basic block,
+- spans for waits at SYNC / SYNCB barriers and an instant when a thread
+  finishes,
+- counters with the number of running / waiting / finished threads.
+
+The source can be a TimelineRecorder attached to a live TinyGPU, a
+tinygpu.trace.TraceReader, or a TinyGPU with recorded history (where barrier
+waits are inferred from the PC pointing at a SYNC / SYNCB instruction).
+"""
+
+import json
+import numpy as np
+from .analyzer import basic_block_leaders
+
+# thread status codes
+RUNNING = 0
+WAIT_SYNC = 1
+WAIT_SYNCB = 2
+FINISHED = 3
+
+_STATUS_NAMES = {WAIT_SYNC: "SYNC wait", WAIT_SYNCB: "SYNCB wait"}
+
+
+def thread_status(pc, active, sync_waiting, sync_waiting_block):
+    """Vectorized per-thread status codes (works on one cycle or a stack)."""
+    status = np.full(pc.shape, RUNNING, dtype=np.int8)
+    status[sync_waiting] = WAIT_SYNC
+    status[sync_waiting_block] = WAIT_SYNCB
+    status[~active] = FINISHED
+    return status
+
+
+def _status_from_pc(program, pc):
+    """Infer the status from the PC alone (recorded history has no masks)."""
+    opcodes = np.array(
+        [
+            {"SYNC": WAIT_SYNC, "SYNCB": WAIT_SYNCB}.get(instr, RUNNING)
+            for instr, _args in program
+        ]
+        + [FINISHED],
+        dtype=np.int8,
+    )
+    n = len(program)
+    idx = np.where((pc < 0) | (pc >= n), n, pc)
+    return opcodes[idx]
+
+
+class TimelineRecorder:
+    """
+    Observer recording the PC and status of every thread per cycle.
+
+    Much lighter than the full history (one int32 + one int8 per thread per
+    cycle); attach with ``gpu.attach(recorder)`` and pass it to
+    export_chrome_trace().
+    """
+
+    def __init__(self):
+        self.program = []
+        self.labels = {}
+        self.num_blocks = 1
+        self.threads_per_block = 0
+        self.pcs = []
+        self.statuses = []
+
+    def on_attach(self, gpu):
+        self.on_load(gpu)
+
+    def on_load(self, gpu):
+        self.program = list(gpu.program)
+        self.labels = dict(gpu.labels or {})
+        self.num_blocks = gpu.num_blocks
+        self.threads_per_block = gpu.threads_per_block
+        self.pcs = []
+        self.statuses = []
+
+    def on_cycle(self, gpu):
+        self.pcs.append(gpu.pc.copy())
+        self.statuses.append(
+            thread_status(gpu.pc, gpu.active, gpu.sync_waiting, gpu.sync_waiting_block)
+        )
+
+    def iter_chunks(self, chunk_size=4096):
+        for start in range(0, len(self.pcs), chunk_size):
+            stop = start + chunk_size
+            yield start, np.stack(self.pcs[start:stop]), np.stack(
+                self.statuses[start:stop]
+            )
+
+
+def _source_chunks(source):
+    """Normalize a source into (program, labels, grid, chunk iterator)."""
+    if isinstance(source, TimelineRecorder):
+        grid = (source.num_blocks, source.threads_per_block)
+        return source.program, source.labels, grid, source.iter_chunks()
+
+    if hasattr(source, "iter_chunks"):  # TraceReader
+        program = source.program
+
+        def reader_chunks():
+            fields = ("pc", "active", "sync_waiting", "sync_waiting_block")
+            for start, c in source.iter_chunks(fields):
+                yield start, c["pc"], thread_status(*(c[name] for name in fields))
+
+        grid = (source.num_blocks, source.threads_per_block)
+        return program, source.labels, grid, reader_chunks()
+
+    # TinyGPU with in-memory history
+    program = source.program
+
+    def history_chunks(chunk_size=4096):
+        hist = source.history_pc
+        for start in range(0, len(hist), chunk_size):
+            pcs = np.stack(hist[start : start + chunk_size])
+            yield start, pcs, _status_from_pc(program, pcs)
+
+    grid = (source.num_blocks, source.threads_per_block)
+    return program, source.labels, grid, history_chunks()
+
+
+def _block_names(program, labels):
+    leaders = basic_block_leaders(program)
+    by_pc = {}
+    for name, pc in (labels or {}).items():
+        by_pc.setdefault(int(pc), name)
+    bounds = leaders + [len(program)]
+    names = []
+    block_of = np.zeros(len(program) + 1, dtype=np.int32)
+    for i, start in enumerate(leaders):
+        end = bounds[i + 1]
+        label = by_pc.get(start, f"BB{i}")
+        names.append((label, start, end - 1))
+        block_of[start:end] = i
+    return names, block_of
+
+
+class _EventStream:
+    """Incrementally writes trace events and tracks open per-thread spans."""
+
+    def __init__(self, f, block_names, tpb, cycle_us):
+        self.f = f
+        self.block_names = block_names
+        self.tpb = tpb
+        self.cycle_us = cycle_us
+        self.count = 0
+        self.prev_key = None
+        self.span_start = None
+        self.prev_counts = None
+
+    def emit(self, event):
+        if self.count:
+            self.f.write(",\n")
+        self.f.write(json.dumps(event, separators=(",", ":")))
+        self.count += 1
+
+    def _track(self, tid):
+        return {"pid": tid // self.tpb + 1, "tid": tid % self.tpb}
+
+    def begin(self, num_blocks, num_threads, start):
+        self.emit(
+            {"name": "process_name", "ph": "M", "pid": 0, "args": {"name": "grid"}}
+        )
+        for b in range(num_blocks):
+            self.emit(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": b + 1,
+                    "args": {"name": f"block {b}"},
+                }
+            )
+        for tid in range(num_threads):
+            track = self._track(tid)
+            name = f"thread {track['tid']} (tid {tid})"
+            self.emit(
+                {"name": "thread_name", "ph": "M", "args": {"name": name}, **track}
+            )
+        self.span_start = np.full(num_threads, start, dtype=np.int64)
+
+    def close_span(self, tid, end):
+        key = int(self.prev_key[tid])
+        if key == -FINISHED:
+            return
+        if key < 0:
+            name, cat, args = _STATUS_NAMES[-key], "barrier", {}
+        else:
+            label, first, last = self.block_names[key]
+            name, cat, args = label, "exec", {"pc": f"{first}-{last}"}
+        start = int(self.span_start[tid])
+        self.emit(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start * self.cycle_us,
+                "dur": (end - start) * self.cycle_us,
+                "args": args,
+                **self._track(tid),
+            }
+        )
+
+    def advance(self, cycle, keys):
+        """Close the spans of every thread whose key changed at ``cycle``."""
+        for tid in np.flatnonzero(keys != self.prev_key).tolist():
+            self.close_span(tid, cycle)
+            if keys[tid] == -FINISHED:
+                ts = cycle * self.cycle_us
+                self.emit(
+                    {
+                        "name": "finished",
+                        "ph": "i",
+                        "s": "t",
+                        "ts": ts,
+                        **self._track(tid),
+                    }
+                )
+            self.span_start[tid] = cycle
+        self.prev_key = keys
+
+    def counter(self, cycle, status):
+        counts = np.bincount(status, minlength=4)
+        counts = (
+            int(counts[RUNNING]),
+            int(counts[WAIT_SYNC] + counts[WAIT_SYNCB]),
+            int(counts[FINISHED]),
+        )
+        if counts == self.prev_counts:
+            return
+        self.prev_counts = counts
+        args = {"running": counts[0], "waiting": counts[1], "finished": counts[2]}
+        ts = cycle * self.cycle_us
+        self.emit({"name": "threads", "ph": "C", "pid": 0, "ts": ts, "args": args})
+
+    def finish(self, end):
+        if self.prev_key is not None:
+            for tid in range(self.prev_key.shape[0]):
+                self.close_span(tid, end)
+
+
+def export_chrome_trace(source, path, cycle_us=1, counters=True):
+    """
+    Write a Chrome Trace Event JSON file for ``source`` to ``path``.
+
+    - cycle_us: duration of one simulated cycle in trace microseconds
+    - counters: emit running/waiting/finished thread counters (process 0)
+
+    Events are streamed to the file chunk by chunk, so long runs never hold
+    the whole event list in memory. Returns the number of events written.
+    """
+    program, labels, (num_blocks, tpb), chunks = _source_chunks(source)
+    block_names, block_of = _block_names(program, labels)
+    n = len(program)
+
+    with open(path, "w") as f:
+        f.write('{"displayTimeUnit": "us", "traceEvents": [\n')
+        out = _EventStream(f, block_names, max(int(tpb), 1), cycle_us)
+        end = 0
+        for start, pcs, status in chunks:
+            idx = np.where((pcs < 0) | (pcs >= n), n, pcs)
+            keys = np.where(status == RUNNING, block_of[idx], -status.astype(np.int32))
+            if out.prev_key is None:
+                out.begin(num_blocks, keys.shape[1], start)
+                out.prev_key = keys[0].copy()
+            for row in range(keys.shape[0]):
+                out.advance(start + row, keys[row])
+                if counters:
+                    out.counter(start + row, status[row])
+            end = start + keys.shape[0]
+        out.finish(end)
+        f.write("\n]}\n")
+    return out.count
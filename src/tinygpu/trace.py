@@ -0,0 +1,369 @@
+# src/tinygpu/trace.py
+"""
+Streaming execution traces.
+
+TraceWriter is attached to a TinyGPU (``gpu.attach(writer)``) and streams
+the per-cycle state changes (PC, active mask, barrier state, flags and the
+register / memory / shared-memory cells that were written) to a chunked,
+compressed archive on disk while the kernel runs. TraceReader reopens the
+archive, reconstructs the machine state at any recorded cycle and exposes a
+history object that visualize() and save_animation() accept in place of a
+TinyGPU.
+
+Every chunk starts with a keyframe (full state), so reconstructing a cycle
+only decodes a single chunk.
+"""
+
+import io
+import json
+import zipfile
+import numpy as np
+
+TRACE_VERSION = 1
+
+# per-cycle arrays stored densely (one row per cycle)
+_DENSE_FIELDS = ("pc", "active", "flags", "sync_waiting", "sync_waiting_block")
+# arrays stored as sparse (cycle, flat index, value) write lists
+_SPARSE_FIELDS = ("registers", "memory", "shared")
+
+
+def _capture(gpu):
+    """Copy the traced parts of the machine state."""
+    return {
+        "registers": gpu.registers.copy(),
+        "memory": gpu.memory.copy(),
+        "shared": gpu.shared.copy(),
+        "pc": gpu.pc.copy(),
+        "active": gpu.active.copy(),
+        "flags": gpu.flags.copy(),
+        "sync_waiting": gpu.sync_waiting.copy(),
+        "sync_waiting_block": gpu.sync_waiting_block.copy(),
+    }
+
+
+def _encode_program(program):
+    encoded = []
+    for instr, args in program:
+        out = []
+        for a in args:
+            if isinstance(a, tuple) and a[0] == "R":
+                out.append(["R", int(a[1])])
+            elif isinstance(a, (int, np.integer)):
+                out.append(int(a))
+            else:
+                out.append(str(a))
+        encoded.append([instr, out])
+    return encoded
+
+
+def _decode_program(encoded):
+    program = []
+    for instr, args in encoded:
+        program.append(
+            (instr, [("R", a[1]) if isinstance(a, list) else a for a in args])
+        )
+    return program
+
+
+class TraceWriter:
+    """
+    Observer that streams execution state changes to ``path``.
+
+    - chunk_size: cycles per compressed chunk (each chunk holds a keyframe)
+    - compresslevel: zlib level used for the archive members
+
+    Attach it after the program is loaded and memory initialized, right
+    before ``run``; combine with ``TinyGPU(record_history=False)`` to keep
+    long runs out of RAM. Call close() (or use it as a context manager) to
+    finalize the file.
+    """
+
+    def __init__(self, path, chunk_size=256, compresslevel=6):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.path = path
+        self.chunk_size = int(chunk_size)
+        self._zip = zipfile.ZipFile(
+            path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+        )
+        self._meta = None
+        self._prev = None
+        self._num_cycles = 0
+        self._num_chunks = 0
+        self._reset_chunk()
+
+    def _reset_chunk(self):
+        self._keyframe = None
+        self._chunk_cycles = 0
+        self._dense = {name: [] for name in _DENSE_FIELDS}
+        self._sparse = {name: ([], [], []) for name in _SPARSE_FIELDS}
+
+    # --- observer protocol ---
+
+    def on_attach(self, gpu):
+        self._start(gpu)
+
+    def on_load(self, gpu):
+        if self._num_cycles:
+            raise RuntimeError(
+                "trace already contains cycles; use a new TraceWriter per launch"
+            )
+        self._start(gpu)
+
+    def on_cycle(self, gpu):
+        if self._zip is None:
+            raise RuntimeError("TraceWriter is closed")
+        if self._keyframe is None:
+            self._keyframe = {k: v.copy() for k, v in self._prev.items()}
+
+        c = self._chunk_cycles
+        for name in _DENSE_FIELDS:
+            self._dense[name].append(getattr(gpu, name).copy())
+        for name in _SPARSE_FIELDS:
+            cur = getattr(gpu, name).reshape(-1)
+            prev = self._prev[name].reshape(-1)
+            idx = np.flatnonzero(cur != prev)
+            if idx.size:
+                cycles, indices, values = self._sparse[name]
+                cycles.append(np.full(idx.size, c, dtype=np.int32))
+                indices.append(idx.astype(np.int64))
+                values.append(cur[idx].copy())
+                prev[idx] = cur[idx]
+        for name in _DENSE_FIELDS:
+            self._prev[name] = self._dense[name][-1]
+
+        self._chunk_cycles += 1
+        self._num_cycles += 1
+        if self._chunk_cycles >= self.chunk_size:
+            self._flush_chunk()
+
+    # --- internals ---
+
+    def _start(self, gpu):
+        self._prev = _capture(gpu)
+        self._meta = {
+            "version": TRACE_VERSION,
+            "num_threads": int(gpu.num_threads),
+            "num_registers": int(gpu.num_registers),
+            "mem_size": int(gpu.mem_size),
+            "num_blocks": int(gpu.num_blocks),
+            "threads_per_block": int(gpu.threads_per_block),
+            "shared_size": int(gpu.shared_size),
+            "chunk_size": self.chunk_size,
+            "program": _encode_program(gpu.program),
+            "labels": {k: int(v) for k, v in (gpu.labels or {}).items()},
+        }
+        self._reset_chunk()
+
+    def _flush_chunk(self):
+        if self._chunk_cycles == 0:
+            return
+        arrays = {}
+        for name, value in self._keyframe.items():
+            arrays[f"key_{name}"] = value
+        for name in _DENSE_FIELDS:
+            arrays[name] = np.stack(self._dense[name])
+        for name in _SPARSE_FIELDS:
+            cycles, indices, values = self._sparse[name]
+            dtype = self._keyframe[name].dtype
+            arrays[f"{name}_cycle"] = (
+                np.concatenate(cycles) if cycles else np.zeros(0, dtype=np.int32)
+            )
+            arrays[f"{name}_index"] = (
+                np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+            )
+            arrays[f"{name}_value"] = (
+                np.concatenate(values) if values else np.zeros(0, dtype=dtype)
+            )
+        self._zip.writestr(f"chunk_{self._num_chunks:06d}.npz", _npz_bytes(arrays))
+        self._num_chunks += 1
+        self._reset_chunk()
+
+    def close(self):
+        """Flush the pending chunk and write the trace metadata."""
+        if self._zip is None:
+            return
+        if self._meta is None:
+            raise RuntimeError("TraceWriter was never attached to a TinyGPU")
+        if self._num_cycles == 0:
+            # keep the initial state so an empty trace still opens
+            self._zip.writestr(
+                "initial.npz",
+                _npz_bytes({f"key_{k}": v for k, v in self._prev.items()}),
+            )
+        self._flush_chunk()
+        meta = dict(
+            self._meta, num_cycles=self._num_cycles, num_chunks=self._num_chunks
+        )
+        self._zip.writestr("meta.json", json.dumps(meta))
+        self._zip.close()
+        self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _npz_bytes(arrays):
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+class TraceHistory:
+    """
+    Materialized slice of a trace with the attributes visualize() and
+    save_animation() read from a TinyGPU (sizes and ``history_*`` lists).
+    """
+
+    def __init__(self, meta, states, cycles):
+        self.num_threads = meta["num_threads"]
+        self.num_registers = meta["num_registers"]
+        self.mem_size = meta["mem_size"]
+        self.num_blocks = meta["num_blocks"]
+        self.threads_per_block = meta["threads_per_block"]
+        self.shared_size = meta["shared_size"]
+        self.cycles = list(cycles)
+        self.history_registers = [s["registers"] for s in states]
+        self.history_memory = [s["memory"] for s in states]
+        self.history_pc = [s["pc"] for s in states]
+        self.history_flags = [s["flags"] for s in states]
+        self.history_shared = [s["shared"] for s in states]
+
+
+class TraceReader:
+    """
+    Random access to a trace written by TraceWriter.
+
+    Cycle ``i`` refers to the state after ``i + 1`` executed cycles, matching
+    index ``i`` of the in-memory ``gpu.history_*`` lists.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, "r")
+        self.meta = json.loads(self._zip.read("meta.json"))
+        if self.meta.get("version") != TRACE_VERSION:
+            raise ValueError(f"unsupported trace version {self.meta.get('version')}")
+        self.num_cycles = self.meta["num_cycles"]
+        self.chunk_size = self.meta["chunk_size"]
+        self.num_threads = self.meta["num_threads"]
+        self.num_registers = self.meta["num_registers"]
+        self.mem_size = self.meta["mem_size"]
+        self.program = _decode_program(self.meta["program"])
+        self.labels = self.meta["labels"]
+        self.num_blocks = self.meta["num_blocks"]
+        self.threads_per_block = self.meta["threads_per_block"]
+        self._cached_index = None
+        self._cached_chunk = None
+
+    def __len__(self):
+        return self.num_cycles
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _chunk(self, index):
+        if self._cached_index != index:
+            with self._zip.open(f"chunk_{index:06d}.npz") as f:
+                data = np.load(io.BytesIO(f.read()))
+                self._cached_chunk = {k: data[k] for k in data.files}
+            self._cached_index = index
+        return self._cached_chunk
+
+    def iter_chunks(self, fields=_DENSE_FIELDS):
+        """Yield ``(first_cycle, {field: (cycles, threads) array})`` per chunk.
+
+        Only the dense per-cycle fields (pc, active, flags, barrier masks)
+        are available; no sparse writes are replayed, so this is the cheap
+        way to scan control flow over a long trace.
+        """
+        for field in fields:
+            if field not in _DENSE_FIELDS:
+                raise ValueError(f"{field!r} is not a dense trace field")
+        for index in range(self.meta["num_chunks"]):
+            chunk = self._chunk(index)
+            yield index * self.chunk_size, {f: chunk[f] for f in fields}
+
+    def initial_state(self):
+        """State before the first traced cycle."""
+        if self.num_cycles == 0:
+            with self._zip.open("initial.npz") as f:
+                data = np.load(io.BytesIO(f.read()))
+                chunk = {k: data[k] for k in data.files}
+        else:
+            chunk = self._chunk(0)
+        return {
+            name[4:]: chunk[name].copy() for name in chunk if name.startswith("key_")
+        }
+
+    def iter_states(self, start=0, stop=None, step=1):
+        """Yield ``(cycle, state)`` for cycles in range(start, stop, step).
+
+        Each chunk is decoded once and its writes are replayed
+        incrementally, so iterating the whole trace is linear in its size.
+        The yielded state dicts are fresh copies.
+        """
+        stop = self.num_cycles if stop is None else min(stop, self.num_cycles)
+        if start < 0 or step <= 0:
+            raise ValueError("start must be >= 0 and step positive")
+        wanted = range(start, stop, step)
+        if not wanted:
+            return
+        for chunk_index in range(
+            wanted[0] // self.chunk_size, (stop - 1) // self.chunk_size + 1
+        ):
+            base = chunk_index * self.chunk_size
+            chunk = self._chunk(chunk_index)
+            state = {
+                name[4:]: chunk[name].copy()
+                for name in chunk
+                if name.startswith("key_")
+            }
+            flat = {name: state[name].reshape(-1) for name in _SPARSE_FIELDS}
+            # per-field cursor into the (cycle-sorted) write lists
+            cursors = dict.fromkeys(_SPARSE_FIELDS, 0)
+            n = chunk["pc"].shape[0]
+            for local in range(n):
+                cycle = base + local
+                if cycle >= stop:
+                    return
+                for name in _SPARSE_FIELDS:
+                    cyc = chunk[f"{name}_cycle"]
+                    lo = cursors[name]
+                    hi = lo + int(np.searchsorted(cyc[lo:], local, side="right"))
+                    if hi > lo:
+                        flat[name][chunk[f"{name}_index"][lo:hi]] = chunk[
+                            f"{name}_value"
+                        ][lo:hi]
+                        cursors[name] = hi
+                if cycle >= start and (cycle - start) % step == 0:
+                    out = {name: state[name].copy() for name in _SPARSE_FIELDS}
+                    for name in _DENSE_FIELDS:
+                        out[name] = chunk[name][local].copy()
+                    yield cycle, out
+
+    def state_at(self, cycle):
+        """Return the full machine state after ``cycle + 1`` cycles."""
+        if cycle < 0:
+            cycle += self.num_cycles
+        if not 0 <= cycle < self.num_cycles:
+            raise IndexError(f"cycle {cycle} out of range (0..{self.num_cycles - 1})")
+        for _cycle, state in self.iter_states(cycle, cycle + 1):
+            return state
+
+    def history(self, start=0, stop=None, step=1):
+        """Materialize a cycle range as a TraceHistory for the visualizer."""
+        cycles, states = [], []
+        for cycle, state in self.iter_states(start, stop, step):
+            cycles.append(cycle)
+            states.append(state)
+        return TraceHistory(self.meta, states, cycles)
@@ -0,0 +1,251 @@
+# src/tinygpu/vector.py
+"""
+Vectorized execution engine (``TinyGPU(engine="vector")``).
+
+Each cycle, the runnable threads are grouped by PC and every group executes
+its instruction as one NumPy operation over all of its threads; threads
+whose PC did not change (and that are not waiting at a barrier) advance and
+run their next instruction in the same cycle, exactly like the per-thread
+reference engine. Converged kernels therefore cost one NumPy call per
+instruction instead of one Python call per thread and instruction.
+
+Predicated instructions (``@GT ADD ...``) and SEL are masked updates of
+the group, so short conditionals keep its threads converged.
+
+The two engines give identical results for kernels whose threads do not
+race on memory within a cycle; where they do, lockstep order applies here
+(e.g. for stores to one address within a group, the highest tid wins).
+
+Handlers are looked up by the per-thread handler currently registered in
+instructions.INSTRUCTIONS, so opcodes that were added or replaced there
+without a vectorized counterpart fall back to per-thread execution.
+"""
+
+import numpy as np
+from . import instructions as ins
+from . import memory
+
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+
+
+def _is_reg(operand):
+    return isinstance(operand, tuple) and operand[0] == "R"
+
+
+def _resolve(gpu, tids, operand):
+    """Per-lane values of a register, or the scalar immediate."""
+    if _is_reg(operand):
+        return gpu.registers[tids, operand[1]].astype(np.int64)
+    return operand
+
+
+def _dest(rd_operand, name):
+    if not _is_reg(rd_operand):
+        raise TypeError(f"{name} target must be a register")
+    return rd_operand[1]
+
+
+def _write(gpu, tids, rd, values):
+    values = np.asarray(values, dtype=np.int64)
+    if values.size and (values.min() < _INT32_MIN or values.max() > _INT32_MAX):
+        raise OverflowError("result out of bounds for int32 register")
+    gpu.registers[tids, rd] = values
+
+
+def vec_set(gpu, tids, rd_operand, imm_operand):
+    _write(gpu, tids, _dest(rd_operand, "SET"), _resolve(gpu, tids, imm_operand))
+
+
+def _alu(name):
+    func = ins.ALU[name][1]
+
+    def handler(gpu, tids, rd_operand, *operands):
+        rd = _dest(rd_operand, name)
+        values = [np.asarray(_resolve(gpu, tids, op), np.int64) for op in operands]
+        gpu.registers[tids, rd] = np.broadcast_to(ins.wrap32(func(*values)), tids.shape)
+
+    handler.__name__ = handler.__qualname__ = f"vec_{name.lower()}"
+    return handler
+
+
+_ALU_HANDLERS = {op: _alu(op) for op in ins.ALU}
+vec_add = _ALU_HANDLERS["ADD"]
+vec_mul = _ALU_HANDLERS["MUL"]
+
+
+def vec_ld(gpu, tids, rd_operand, addr_operand):
+    rd = _dest(rd_operand, "LD")
+    gpu.registers[tids, rd] = memory.gather(
+        gpu, tids, _resolve(gpu, tids, addr_operand)
+    )
+
+
+def vec_ldc(gpu, tids, rd_operand, caddr_operand):
+    rd = _dest(rd_operand, "LDC")
+    gpu.registers[tids, rd] = memory.const_gather(
+        gpu, tids, _resolve(gpu, tids, caddr_operand)
+    )
+
+
+def vec_st(gpu, tids, addr_operand, rs_operand):
+    values = _resolve(gpu, tids, rs_operand)
+    if not _is_reg(rs_operand):
+        _write_check(values)
+    memory.scatter(gpu, tids, _resolve(gpu, tids, addr_operand), values)
+
+
+def _write_check(value):
+    if not _INT32_MIN <= int(value) <= _INT32_MAX:
+        raise OverflowError("value out of bounds for int32 memory")
+
+
+def vec_cswap(gpu, tids, addr_a_operand, addr_b_operand):
+    a = _resolve(gpu, tids, addr_a_operand)
+    b = _resolve(gpu, tids, addr_b_operand)
+    memory.cswap_many(gpu, tids, a, b)
+
+
+def _branch(gpu, tids, taken, target):
+    if np.ndim(taken) == 0:
+        if not taken:
+            return
+        taken_tids = tids
+    else:
+        taken_tids = tids[taken]
+    target = _resolve(gpu, taken_tids, target)
+    gpu.pc[taken_tids] = np.asarray(target, dtype=np.int64)
+
+
+def vec_jmp(gpu, tids, target):
+    _branch(gpu, tids, True, target)
+
+
+def vec_beq(gpu, tids, op1, op2, target):
+    _branch(gpu, tids, _resolve(gpu, tids, op1) == _resolve(gpu, tids, op2), target)
+
+
+def vec_bne(gpu, tids, op1, op2, target):
+    _branch(gpu, tids, _resolve(gpu, tids, op1) != _resolve(gpu, tids, op2), target)
+
+
+def vec_sync(gpu, tids):
+    gpu.sync_waiting[tids] = True
+
+
+def vec_syncb(gpu, tids):
+    gpu.sync_waiting_block[tids] = True
+
+
+def vec_cmp(gpu, tids, op1, op2):
+    diff = np.broadcast_to(
+        _resolve(gpu, tids, op1) - _resolve(gpu, tids, op2), tids.shape
+    )
+    gpu.flags[tids] = (diff == 0) | ((diff < 0) << 1) | ((diff > 0) << 2)
+
+
+def _flag_branch(bit):
+    def handler(gpu, tids, target):
+        _branch(gpu, tids, (gpu.flags[tids] & bit) != 0, target)
+
+    return handler
+
+
+def vec_sel(gpu, tids, rd_operand, cond, op1, op2):
+    rd = _dest(rd_operand, "SEL")
+    chosen = np.where(
+        _resolve(gpu, tids, cond) != 0,
+        _resolve(gpu, tids, op1),
+        _resolve(gpu, tids, op2),
+    )
+    _write(gpu, tids, rd, np.broadcast_to(chosen, tids.shape))
+
+
+def vec_shld(gpu, tids, rd_operand, saddr_operand):
+    rd = _dest(rd_operand, "SHLD")
+    saddrs = _resolve(gpu, tids, saddr_operand)
+    gpu.registers[tids, rd] = memory.shared_gather(gpu, tids, saddrs)
+
+
+def vec_shst(gpu, tids, saddr_operand, rs_operand):
+    values = _resolve(gpu, tids, rs_operand)
+    saddrs = _resolve(gpu, tids, saddr_operand)
+    memory.shared_scatter(gpu, tids, saddrs, values)
+
+
+# per-thread handler -> vectorized handler
+VECTOR_INSTRUCTIONS = {
+    ins.op_set: vec_set,
+    ins.op_ld: vec_ld,
+    ins.op_ldc: vec_ldc,
+    ins.op_st: vec_st,
+    ins.op_jmp: vec_jmp,
+    ins.op_beq: vec_beq,
+    ins.op_bne: vec_bne,
+    ins.op_sync: vec_sync,
+    ins.op_cswap: vec_cswap,
+    ins.op_cmp: vec_cmp,
+    ins.op_brgt: _flag_branch(0b100),
+    ins.op_brlt: _flag_branch(0b010),
+    ins.op_brz: _flag_branch(0b001),
+    ins.op_shld: vec_shld,
+    ins.op_shst: vec_shst,
+    ins.op_syncb: vec_syncb,
+    ins.op_sel: vec_sel,
+}
+VECTOR_INSTRUCTIONS.update(
+    {ins.INSTRUCTIONS[op]: handler for op, handler in _ALU_HANDLERS.items()}
+)
+
+
+def _execute_group(gpu, pc, tids):
+    instr, args = gpu.program[pc]
+    gpu.instructions_executed += len(tids)
+    mask, instr = ins.split_predicate(instr)
+    if mask is not None:  # predicated: a masked update of the matching lanes
+        tids = tids[(gpu.flags[tids] & mask) != 0]
+    func = ins.INSTRUCTIONS.get(instr)
+    if func is None or not tids.size:
+        return
+    vfunc = VECTOR_INSTRUCTIONS.get(func)
+    if vfunc is not None:
+        vfunc(gpu, tids, *args)
+    else:
+        for tid in tids.tolist():
+            func(gpu, tid, *args)
+
+
+def execute_cycle(gpu):
+    """Run one cycle of every runnable thread (see module docstring)."""
+    n = len(gpu.program)
+    pending = np.flatnonzero(gpu.active & ~gpu.sync_waiting & ~gpu.sync_waiting_block)
+    while pending.size:
+        pcs = gpu.pc[pending]
+        done = (pcs < 0) | (pcs >= n)
+        if done.any():
+            gpu.active[pending[done]] = False
+            pending, pcs = pending[~done], pcs[~done]
+            if not pending.size:
+                break
+
+        if gpu.pc_watch is not None:
+            hit = gpu.pc_watch[pcs]
+            if hit.any():
+                gpu.pc_hits.append((pcs[hit], pending[hit]))
+
+        first = pcs[0]
+        if (pcs == first).all():
+            _execute_group(gpu, int(first), pending)
+        else:
+            order = np.argsort(pcs, kind="stable")
+            sorted_pcs = pcs[order]
+            bounds = np.flatnonzero(np.diff(sorted_pcs)) + 1
+            for group in np.split(order, bounds):
+                _execute_group(gpu, int(pcs[group[0]]), pending[group])
+
+        stay = (
+            (gpu.pc[pending] == pcs)
+            & ~gpu.sync_waiting[pending]
+            & ~gpu.sync_waiting_block[pending]
+        )
+        pending = pending[stay]
+        gpu.pc[pending] = pcs[stay] + 1
@@ -1,48 +1,203 @@
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import tempfile
 import shutil
 import imageio
 
+STATS = ("mean", "min", "max")
 
-# Simple static visualization of TinyGPU execution history
-def visualize(gpu, show_pc=True):
+
+class HistoryPyramid:
     """
-    Simple static visualization (like earlier working version).
-    Plots registers (threads x regs), memory history (active slice), and PC heatmap.
+    Min / max / mean pyramid of a per-cycle history over row groups.
+
+    ``frames`` is a sequence of per-cycle arrays of shape (rows, cols) or
+    (rows,) (e.g. ``gpu.history_registers``); ``starts`` are the first rows
+    of contiguous row groups (threads of a block or warp, address bins).
+    Level ``k`` aggregates bins of ``2**k`` cycles; levels are built on
+    demand, by streaming ``chunk`` frames at a time or by halving a finer
+    cached level, so the dense (cycles, rows, cols) array never exists.
     """
-    reg_hist = np.array(gpu.history_registers)  # (cycles, threads, regs)
-    mem_hist = np.array(gpu.history_memory)  # (cycles, mem_size)
-    pc_hist = np.array(gpu.history_pc)  # (cycles, threads)
 
-    if reg_hist.size == 0:
-        print("No history recorded. Run gpu.run(...) first.")
-        return
+    def __init__(self, frames, starts, rows=None, chunk=256):
+        self.frames = frames
+        self.starts = np.asarray(starts, dtype=int)
+        self.rows = rows  # (first, last) row window, or None for all rows
+        self.chunk = chunk
+        self.levels = {}
+
+    def __len__(self):
+        return len(self.frames)
+
+    @staticmethod
+    def level_for(cycles, width):
+        """Coarsest-needed level: the smallest k with cycles / 2**k <= width."""
+        k = 0
+        while -(-cycles // (1 << k)) > width:
+            k += 1
+        return k
+
+    def level(self, k):
+        """(min, max, mean) arrays of shape (groups, cols, bins) at level k."""
+        if k not in self.levels:
+            if k - 1 in self.levels:
+                self.levels[k] = _halve(self.levels[k - 1])
+            else:
+                self.levels[k] = self._bin(0, len(self.frames), 1 << k)
+        lo, hi, total, count = self.levels[k]
+        return lo, hi, total / count
+
+    def window(self, start, stop, width):
+        """Stats of cycles [start, stop) at the level matching ``width``."""
+        start, stop = max(0, start), min(len(self.frames), stop)
+        if stop <= start:
+            raise ValueError(f"empty cycle window [{start}, {stop})")
+        k = self.level_for(stop - start, width)
+        if (start, stop) == (0, len(self.frames)):
+            return self.level(k)
+        lo, hi, total, count = self._bin(start, stop, 1 << k)
+        return lo, hi, total / count
+
+    def _group(self, chunk):
+        """Reduce rows of a (n, rows, cols) chunk to groups."""
+        if self.rows is not None:
+            chunk = chunk[:, self.rows[0] : self.rows[1]]
+        counts = np.diff(np.append(self.starts, chunk.shape[1]))[:, None]
+        return (
+            np.minimum.reduceat(chunk, self.starts, axis=1),
+            np.maximum.reduceat(chunk, self.starts, axis=1),
+            np.add.reduceat(chunk, self.starts, axis=1, dtype=np.float64),
+            counts,
+        )
 
-    # Get number of cycles recorded
-    cycles = reg_hist.shape[0]
+    def _bin(self, start, stop, size):
+        step = max(self.chunk // size, 1) * size
+        parts = []
+        for first in range(start, stop, step):
+            chunk = [
+                np.asarray(f) for f in self.frames[first : min(first + step, stop)]
+            ]
+            chunk = np.stack(chunk)
+            if chunk.ndim == 2:
+                chunk = chunk[:, :, None]
+            lo, hi, total, counts = self._group(chunk)
+            bins = np.arange(0, chunk.shape[0], size)
+            cycles = np.diff(np.append(bins, chunk.shape[0]))
+            parts.append(
+                (
+                    np.minimum.reduceat(lo, bins, axis=0),
+                    np.maximum.reduceat(hi, bins, axis=0),
+                    np.add.reduceat(total, bins, axis=0),
+                    cycles[:, None, None] * counts[None],
+                )
+            )
+        # (bins, groups, cols) -> (groups, cols, bins)
+        return tuple(
+            np.concatenate(p).transpose(1, 2, 0) for p in zip(*parts, strict=True)
+        )
 
-    # Reshape registers to (threads*regs, cycles)
-    regs_reshaped = reg_hist.reshape(cycles, -1).T
 
-    # Detect active memory region: columns that ever changed or are non-zero initially
-    mem_changed = (
-        np.any(mem_hist != mem_hist[0], axis=0)
-        if mem_hist.size
-        else np.zeros(0, dtype=bool)
+def _halve(stats):
+    lo, hi, total, count = stats
+    pairs = np.arange(0, lo.shape[-1], 2)
+    return (
+        np.minimum.reduceat(lo, pairs, axis=-1),
+        np.maximum.reduceat(hi, pairs, axis=-1),
+        np.add.reduceat(total, pairs, axis=-1),
+        np.add.reduceat(count, pairs, axis=-1),
     )
-    mem_nonzero = (
-        np.any(mem_hist != 0, axis=0) if mem_hist.size else np.zeros(0, dtype=bool)
+
+
+def thread_groups(gpu, n, group="auto", warp_size=32, max_rows=512, cols=1):
+    """
+    First thread of each group for ``n`` threads; returns (starts, label).
+
+    group: "thread", "warp" (``warp_size`` threads), "block" (the launch
+    grid) or "auto" (the finest of these giving at most ``max_rows`` rows of
+    ``cols`` values each, else evenly sized bins).
+    """
+    tpb = getattr(gpu, "threads_per_block", 0)
+    sizes = {"thread": 1, "warp": warp_size, "block": tpb or warp_size}
+    if group == "auto":
+        for name in ("thread", "warp", "block"):
+            if -(-n // sizes[name]) * cols <= max_rows:
+                group = name
+                break
+        else:
+            size = -(-n * cols // max_rows)
+            return np.arange(0, n, size), f"{size} threads"
+    if group not in sizes:
+        raise ValueError(f"group must be thread, warp, block or auto, got {group!r}")
+    return np.arange(0, n, sizes[group]), group
+
+
+def _active_range(frames, chunk=256):
+    """[start, end) of addresses non-zero in any frame (streamed)."""
+    mask = None
+    for first in range(0, len(frames), chunk):
+        nonzero = np.stack(frames[first : first + chunk]).any(axis=0)
+        mask = nonzero if mask is None else mask | nonzero
+    if mask is None or not mask.any():
+        return None
+    where = np.flatnonzero(mask)
+    return int(where[0]), int(where[-1]) + 1
+
+
+def _image(stats, stat):
+    lo, hi, mean = stats
+    image = {"min": lo, "max": hi, "mean": mean}[stat]
+    return image.reshape(-1, image.shape[-1])  # (groups * cols, bins)
+
+
+# Static visualization of TinyGPU execution history
+def visualize(
+    gpu,
+    show_pc=True,
+    cycles=None,
+    threads=None,
+    group="auto",
+    warp_size=32,
+    stat="mean",
+    width=1000,
+    max_rows=512,
+):
+    """
+    Plot registers (thread groups x regs), the active memory slice and the
+    PC per thread group over time; returns the figure.
+
+    Large histories are aggregated: cycles are binned by the pyramid level
+    matching ``width`` columns and threads grouped per warp or block (see
+    thread_groups) so at most ``max_rows`` rows are drawn; ``stat`` picks
+    the min, max or mean of each bin. ``cycles`` and ``threads`` are
+    (start, stop) windows to zoom into.
+    """
+    if stat not in STATS:
+        raise ValueError(f"stat must be one of {STATS}, got {stat!r}")
+    total = len(gpu.history_registers)
+    if total == 0:
+        print("No history recorded. Run gpu.run(...) first.")
+        return None
+    c0, c1 = cycles or (0, total)
+    t0, t1 = threads or (0, gpu.num_threads)
+    starts, label = thread_groups(
+        gpu, t1 - t0, group, warp_size, max_rows, gpu.num_registers
     )
-    active_mask = mem_changed | mem_nonzero
-    if active_mask.any():
-        start = int(np.where(active_mask)[0][0])
-        end = int(np.where(active_mask)[0][-1]) + 1
-    else:
-        start, end = 0, min(32, gpu.mem_size)  # fallback small window
 
-    # Plotting
+    def render(frames, starts, rows=None):
+        pyramid = HistoryPyramid(frames, starts, rows)
+        return _image(pyramid.window(c0, c1, width), stat)
+
+    regs = render(gpu.history_registers, starts, (t0, t1))
+    span = _active_range(gpu.history_memory) or (0, min(32, gpu.mem_size))
+    mem_starts = np.arange(0, span[1] - span[0], -(-(span[1] - span[0]) // max_rows))
+    mem = render(gpu.history_memory, mem_starts, span)
+    x = (c0, min(c1, total))
+
     fig, axs = plt.subplots(
         3 if show_pc else 2,
         1,
@@ -52,94 +207,72 @@ def visualize(gpu, show_pc=True):
     ax_regs = axs[0]
     ax_mem = axs[1]
     ax_pc = axs[2] if show_pc else None
+    imshow = {"aspect": "auto", "origin": "lower", "interpolation": "nearest"}
 
-    # Registers (threads*regs x cycles)
-    im1 = ax_regs.imshow(regs_reshaped, aspect="auto", cmap="inferno", origin="lower")
-    ax_regs.set_title("Registers over time (threads × regs)")
+    im1 = ax_regs.imshow(regs, cmap="inferno", extent=(*x, 0, len(regs)), **imshow)
+    ax_regs.set_title(f"Registers over time ({label} × regs, {stat})")
     fig.colorbar(im1, ax=ax_regs, label="value")
 
-    # Memory: show active slice only (cycles x active_len)
-    mem_to_plot = mem_hist[:, start:end].T if mem_hist.size else np.zeros((1, 1))
-    im2 = ax_mem.imshow(mem_to_plot, aspect="auto", cmap="plasma", origin="lower")
+    im2 = ax_mem.imshow(mem, cmap="plasma", extent=(*x, *span), **imshow)
     ax_mem.set_title("Memory over time (active slice)")
     fig.colorbar(im2, ax=ax_mem, label="value")
 
-    # Program Counter per thread
     if show_pc:
-        pcs = pc_hist.T
-        im3 = ax_pc.imshow(pcs, aspect="auto", cmap="viridis", origin="lower")
-        ax_pc.set_title("Program Counter (per-thread) over time")
+        pcs = render(gpu.history_pc, starts, (t0, t1))
+        im3 = ax_pc.imshow(pcs, cmap="viridis", extent=(*x, t0, t1), **imshow)
+        ax_pc.set_title(f"Program Counter (per {label}) over time")
         fig.colorbar(im3, ax=ax_pc, label="PC")
 
     plt.tight_layout()
     plt.show()
+    return fig
 
 
 # Full TinyGPU execution animation and GIF saving
-def save_animation(gpu, out_path="tinygpu_run.gif", fps=10, max_frames=200, dpi=100):
-    """
-    Full TinyGPU v3~v4 style animation:
-    - Registers (threads × regs) at top
-    - Memory evolution in middle
-    - Program Counter per thread at bottom
-    """
+FRAME_SIZE = (8, 6)  # animation frame size in inches (times dpi = pixels)
 
-    reg_hist = np.array(gpu.history_registers)  # (cycles, threads, regs)
-    mem_hist = np.array(gpu.history_memory)  # (cycles, mem_size)
-    pc_hist = np.array(gpu.history_pc)  # (cycles, threads)
-    cycles = reg_hist.shape[0]
 
-    if cycles == 0:
-        raise RuntimeError("No history recorded. Run gpu.run(...) first.")
+def _dump(path, frames, shape, dtype):
+    """Stream per-cycle history arrays into a .npy file without stacking."""
+    out = np.lib.format.open_memmap(path, "w+", dtype, (len(frames),) + shape)
+    for i, frame in enumerate(frames):
+        out[i] = np.reshape(frame, shape)
+    out.flush()
+    return out
 
-    # detect active memory region (0:ARRAY_LEN typically)
-    mem_changed = np.any(mem_hist != mem_hist[0], axis=0)
-    mem_nonzero = np.any(mem_hist != 0, axis=0)
-    active_mask = mem_changed | mem_nonzero
-    if active_mask.any():
-        mem_start = int(np.where(active_mask)[0][0])
-        mem_end = int(np.where(active_mask)[0][-1]) + 1
-    else:
-        mem_start, mem_end = 0, min(32, gpu.mem_size)
 
-    # color scale clamp (ignore extreme sentinel)
-    all_vals = mem_hist[:, mem_start:mem_end]
-    vmin, vmax = np.percentile(all_vals, 1), np.percentile(all_vals, 99)
+def _render_frames(tmpdir, meta, positions, frame_indices):
+    """Render animation frames into rows ``positions`` of frames.npy."""
 
-    # cycle sampling
-    if max_frames and cycles > max_frames:
-        indices = np.linspace(0, cycles - 1, max_frames, dtype=int)
-    else:
-        indices = np.arange(cycles)
+    def load(name):
+        return np.load(os.path.join(tmpdir, f"{name}.npy"), mmap_mode="r")
 
-    tmpdir = tempfile.mkdtemp(prefix="tinygpu_frames_")
-    frame_files = []
+    reg_hist, mem_hist, pc_hist = load("registers"), load("memory"), load("pc")
+    out = np.load(os.path.join(tmpdir, "frames.npy"), mmap_mode="r+")
+    height, width = out.shape[1:3]
 
-    # generate frames
-    for i, frame_idx in enumerate(indices):
-        fig, axs = plt.subplots(
-            3, 1, figsize=(8, 6), dpi=dpi, gridspec_kw={"height_ratios": [2, 1, 0.5]}
-        )
+    for pos, frame_idx in zip(positions, frame_indices, strict=True):
+        fig = Figure(figsize=FRAME_SIZE, dpi=meta["dpi"])
+        canvas = FigureCanvasAgg(fig)
+        axs = fig.subplots(3, 1, gridspec_kw={"height_ratios": [2, 1, 0.5]})
         ax_regs, ax_mem, ax_pc = axs
 
         # --- REGISTERS cumulative ---
-        regs = (
-            reg_hist[: frame_idx + 1].reshape(-1, gpu.num_threads * gpu.num_registers).T
-        )
+        regs = reg_hist[: frame_idx + 1].T
         ax_regs.imshow(regs, aspect="auto", cmap="inferno", origin="lower")
         ax_regs.set_title("Registers over time (threads × regs)")
         ax_regs.set_xlabel("Cycle")
         ax_regs.set_ylabel("Thread × Reg")
 
         # --- MEMORY cumulative ---
-        mem_frame = mem_hist[: frame_idx + 1, mem_start:mem_end].T
+        mem_frame = mem_hist[: frame_idx + 1].T
         ax_mem.imshow(
             mem_frame,
             aspect="auto",
             cmap="plasma",
             origin="lower",
-            vmin=vmin,
-            vmax=vmax,
+            vmin=meta["vmin"],
+            vmax=meta["vmax"],
         )
         ax_mem.set_title(f"Memory over time (up to cycle {frame_idx})")
         ax_mem.set_xlabel("Cycle")
@@ -152,17 +285,119 @@ def save_animation(gpu, out_path="tinygpu_run.gif", fps=10, max_frames=200, dpi=
         ax_pc.set_xlabel("Cycle")
         ax_pc.set_ylabel("Thread")
 
-        fname = os.path.join(tmpdir, f"frame_{i:05d}.png")
-        fig.savefig(fname, bbox_inches="tight")
-        plt.close(fig)
-        frame_files.append(fname)
+        # fixed canvas size: tight_layout moves axes, never resizes the figure
+        fig.tight_layout()
+        canvas.draw()
+        out[pos] = np.asarray(canvas.buffer_rgba())[:height, :width, :3]
+    out.flush()
+
+
+def save_animation(
+    gpu,
+    out_path="tinygpu_run.gif",
+    fps=10,
+    max_frames=200,
+    dpi=100,
+    workers=None,
+):
+    """
+    Full TinyGPU v3~v4 style animation:
+    - Registers (threads × regs) at top
+    - Memory evolution in middle
+    - Program Counter per thread at bottom
+
+    Frames are rendered by ``workers`` processes (None: one per CPU, 1:
+    in this process). The history is written once to memory-mapped .npy
+    files in a temporary directory that the workers read, and every frame
+    is rendered at the fixed FRAME_SIZE * dpi into a shared frame array, so
+    nothing large is pickled. Frames are encoded in cycle order; the format
+    follows ``out_path`` (GIF, or MP4 with imageio's ffmpeg plugin).
+    """
+    cycles = len(gpu.history_registers)
+    if cycles == 0:
+        raise RuntimeError("No history recorded. Run gpu.run(...) first.")
+
+    # cycle sampling
+    if max_frames and cycles > max_frames:
+        indices = np.linspace(0, cycles - 1, max_frames, dtype=int)
+    else:
+        indices = np.arange(cycles)
+    last = int(indices[-1]) + 1  # later cycles are never drawn
+
+    tmpdir = tempfile.mkdtemp(prefix="tinygpu_frames_")
+    try:
+        regs_shape = (gpu.num_threads * gpu.num_registers,)
+        history = gpu.history_registers[:last]
+        _dump(os.path.join(tmpdir, "registers.npy"), history, regs_shape, np.int32)
+        mem_hist = _dump(
+            os.path.join(tmpdir, "memory_full.npy"),
+            gpu.history_memory[:last],
+            (gpu.mem_size,),
+            np.int32,
+        )
+        _dump(
+            os.path.join(tmpdir, "pc.npy"),
+            gpu.history_pc[:last],
+            (gpu.num_threads,),
+            np.int32,
+        )
+
+        # detect active memory region (0:ARRAY_LEN typically)
+        mem_changed = np.any(mem_hist != mem_hist[0], axis=0)
+        mem_nonzero = np.any(mem_hist != 0, axis=0)
+        active_mask = mem_changed | mem_nonzero
+        if active_mask.any():
+            mem_start = int(np.where(active_mask)[0][0])
+            mem_end = int(np.where(active_mask)[0][-1]) + 1
+        else:
+            mem_start, mem_end = 0, min(32, gpu.mem_size)
+        window = np.array(mem_hist[:, mem_start:mem_end])
+        np.save(os.path.join(tmpdir, "memory.npy"), window)
+
+        # color scale clamp (ignore extreme sentinel)
+        meta = {
+            "dpi": dpi,
+            "vmin": float(np.percentile(window, 1)),
+            "vmax": float(np.percentile(window, 99)),
+        }
+
+        # fixed frame size, known before any frame is drawn
+        height = int(round(FRAME_SIZE[1] * dpi))
+        width = int(round(FRAME_SIZE[0] * dpi))
+        frames = np.lib.format.open_memmap(
+            os.path.join(tmpdir, "frames.npy"),
+            "w+",
+            np.uint8,
+            (len(indices), height, width, 3),
+        )
 
-    # combine all frames (resize consistent)
-    imgs = [imageio.imread(f) for f in frame_files]
-    target_shape = min(img.shape[:2] for img in imgs)
-    imgs = [img[: target_shape[0], : target_shape[1]] for img in imgs]
+        positions = np.arange(len(indices))
+        workers = os.cpu_count() if workers is None else workers
+        workers = max(1, min(workers, len(indices)))
+        if workers == 1:
+            _render_frames(tmpdir, meta, positions, indices)
+        else:
+            chunks = np.array_split(positions, workers * 4)
+            context = None
+            if "fork" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                jobs = [
+                    pool.submit(_render_frames, tmpdir, meta, c, indices[c])
+                    for c in chunks
+                    if len(c)
+                ]
+                for job in jobs:
+                    job.result()
 
-    # save gif
-    imageio.mimsave(out_path, imgs, fps=fps, loop=0)
-    shutil.rmtree(tmpdir, ignore_errors=True)
-    print(f"✅ GIF saved: {out_path}")
+        # encode in cycle order, streaming from the frame array
+        options = {"fps": fps}
+        if str(out_path).lower().endswith(".gif"):
+            options = {"duration": 1000 / fps, "loop": 0}  # ms per frame
+        with imageio.get_writer(out_path, **options) as writer:
+            for frame in frames:
+                writer.append_data(np.asarray(frame))
+        del frames
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    print(f"✅ Animation saved: {out_path}")
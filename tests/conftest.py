@@ -5,3 +5,22 @@ import os
 src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _restore_instruction_table():
+    """
+    Undo per-test patches of the global instruction table.
+
+    test_gpu.test_tinygpu_step_and_run replaces LOAD and ADD in
+    instructions.INSTRUCTIONS without restoring them; without this fixture
+    every test collected after it (e.g. test_trace) runs the fake handlers.
+    """
+    from tinygpu import instructions
+
+    saved = dict(instructions.INSTRUCTIONS)
+    yield
+    instructions.INSTRUCTIONS.clear()
+    instructions.INSTRUCTIONS.update(saved)
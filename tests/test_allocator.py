@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from tinygpu.allocator import DeviceAllocator
+from tinygpu.assembler import assemble
+from tinygpu.gpu import TinyGPU
+
+SCALE = """
+ADD R8, R0, R7
+LD R9, R8
+MUL R9, R9, R3
+ADD R8, R1, R7
+ST R8, R9
+"""
+
+
+def test_malloc_aligns_pools_and_coalesces():
+    heap = DeviceAllocator(TinyGPU(num_threads=1, mem_size=64), alignment=8)
+    a, b, c = heap.malloc(3), heap.malloc(8), heap.malloc(9)
+    assert (a, b, c) == (0, 8, 16)
+    assert heap.used_words == 32
+    heap.free(b)
+    assert heap.malloc(5) == b  # same rounded size: reused from the pool
+    for address in (a, b, c):
+        heap.free(address)
+    # the whole heap only exists once the pooled buffers are merged back
+    assert heap.malloc(64) == 0
+    with pytest.raises(MemoryError):
+        heap.malloc(1)
+    with pytest.raises(ValueError):
+        heap.free(3)
+    with pytest.raises(ValueError):
+        heap.malloc(-5)
+    with pytest.raises(ValueError):
+        heap.empty((2, -3))
+
+
+def test_trim_merges_neighbours():
+    heap = DeviceAllocator(TinyGPU(num_threads=1, mem_size=32))
+    addresses = [heap.malloc(4) for _ in range(8)]
+    for address in addresses:
+        heap.free(address)
+    assert heap.malloc(32) == 0
+    assert heap.free_words == 0
+
+
+def test_device_arrays_round_trip_through_a_kernel():
+    program, labels = assemble(SCALE)
+    gpu = TinyGPU(num_threads=8, num_registers=10, mem_size=128)
+    heap = DeviceAllocator(gpu)
+    values = np.arange(1, 9)
+    x = heap.to_device(values)
+    for factor in (2, 3):  # buffers reused across launches
+        with heap.empty(len(values)) as out:
+            gpu.load_kernel(program, labels, grid=(2, 4), args=[x, out, 0, factor])
+            gpu.run()
+            assert np.array_equal(out.to_host(), values * factor)
+    assert list(heap.allocations) == [x.address]
+    x.copy_from_host(values[::-1])
+    assert np.array_equal(x.to_host(), values[::-1])
+    with pytest.raises(ValueError):
+        x.copy_from_host([1, 2])
+    x.free()
+    assert heap.used_words == 0
@@ -0,0 +1,100 @@
+from tinygpu.analyzer import EXIT, analyze, build_cfg
+from tinygpu.gpu import TinyGPU
+
+
+def _messages(report):
+    return [(d.pc, d.message) for d in report.diagnostics]
+
+
+def test_cfg_and_liveness_of_loop():
+    program = [
+        ("SET", [("R", 0), 0]),
+        ("SET", [("R", 1), 1]),
+        ("ADD", [("R", 0), ("R", 0), ("R", 1)]),  # loop:
+        ("ADD", [("R", 1), ("R", 1), 1]),
+        ("BNE", [("R", 1), 5, 2]),
+        ("ST", [0, ("R", 0)]),
+    ]
+    blocks, block_of = build_cfg(program)
+    assert [(b.start, b.end) for b in blocks] == [(0, 2), (2, 5), (5, 6)]
+    assert blocks[1].succs == [1, 2] and blocks[2].succs == [EXIT]
+    assert block_of[3] == 1
+
+    report = analyze(program)
+    assert report.live_in[2] == {0, 1}
+    assert report.live_out[5] == set()
+    assert report.register_count == 2
+    assert report.diagnostics == []
+
+
+def test_diagnostics():
+    program = [
+        ("ADD", [("R", 2), ("R", 3), 1]),  # R3 never set
+        ("SET", [("R", 7), 0]),  # clobbers tid
+        ("BEQ", [("R", 7), 0, 5]),
+        ("JMP", [3]),  # self-branch falls through
+        ("JMP", ["nowhere"]),
+        ("SHST", [4, ("R", 2)]),
+        ("JMP", [8]),
+        ("SET", [("R", 0), 1]),  # unreachable
+        ("JMP", [8]),  # done: JMP done
+    ]
+    report = analyze(program)
+    text = report.summary()
+    assert "R3 may be read before it is set" in text
+    assert "overwrites R7" in text
+    assert "branch to itself" in text
+    assert "undefined label 'nowhere'" in text
+    assert "unreachable code (pc 7..7)" in text
+    assert report.unreachable == [7]
+    assert report.shared_size == 5 and not report.shared_dynamic
+    assert [d.pc for d in report.errors] == [4]
+
+
+def test_predicated_shared_accesses_count():
+    program = [
+        ("CMP", [("R", 7), 2]),
+        ("@LT SHST", [5, ("R", 7)]),
+        ("@LT SHLD", [("R", 2), ("R", 1)]),
+    ]
+    report = analyze(program)
+    assert report.shared_size == 6 and report.shared_dynamic
+
+
+def test_barrier_under_divergent_branch_and_infinite_loop():
+    program = [
+        ("CMP", [("R", 6), 0]),
+        ("BRGT", [3]),
+        ("SYNCB", []),  # only thread 0 of each block gets here
+        ("SET", [("R", 0), 4]),
+        ("ADD", [("R", 1), ("R", 0), 1]),
+        ("JMP", [3]),  # never exits
+    ]
+    report = analyze(program)
+    msgs = _messages(report)
+    assert any(pc == 2 and "thread-divergent branch at pc 1" in m for pc, m in msgs)
+    assert any("infinite loop" in m for _pc, m in msgs)
+
+    uniform = [("SET", [("R", 0), 1]), ("BNE", [("R", 0), 0, 3]), ("SYNC", [])]
+    assert not any("divergent" in m for _pc, m in _messages(analyze(uniform)))
+
+
+def test_for_kernel_sizes_register_file():
+    program = [("SET", [("R", 9), 1]), ("ST", [("R", 7), ("R", 9)])]
+    gpu = TinyGPU.for_kernel(program, num_threads=4, mem_size=8)
+    assert gpu.num_registers == 10
+    gpu.load_program(program)
+    gpu.run(max_cycles=5)
+    assert gpu.memory[:4].tolist() == [1, 1, 1, 1]
+
+
+def test_for_kernel_matches_default_core():
+    program = [("ADD", [("R", 1), ("R", 1), 1]), ("ST", [("R", 0), ("R", 1)])]
+    small = TinyGPU.for_kernel(program, num_threads=4, mem_size=8)
+    default = TinyGPU(num_threads=4, mem_size=8)
+    for gpu in (small, default):
+        gpu.load_program(program)
+        gpu.run(max_cycles=5)
+    assert small.num_registers == default.num_registers == 8
+    assert small.memory.tolist() == default.memory.tolist() == [1] + [0] * 7
+    assert (small.registers == default.registers).all()
@@ -1,12 +1,15 @@
 import tempfile
 import os
-from tinygpu.assembler import assemble_file
+import re
+import pytest
+from tinygpu.assembler import AssemblyError, assemble, assemble_file
+from tinygpu.gpu import TinyGPU
 
 
 def test_assemble_file_basic():
     code = """
 start:
-LOAD R1, 42
+LD R1, 42
 ADD R2, R1, 1
 JMP start
 """
@@ -16,9 +19,140 @@ JMP start
     try:
         program, labels = assemble_file(fname)
         assert labels["start"] == 0
-        assert program[0][0] == "LOAD"
+        assert program[0][0] == "LD"
         assert program[1][0] == "ADD"
         assert program[2][0] == "JMP"
-        assert program[2][1][0] == "start" or program[2][1][0] == 0
+        assert program[2][1][0] == 0
     finally:
         os.remove(fname)
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    return str(path)
+
+
+def test_constants_are_overridable(tmp_path):
+    path = _write(
+        tmp_path / "k.tgpu",
+        """
+.const N 8
+.const HALF N / 2
+.define ACC R4
+loop:
+    ADD ACC, ACC, HALF
+    BNE ACC, N * 2, loop
+""",
+    )
+    program, labels = assemble_file(path)
+    assert program[0] == ("ADD", [("R", 4), ("R", 4), 4])
+    assert program[1] == ("BNE", [("R", 4), 16, 0])
+    program, _ = assemble_file(path, defines={"N": 32, "ACC": "R2"})
+    assert program[0] == ("ADD", [("R", 2), ("R", 2), 16])
+    assert program.symbols["N"] == 32
+
+
+def test_macros_and_includes(tmp_path, monkeypatch):
+    _write(
+        tmp_path / "lib.tgpu",
+        """
+.macro CLAMP r, hi
+    BEQ \\r, \\hi, ok\\@
+    SET \\r, \\hi
+ok\\@:
+.endm
+""",
+    )
+    path = _write(
+        tmp_path / "main.tgpu",
+        """
+.include "lib.tgpu"
+CLAMP R1, 5
+CLAMP R2, 7
+""",
+    )
+    program, labels = assemble_file(path)
+    assert [ins for ins, _ in program] == ["BEQ", "SET", "BEQ", "SET"]
+    assert program[0][1] == [("R", 1), 5, 2]
+    assert program[2][1] == [("R", 2), 7, 4]
+
+    monkeypatch.chdir(tmp_path)  # string sources include relative to the cwd
+    program, _labels = assemble('.include "lib.tgpu"\nCLAMP R3, 1\n')
+    assert program[0][1] == [("R", 3), 1, 2]
+
+
+def test_data_section_initializes_memory(tmp_path):
+    path = _write(
+        tmp_path / "d.tgpu",
+        """
+.const N 4
+.data 16
+table:
+    .word 1, 2, 3
+    N * 10
+zeros:
+    .fill N, -1
+.text
+    SET R0, table
+    SET R1, zeros
+""",
+    )
+    program, _ = assemble_file(path)
+    assert program.data == [(16, [1, 2, 3]), (19, [40]), (20, [-1] * 4)]
+    assert program[0][1] == [("R", 0), 16] and program[1][1] == [("R", 1), 20]
+    gpu = TinyGPU(num_threads=1, mem_size=32, record_history=False)
+    gpu.load_program(program)
+    assert gpu.memory[16:24].tolist() == [1, 2, 3, 40, -1, -1, -1, -1]
+
+
+def test_cache_is_invalidated_when_a_source_changes(tmp_path):
+    lib = _write(tmp_path / "lib.tgpu", ".const N 3\n")
+    path = _write(tmp_path / "main.tgpu", '.include "lib.tgpu"\nSET R0, N\n')
+    first, _ = assemble_file(path)
+    first[0][1][1] = 99  # callers get copies
+    assert assemble_file(path)[0][0] == ("SET", [("R", 0), 3])
+    _write(lib, ".const N 5\n;\n")
+    assert assemble_file(path)[0][0] == ("SET", [("R", 0), 5])
+
+
+def test_forward_references_are_patched():
+    program, labels = assemble("""
+    JMP end
+    SET R0, LATER
+    LD R1, table + 1
+end:
+.const LATER 7
+.data 8
+table:
+    1, 2
+""")
+    assert program[0] == ("JMP", [3])
+    assert program[1] == ("SET", [("R", 0), 7])
+    assert program[2] == ("LD", [("R", 1), 9])
+
+
+def test_predicated_instructions():
+    program, _ = assemble("CMP R0, 1\n@gt ADD R1, R1, 1\n@LE SEL R2, R0, 1, 2\n")
+    assert program[1] == ("@GT ADD", [("R", 1), ("R", 1), 1])
+    assert program[2] == ("@LE SEL", [("R", 2), ("R", 0), 1, 2])
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("SET R0, 1\nJMP nowhere\n", ":2:5: undefined symbol 'nowhere'"),
+        ("SET R0, 1\n  FOO R1\n", ":2:3: unknown instruction 'FOO'"),
+        ("ADD R1, R2\n", ":1:1: ADD takes 3 operands, got 2"),
+        ("SET 4, R1\n", ":1:5: expected a register, got '4'"),
+        ("SET R1,  2 +\n", ":1:10: bad expression"),
+        ("@XX ADD R1, R1, 1\n", ":1:1: unknown predicate '@XX'"),
+        ("@GT  JMP 0\n", ":1:6: JMP cannot be predicated"),
+        (".data\n.fill LATER\n.const LATER 2\n", ":2:7: 'LATER' must be defined"),
+        ("SET R0, 1 << 40\n", ":1:9: value 1099511627776 of '1 << 40' does not"),
+        ("JMP end\n.const end 1 << 31\n", ":1:5: value 2147483648 of 'end' does not"),
+    ],
+)
+def test_errors_report_file_line_and_column(source, message):
+    with pytest.raises(AssemblyError, match=re.escape("bad.tgpu" + message)):
+        assemble(source, path="bad.tgpu")
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from tinygpu.autotune import Autotuner, ExpectMemory, expand_space, kernel_hash
+from tinygpu.gpu import TinyGPU
+
+N = 12
+# out[i] = 2 * in[i] for i = tid, tid + stride, ... < N  (R0 = N, R1 = stride)
+DOUBLE = [
+    ("ADD", [("R", 2), ("R", 7), 0]),
+    ("CMP", [("R", 2), ("R", 0)]),  # loop:
+    ("BRLT", [4]),
+    ("JMP", [10]),
+    ("LD", [("R", 3), ("R", 2)]),  # body:
+    ("ADD", [("R", 3), ("R", 3), ("R", 3)]),
+    ("ADD", [("R", 4), ("R", 2), 32]),
+    ("ST", [("R", 4), ("R", 3)]),
+    ("ADD", [("R", 2), ("R", 2), ("R", 1)]),
+    ("JMP", [1]),
+]
+SPACE = [
+    {"num_blocks": b, "threads_per_block": t, "args": [N, b * t]}
+    for b in (1, 2, 3)
+    for t in (1, 2, 4)
+]
+
+
+def init_inputs(gpu, config):
+    gpu.memory[:N] = np.arange(N)
+
+
+def test_expand_space_and_hash():
+    configs = expand_space({"num_blocks": [1, 2], "threads_per_block": [4]})
+    assert configs == [
+        {"num_blocks": 1, "threads_per_block": 4},
+        {"num_blocks": 2, "threads_per_block": 4},
+    ]
+    assert kernel_hash(DOUBLE) == kernel_hash(list(DOUBLE))
+    assert kernel_hash(DOUBLE) != kernel_hash(DOUBLE[:-1])
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_tune_verifies_caches_and_reuses(tmp_path, processes):
+    tuner = Autotuner(processes=processes, cache_dir=tmp_path, mem_size=64)
+    bad_space = SPACE + [{"num_blocks": 2, "threads_per_block": 4, "args": [N, 1]}]
+    result = tuner.tune(
+        DOUBLE,
+        space=bad_space,
+        setup=init_inputs,
+        verify=ExpectMemory(32, np.arange(N) * 2),
+        problem_size=N,
+    )
+    assert not result.cached
+    assert len(result.trials) == len(bad_space)
+    # the wrong stride recomputes elements but still passes; more threads win
+    assert result.best == {"num_blocks": 3, "threads_per_block": 4, "args": [N, 12]}
+    assert all(t.ok for t in result.trials)
+    cycles = {t.config["args"][1]: t.counters["cycles"] for t in result.trials[:-1]}
+    assert cycles[12] < cycles[1]
+
+    again = tuner.tune(DOUBLE, space=SPACE, problem_size=N)
+    assert again.cached and again.best == result.best
+    assert tuner.best(DOUBLE, problem_size=N + 1) is None
+
+    gpu = TinyGPU(num_threads=1, mem_size=64)
+    init_inputs(gpu, None)
+    config = tuner.load_kernel(gpu, DOUBLE, problem_size=N)
+    assert gpu.num_threads == 12 and config == result.best
+    gpu.run()
+    assert gpu.memory[32 : 32 + N].tolist() == (np.arange(N) * 2).tolist()
+
+
+def test_failing_configurations_are_rejected(tmp_path):
+    tuner = Autotuner(processes=1, cache_dir=tmp_path, mem_size=64, max_cycles=50)
+    space = [
+        {"num_blocks": 1, "threads_per_block": 4, "args": [N, 0]},  # never ends
+        {"num_blocks": 1, "threads_per_block": 2, "args": [N, 2]},
+        {"num_blocks": 1, "threads_per_block": 2, "args": [N, 4]},  # skips items
+        {"num_blocks": 1, "threads_per_block": 2, "bogus": 1},
+    ]
+    result = tuner.tune(
+        DOUBLE,
+        space=space,
+        setup=init_inputs,
+        verify=ExpectMemory(32, np.arange(N) * 2),
+        problem_size="small",
+    )
+    errors = [t.error for t in result.trials]
+    assert errors[0] == "did not finish"
+    assert errors[1] is None
+    assert errors[2] == "wrong output"
+    assert "unknown config keys" in errors[3]
+    assert result.best == space[1]
+    with pytest.raises(KeyError):
+        tuner.load_kernel(TinyGPU(), DOUBLE, problem_size="large")
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from tinygpu.cache import Cache, CacheConfig, CacheHierarchy
+from tinygpu.gpu import TinyGPU
+
+# every thread sums memory[0..7]
+SUM8 = [
+    ("SET", [("R", 0), 0]),
+    ("SET", [("R", 1), 0]),
+    ("LD", [("R", 2), ("R", 1)]),  # loop:
+    ("ADD", [("R", 0), ("R", 0), ("R", 2)]),
+    ("ADD", [("R", 1), ("R", 1), 1]),
+    ("BNE", [("R", 1), 8, 2]),
+    ("ADD", [("R", 3), ("R", 7), 16]),
+    ("ST", [("R", 3), ("R", 0)]),
+]
+
+
+@pytest.mark.parametrize("engine", ["thread", "vector"])
+def test_hierarchy_counts_per_pc_and_block(engine):
+    gpu = TinyGPU(num_threads=4, mem_size=32, engine=engine)
+    gpu.set_grid(2, 1)  # two blocks of one thread
+    gpu.memory[:8] = np.arange(8)
+    cache = CacheHierarchy(
+        l1=CacheConfig(size=8, line_size=4, assoc=2),
+        l2=CacheConfig(size=32, line_size=4, assoc=4, policy="fifo"),
+    )
+    gpu.attach(cache)
+    gpu.load_program(SUM8)
+    gpu.run()
+    assert gpu.memory[16:18].tolist() == [28, 28]
+
+    l1, l2 = cache.stats["L1"], cache.stats["L2"]
+    assert (cache.stats.reads, cache.stats.writes) == (16, 2)
+    # per block: 2 cold line misses for the loads, 1 for the store
+    assert l1.pc_misses[2] == 4 and l1.pc_hits[2] == 12
+    assert l1.block_misses.tolist() == [3, 3]
+    # the block that misses second finds each line in L2
+    assert (l2.hits, l2.misses) == (3, 3)
+    assert "L1: 12 hits, 6 misses" in cache.summary()
+
+
+def test_lru_and_fifo_eviction():
+    results = {}
+    for policy in ("lru", "fifo"):
+        cache = Cache(CacheConfig(size=2, line_size=1, assoc=2, policy=policy))
+        a, b, c = 0, 1, 2
+        hits = cache.access(np.zeros(5, dtype=int), [a, b, a, c, a])
+        results[policy] = hits.tolist()
+    assert results["lru"] == [False, False, True, False, True]
+    assert results["fifo"] == [False, False, True, False, False]
+
+
+def test_stats_per_kernel_and_invalid_config():
+    gpu = TinyGPU(num_threads=2, mem_size=8)
+    cache = CacheHierarchy(l1=CacheConfig(size=4, line_size=2))
+    gpu.attach(cache)
+    for _ in range(2):
+        gpu.load_program([("LD", [("R", 0), ("R", 7)])])
+        gpu.run()
+    first, second = cache.kernels
+    assert (first["L1"].misses, second["L1"].hits) == (1, 2)
+    assert "L2" not in first.levels
+
+    with pytest.raises(ValueError):
+        CacheConfig(size=6, line_size=4)
+    with pytest.raises(ValueError):
+        CacheConfig(policy="random")
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from tinygpu.assembler import assemble
+from tinygpu.checkpoint import STATE_ARRAYS, read_header
+from tinygpu.gpu import TinyGPU
+
+KERNEL = """
+.data 32
+bias:
+    100
+.text
+    SET R0, 0
+loop:
+    LD R1, R7
+    ADD R1, R1, R6
+    ST R7, R1
+    SHST R6, R1
+    SYNCB
+    ADD R0, R0, 1
+    BNE R0, 5, loop
+    LD R2, bias
+    ADD R2, R2, R7
+    ST R7, R2
+"""
+
+
+def _start(engine="thread"):
+    program, labels = assemble(KERNEL)
+    gpu = TinyGPU(num_threads=6, mem_size=64, record_history=False, engine=engine)
+    gpu.memory[:6] = np.arange(6) * 3
+    gpu.load_kernel(program, labels, grid=(2, 3), args=[0], shared_size=3)
+    return gpu
+
+
+def _assert_same_state(a, b):
+    for name in STATE_ARRAYS:
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+    assert (a.cycle, a.instructions_executed) == (b.cycle, b.instructions_executed)
+
+
+@pytest.mark.parametrize("mmap_mode", ["c", None])
+def test_resume_matches_uninterrupted_run(tmp_path, mmap_mode):
+    reference = _start()
+    reference.run()
+
+    gpu = _start()
+    gpu.run(max_cycles=4)
+    gpu.save_state(tmp_path / "run.ckpt")
+    saved = (tmp_path / "run.ckpt").read_bytes()
+    del gpu
+
+    resumed = TinyGPU.load_state(tmp_path / "run.ckpt", mmap_mode=mmap_mode)
+    assert resumed.cycle == 4 and resumed.active.any()
+    assert (resumed.num_blocks, resumed.threads_per_block) == (2, 3)
+    assert resumed.program.data == [(32, [100])]
+    resumed.run()
+    _assert_same_state(resumed, reference)
+    assert (tmp_path / "run.ckpt").read_bytes() == saved  # copy-on-write
+
+
+def test_run_writes_periodic_checkpoints(tmp_path):
+    gpu = _start("vector")
+    gpu.run(checkpoint_every=2, checkpoint_path=tmp_path / "c{cycle}.ckpt")
+    names = {p.name for p in tmp_path.iterdir()}
+    assert names == {f"c{c}.ckpt" for c in range(2, gpu.cycle + 1, 2)}
+
+    header, _offset = read_header(tmp_path / "c4.ckpt")
+    assert header["config"]["engine"] == "vector" and header["cycle"] == 4
+    resumed = TinyGPU.load_state(tmp_path / "c4.ckpt", engine="thread")
+    assert resumed.engine == "thread"
+    resumed.run()
+    _assert_same_state(resumed, gpu)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "x.ckpt"
+    path.write_bytes(b"not a checkpoint")
+    with pytest.raises(ValueError, match="not a TinyGPU checkpoint"):
+        TinyGPU.load_state(path)
+    with pytest.raises(ValueError, match="checkpoint_path"):
+        TinyGPU().run(checkpoint_every=10)
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from tinygpu.assembler import assemble
+from tinygpu.debug import BarrierBreakpoint, Debugger, PCBreakpoint, Watchpoint
+from tinygpu.gpu import TinyGPU
+
+KERNEL = """
+    SET R0, 0
+loop:
+    LD R1, R7
+    ADD R1, R1, R6
+    ST R7, R1
+    SHST R6, R1
+mark:
+    SYNCB
+    ADD R0, R0, 1
+    BNE R0, 3, loop
+    ST R7, R0
+"""
+
+ENGINES = ["thread", "vector"]
+
+
+def _start(engine):
+    program, labels = assemble(KERNEL)
+    gpu = TinyGPU(num_threads=6, mem_size=32, record_history=False, engine=engine)
+    gpu.memory[:6] = np.arange(6) * 3
+    gpu.load_kernel(program, labels, grid=(2, 3), args=[0], shared_size=3)
+    return gpu
+
+
+def _final(engine):
+    gpu = _start(engine)
+    gpu.run(100)
+    return gpu
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_pc_breakpoint_inside_straight_line_run(engine):
+    gpu = _start(engine)
+    dbg = Debugger(gpu)
+    bp = dbg.break_at(gpu.labels["loop"] + 2, blocks=[1])  # ST, mid-run
+    hits = dbg.run(100)
+    assert [h.breakpoint for h in hits] == [bp]
+    assert hits[0].threads.tolist() == [3, 4, 5]
+    assert hits[0].cycle == gpu.cycle == 1
+    assert "at pc 3" in str(hits[0])
+
+    # continuing stops at the next iteration, then runs to the same result
+    assert dbg.run(100)[0].cycle > 1
+    dbg.clear()
+    assert dbg.run(100) == []
+    final = _final(engine)
+    assert np.array_equal(gpu.memory, final.memory)
+    assert gpu.cycle == final.cycle
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_pc_breakpoint_by_label_and_thread(engine):
+    gpu = _start(engine)
+    dbg = Debugger(gpu)
+    dbg.break_at("mark", threads=[4])
+    (hit,) = dbg.run(100)
+    assert hit.threads.tolist() == [4]
+    with pytest.raises(KeyError):
+        dbg.break_at("missing")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_write_and_value_watchpoints(engine):
+    gpu = _start(engine)
+    dbg = Debugger(gpu)
+    write = dbg.watch(4)
+    (hit,) = dbg.run(100)
+    assert hit.breakpoint is write and hit.threads.tolist() == [4]
+    dbg.remove(write)
+
+    # memory[5] = 15 + 2 per iteration; becomes 21 after the third one
+    dbg.watch(5, value=21)
+    (hit,) = dbg.run(100)
+    assert isinstance(hit.breakpoint, Watchpoint) and gpu.memory[5] == 21
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_shared_watchpoint_and_barrier_breakpoint(engine):
+    gpu = _start(engine)
+    dbg = Debugger(gpu)
+    dbg.watch(1, space="shared", block=1)
+    (hit,) = dbg.run(100)
+    assert hit.blocks.tolist() == [1] and gpu.shared[1, 1] == 13
+    dbg.clear()
+
+    barrier = dbg.break_on_barrier("syncb")
+    (hit,) = dbg.run(100)
+    assert isinstance(hit.breakpoint, BarrierBreakpoint)
+    assert hit.breakpoint is barrier and hit.blocks.tolist() == [0, 1]
+    assert not gpu.sync_waiting_block.any()
+
+
+def test_no_conditions_leave_run_unchanged():
+    gpu = _start("vector")
+    dbg = Debugger(gpu)
+    assert gpu.pc_watch is None
+    assert dbg.run(100) == []
+    assert np.array_equal(gpu.memory, _final("vector").memory)
+    assert isinstance(dbg.break_at(0), PCBreakpoint)
+    dbg.detach()
+    assert gpu.pc_watch is None and dbg not in gpu.observers
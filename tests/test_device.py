@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tinygpu.assembler import assemble_file
+from tinygpu.device import Context
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_vector_add_sharded_across_devices(processes):
+    program, labels = assemble_file(EXAMPLES / "vector_add.tgpu")
+    grid = (3, 2)  # 6 threads over 3 blocks
+    a, b = np.arange(6), np.arange(6) * 10
+    with Context(num_devices=2, mem_size=32, processes=processes) as ctx:
+        ctx.scatter(a, offset=0, grid=grid)
+        ctx.scatter(b, offset=8, grid=grid)
+        results = ctx.launch(program, labels, grid=grid)
+        c = ctx.gather(offset=16, count=6, grid=grid)
+
+        assert [(r.device, r.first_block, r.num_blocks) for r in results] == [
+            (0, 0, 2),
+            (1, 2, 1),
+        ]
+        assert all(r.finished for r in results)
+        assert c.tolist() == (a + b).tolist()
+        # each device only computed (and only holds) its own shard
+        assert ctx[0].copy_to_host(16, 6).tolist() == [0, 11, 22, 33, 0, 0]
+        assert ctx[1].copy_to_host(16, 6).tolist() == [0, 0, 0, 0, 44, 55]
+
+
+def test_peer_copy_and_errors():
+    with Context(num_devices=2, mem_size=16, processes=True) as ctx:
+        ctx[0].copy_from_host([7, 8, 9], offset=2)
+        ctx[0].copy_to(ctx[1], src_offset=2, dst_offset=10, count=3)
+        assert ctx[1].copy_to_host(10, 3).tolist() == [7, 8, 9]
+        assert ctx[1].copy_to_host(0, 10).tolist() == [0] * 10
+
+        with pytest.raises(RuntimeError, match="MemoryFault"):
+            ctx.launch([("LD", [("R", 0), 99])], grid=(2, 1))
+        # the workers survive a failed launch
+        results = ctx.launch([("ST", [("R", 7), ("R", 7)])], grid=(2, 2))
+        assert ctx.gather(0, 4, grid=(2, 2)).tolist() == [0, 1, 2, 3]
+        assert [r.cycles for r in results] == [1, 1]
@@ -0,0 +1,32 @@
+import numpy as np
+from tinygpu import vector
+from tinygpu.fuzz import check_case, fuzz, random_case
+
+
+def test_random_cases_agree_across_engines():
+    assert fuzz(iterations=60, seed=100) == []
+
+
+def test_random_case_is_deterministic_and_terminates():
+    a, b = random_case(7), random_case(7)
+    assert a.program == b.program and np.array_equal(a.memory, b.memory)
+    gpu = a.run()
+    assert not gpu.active.any()
+
+
+def test_engine_bug_is_found_and_minimized(monkeypatch):
+    def buggy_mul(gpu, tids, rd, op1, op2):
+        vector.vec_mul(gpu, tids, rd, op1, op2)
+        if op2 == 0:  # forget to zero the result
+            gpu.registers[tids, rd[1]] = 1
+
+    monkeypatch.setitem(vector.VECTOR_INSTRUCTIONS, vector.ins.op_mul, buggy_mul)
+    failures = fuzz(iterations=30, seed=0)
+    assert failures
+    failure = failures[0]
+    assert check_case(failure.case) is not None
+    minimized = failure.minimized
+    assert check_case(minimized) is not None
+    assert len(minimized.program) < len(failure.case.program)
+    assert minimized.num_threads == 1
+    assert any(ins == "MUL" and args[2] == 0 for ins, args in minimized.program)
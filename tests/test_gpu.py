@@ -1,4 +1,6 @@
 import numpy as np
+import pytest
+from tinygpu.assembler import assemble
 from tinygpu.gpu import TinyGPU
 
 
@@ -41,3 +43,121 @@ def test_tinygpu_step_and_run():
     gpu.step()
     # LOAD sets R0=1, then ADD sets R0=2 in the same step
     assert np.all(gpu.registers[:, 0] == 2)
+
+
+def test_grid_setup_and_relaunch():
+    gpu = TinyGPU(num_threads=4, num_registers=8, mem_size=16)
+    gpu.set_grid(3, 2, shared_size=2, block_offset=1)
+    assert gpu.registers[:, 5].tolist() == [1, 1, 2, 2, 3, 3]
+    assert gpu.registers[:, 6].tolist() == [0, 1, 0, 1, 0, 1]
+    assert gpu.registers[:, 7].tolist() == [2, 3, 4, 5, 6, 7]
+
+    # same grid shape: state arrays (and shared memory) are reused
+    registers, shared = gpu.registers, gpu.shared
+    program = [("ADD", [("R", 2), ("R", 0), ("R", 1)]), ("ST", [("R", 7), ("R", 2)])]
+    gpu.load_kernel(program, grid=(3, 2), args=[5, 1], shared_size=2)
+    assert gpu.registers is registers and gpu.shared is shared
+    gpu.run()
+    assert gpu.memory[:6].tolist() == [6] * 6
+
+    gpu.registers[:, 4] = 9
+    gpu.relaunch(args=[7, 3])
+    assert gpu.registers is registers
+    assert gpu.registers[:, 4].tolist() == [0] * 6
+    gpu.run()
+    assert gpu.memory[:6].tolist() == [10] * 6
+    assert gpu.kernel_args == [7, 3]
+
+
+def test_relaunch_keeps_global_memory():
+    program, labels = assemble("""
+    .data 0
+    .word 5
+    .text
+        CMP R7, 0
+        BRGT done
+        LD R1, R7
+        ADD R1, R1, 1
+        ST R7, R1
+    done:
+    """)
+    gpu = TinyGPU(num_threads=2, num_registers=8, mem_size=8)
+    gpu.load_kernel(program, labels, grid=(1, 2))
+    gpu.run()
+    assert gpu.memory[0] == 6
+    gpu.relaunch()
+    gpu.run()
+    assert gpu.memory[0] == 7  # .data is not written again
+    gpu.load_program(program, labels)
+    assert gpu.memory[0] == 5
+
+
+# each thread sums its block's inputs through shared memory, then stores
+# block id * 100 + the sum; blocks run different trip counts
+RESIDENT_KERNEL = """
+    SHST R6, R7
+    SYNCB
+    SET R2, 0
+    SET R3, 0
+loop:
+    SHLD R4, R3
+    ADD R2, R2, R4
+    ADD R3, R3, 1
+    BNE R3, 4, loop
+    MOD R4, R5, 3
+wait:
+    SUB R4, R4, 1
+    BNE R4, -1, wait
+    MUL R4, R5, 100
+    ADD R2, R2, R4
+    ADD R2, R2, R0
+    ST R7, R2
+"""
+
+
+def _resident_run(engine, resident_blocks, max_cycles=1000):
+    program, labels = assemble(RESIDENT_KERNEL)
+    gpu = TinyGPU(num_threads=4, mem_size=64, engine=engine, record_history=False)
+    gpu.load_kernel(
+        program,
+        labels,
+        grid=(10, 4),
+        args=[1000],
+        shared_size=4,
+        resident_blocks=resident_blocks,
+    )
+    gpu.run(max_cycles)
+    return gpu
+
+
+def test_resident_blocks_match_full_grid():
+    expected = _resident_run("thread", None)
+    assert expected.num_threads == 40
+    for engine in ("thread", "vector"):
+        gpu = _resident_run(engine, 3)
+        assert gpu.num_threads == 12 and gpu.shared.shape == (3, 4)
+        assert gpu.memory.tolist() == expected.memory.tolist()
+        assert not gpu.active.any() and gpu.next_block == 10
+        assert sorted(gpu.slot_blocks.tolist()) == [7, 8, 9]
+        assert gpu.cycle > expected.cycle
+
+    gpu.memory[:] = 0
+    gpu.relaunch(args=[2000])
+    gpu.run(1000)
+    assert gpu.memory[39] == 2000 + 9 * 100 + sum(range(36, 40))
+
+
+def test_resident_blocks_checkpoint_and_sync(tmp_path):
+    gpu = _resident_run("vector", 2, max_cycles=12)
+    assert 2 < gpu.next_block < 10
+    gpu.save_state(tmp_path / "run.ckpt")
+    resumed = TinyGPU.load_state(tmp_path / "run.ckpt")
+    assert resumed.slot_blocks.tolist() == gpu.slot_blocks.tolist()
+    assert (resumed.grid_blocks, resumed.next_block) == (10, gpu.next_block)
+    resumed.run(1000)
+    assert resumed.memory.tolist() == _resident_run("thread", None).memory.tolist()
+
+    with pytest.raises(ValueError, match="SYNC"):
+        TinyGPU(num_threads=4).load_kernel(
+            [("SYNC", [])], grid=(4, 2), resident_blocks=2
+        )
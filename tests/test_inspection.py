@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from tinygpu.assembler import assemble
+from tinygpu.gpu import TinyGPU
+from tinygpu.inspection import state_view, thread_table
+
+KERNEL = """
+SHST R6, R7
+SYNCB
+ADD R2, R7, 100
+ST R7, R2
+"""
+
+
+def _gpu():
+    program, labels = assemble(KERNEL)
+    gpu = TinyGPU(num_threads=8, mem_size=64)
+    gpu.load_kernel(program, labels, grid=(4, 2), shared_size=2, args=[9])
+    gpu.step()
+    return gpu
+
+
+def test_state_view_is_a_read_only_live_view():
+    gpu = _gpu()
+    view = state_view(gpu, blocks=(1, 3), registers=slice(5, 8), memory=(0, 8))
+    assert view.tids.tolist() == [2, 3, 4, 5]
+    assert view.registers.shape == (4, 3)
+    assert np.shares_memory(view.registers, gpu.registers)
+    assert view.shared.tolist() == [[2, 3], [4, 5]]
+    assert view.pc.tolist() == [2] * 4  # past the SYNCB
+    with pytest.raises(ValueError):
+        view.memory[0] = 1
+    gpu.run()
+    assert view.memory.tolist() == list(range(100, 108))
+
+    picked = state_view(gpu, threads=[0, 7], registers=[0, 2])
+    assert picked.registers.tolist() == [[9, 100], [9, 107]]
+    with pytest.raises(ValueError):
+        state_view(gpu, blocks=0, threads=0)
+
+
+def test_thread_table_has_one_row_per_thread():
+    gpu = _gpu()
+    table = thread_table(gpu, blocks=[3, 0], registers=[0, 7])
+    assert table.dtype.names[-2:] == ("R0", "R7")
+    assert table["tid"].tolist() == [6, 7, 0, 1]
+    assert table["block"].tolist() == [3, 3, 0, 0]
+    assert table["thread"].tolist() == [0, 1, 0, 1]
+    assert table["R0"].tolist() == [9] * 4
+    assert table["pc"].tolist() == [2] * 4 and table["active"].all()
+    assert not table["waiting_syncb"].any()
+    assert len(thread_table(gpu)) == gpu.num_threads
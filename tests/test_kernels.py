@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tinygpu import kernels
+from tinygpu.assembler import assemble_file
+from tinygpu.gpu import TinyGPU
+
+ENGINES = ("thread", "vector")
+rng = np.random.default_rng(7)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("n", [1, 5, 64, 300])
+def test_reduce_and_scans(engine, n):
+    x = rng.integers(-1000, 1000, size=n)
+    assert kernels.reduce(x, engine=engine) == x.sum()
+    assert kernels.reduce(x, "min", engine=engine) == x.min()
+    assert kernels.reduce(x, "max", engine=engine, threads_per_block=8) == x.max()
+    inclusive = np.cumsum(x)
+    got = kernels.inclusive_scan(x, engine=engine, threads_per_block=16)
+    assert got.tolist() == inclusive.tolist()
+    got = kernels.exclusive_scan(x, engine=engine)
+    assert got.tolist() == [0] + inclusive[:-1].tolist()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_histogram_sort_matmul_stencil(engine):
+    x = rng.integers(-3, 20, size=257)
+    expected = np.bincount(x[(x >= 0) & (x < 16)], minlength=16)
+    assert kernels.histogram(x, 16, engine=engine).tolist() == expected.tolist()
+    assert kernels.sort(x, engine=engine).tolist() == sorted(x.tolist())
+
+    a = rng.integers(-9, 9, size=(7, 5))
+    b = rng.integers(-9, 9, size=(5, 9))
+    assert (kernels.matmul(a, b, engine=engine) == a @ b).all()
+
+    w = [1, -2, 3]
+    padded = np.pad(x, 1, mode="edge")
+    expected = np.convolve(padded, w[::-1], mode="valid")
+    assert kernels.stencil(x, w, engine=engine).tolist() == expected.tolist()
+
+
+def test_results_wrap_and_inputs_are_checked():
+    big = np.full(4, 2**30)
+    assert kernels.reduce(big) == np.int32(4 * 2**30 - 2**32)
+    assert kernels.reduce([]) == 0 and kernels.sort([3]).tolist() == [3]
+    with pytest.raises(ValueError):
+        kernels.reduce([2**40])
+    with pytest.raises(TypeError):
+        kernels.sort([1.5, 2.5])
+    with pytest.raises(ValueError):
+        kernels.matmul(np.ones((2, 3), int), np.ones((2, 3), int))
+    with pytest.raises(ValueError):
+        kernels.stencil([1, 2], [1, 1])
+    x = np.random.default_rng(0).integers(-1000, 1000, 100)
+    for kernel in (kernels.reduce, kernels.inclusive_scan, kernels.sort):
+        with pytest.raises(ValueError, match="power of two"):
+            kernel(x, threads_per_block=48)
+    assert kernels.reduce(x, threads_per_block=32) == x.sum()
+
+
+def test_bitonic_sort_beats_odd_even_example():
+    n = 64
+    x = rng.integers(0, 100, size=n)
+    stats = {}
+    kernels.sort(x, stats=stats)
+
+    path = Path(__file__).parent.parent / "examples" / "odd_even_sort.tgpu"
+    program, labels = assemble_file(path, defines={"N": n})
+    gpu = TinyGPU(num_threads=n // 2, mem_size=n + 1, record_history=False)
+    gpu.memory[:n] = x
+    gpu.memory[n] = 2**31 - 1
+    gpu.load_program(program[:-1], labels)  # without the final spin loop
+    gpu.run(max_cycles=10_000)
+    assert gpu.memory[:n].tolist() == sorted(x.tolist())
+    assert stats["launches"] == 1 and stats["cycles"] * 3 < gpu.cycle
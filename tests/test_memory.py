@@ -0,0 +1,108 @@
+import pytest
+from tinygpu.gpu import TinyGPU
+from tinygpu.memory import MemoryFault
+
+ENGINES = ("thread", "vector")
+
+
+def _run(program, engine, policy, **grid):
+    gpu = TinyGPU(num_threads=4, mem_size=8, engine=engine, fault_policy=policy)
+    if grid:
+        gpu.set_grid(**grid)
+    gpu.memory[:] = range(8)
+    gpu.load_program(program)
+    gpu.run(max_cycles=20)
+    return gpu
+
+
+# thread t loads memory[t * 3] and stores it + 10 at memory[t * 3 - 1]
+STRIDED = [
+    ("MUL", [("R", 1), ("R", 7), 3]),
+    ("LD", [("R", 2), ("R", 1)]),
+    ("ADD", [("R", 1), ("R", 1), -1]),
+    ("ADD", [("R", 2), ("R", 2), 10]),
+    ("ST", [("R", 1), ("R", 2)]),
+]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_raise_reports_thread_pc_and_address(engine):
+    program = [("ADD", [("R", 1), ("R", 7), -1]), ("ST", [("R", 1), ("R", 7)])]
+    with pytest.raises(MemoryFault) as info:
+        _run(program, engine, "raise")
+    fault = info.value
+    assert isinstance(fault, IndexError)
+    assert (fault.space, fault.tid, fault.pc, fault.address) == ("global", 0, 1, -1)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_clamp_ignore_and_record(engine):
+    clamp = _run(STRIDED, engine, "clamp")
+    # t0 stores to -1 -> 0; t3 loads 9 -> 7 and stores 8 -> 7
+    assert clamp.memory.tolist() == [10, 1, 13, 3, 4, 16, 6, 17]
+    assert clamp.faults == []
+
+    ignore = _run(STRIDED, engine, "ignore")
+    # t0's store and t3's load/store are dropped
+    assert ignore.memory.tolist() == [0, 1, 13, 3, 4, 16, 6, 7]
+
+    record = _run(STRIDED, engine, "record")
+    assert record.memory.tolist() == ignore.memory.tolist()
+    faults = sorted((f["tid"], f["pc"], f["address"]) for f in record.faults)
+    assert faults == [(0, 4, -1), (3, 1, 9), (3, 4, 8)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_cswap_and_shared_faults(engine):
+    cswap = [("CSWAP", [("R", 7), 7])]
+    gpu = _run(cswap, engine, "record")
+    assert gpu.memory.tolist() == list(range(8))
+    assert gpu.faults == []
+    with pytest.raises(MemoryFault):
+        _run([("CSWAP", [("R", 7), 8])], engine, "raise")
+
+    shared = [("SHST", [("R", 6), ("R", 7)]), ("SHLD", [("R", 0), ("R", 6)])]
+    grid = {"num_blocks": 2, "threads_per_block": 2, "shared_size": 1}
+    gpu = _run(shared, engine, "record", **grid)
+    assert gpu.shared.tolist() == [[0], [2]]
+    assert gpu.registers[:, 0].tolist() == [0, 0, 2, 0]
+    assert {(f["space"], f["tid"]) for f in gpu.faults} == {
+        ("shared", 1),
+        ("shared", 3),
+    }
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        TinyGPU(fault_policy="wrap")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_constant_bank_broadcast_and_faults(engine):
+    program = [
+        ("LDC", [("R", 0), 1]),  # uniform: one broadcast read
+        ("LDC", [("R", 1), ("R", 7)]),  # per-thread addresses
+        ("ADD", [("R", 2), ("R", 7), 2]),
+        ("LDC", [("R", 2), ("R", 2)]),  # t2, t3 out of range
+    ]
+    gpu = TinyGPU(num_threads=4, mem_size=8, engine=engine, fault_policy="record")
+    gpu.load_kernel(program, grid=(1, 4), constants=[40, 41, 42, 43])
+    gpu.run(max_cycles=5)
+    assert gpu.registers[:, 0].tolist() == [41] * 4
+    assert gpu.registers[:, 1].tolist() == [40, 41, 42, 43]
+    assert gpu.registers[:, 2].tolist() == [42, 43, 0, 0]
+    assert {(f["space"], f["tid"]) for f in gpu.faults} == {
+        ("constant", 2),
+        ("constant", 3),
+    }
+    with pytest.raises(ValueError):
+        gpu.constants[0] = 1  # read-only while kernels run
+
+    gpu.relaunch()
+    gpu.run(max_cycles=5)
+    assert gpu.registers[:, 0].tolist() == [41] * 4
+    gpu.relaunch(constants=[7, 8])
+    gpu.run(max_cycles=5)
+    assert gpu.registers[:, 0].tolist() == [8] * 4
+    with pytest.raises(MemoryFault):
+        _run([("LDC", [("R", 0), 0])], engine, "raise")
@@ -0,0 +1,56 @@
+import io
+import json
+import time
+import numpy as np
+import pytest
+from tinygpu.assembler import assemble
+from tinygpu.gpu import TinyGPU
+from tinygpu.monitor import Monitor, format_sample
+
+KERNEL = """
+    SET R0, 0
+loop:
+    ADD R0, R0, 1
+    ST R7, R0
+    BNE R0, 2000, loop
+    SYNCB
+"""
+
+
+def _gpu():
+    program, labels = assemble(KERNEL)
+    gpu = TinyGPU(num_threads=8, mem_size=16, record_history=False)
+    gpu.load_kernel(program, labels, grid=(2, 4))
+    return gpu
+
+
+def test_monitor_streams_samples(tmp_path):
+    gpu = _gpu()
+    seen = []
+    path = tmp_path / "run.jsonl"
+    out = io.StringIO()
+    with Monitor(gpu, 0.005, seen.append, str(path), progress=True, stream=out):
+        gpu.run(10_000)
+        time.sleep(0.02)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == len(seen) >= 2
+    final = seen[-1]
+    assert final["cycle"] == gpu.cycle and final["active"] == 0
+    assert final["instructions"] == gpu.instructions_executed
+    assert final["memory_touched"] == 8
+    assert final["waiting_syncb"] == [0, 0] and final["idle"] > 0
+    assert [s["cycle"] for s in lines] == sorted(s["cycle"] for s in lines)
+    assert out.getvalue().endswith(format_sample(final) + "\n")
+
+
+def test_sample_reports_barrier_waits():
+    gpu = _gpu()
+    monitor = Monitor(gpu, interval=10).start()
+    gpu.sync_waiting_block[[1, 2, 5]] = True
+    sample = monitor.sample()
+    assert sample["waiting_syncb"] == [2, 1] and sample["waiting_sync"] == 0
+    assert np.isclose(sample["cycles_per_sec"], 0)
+    assert monitor.stop() is monitor.last and monitor.samples == 1
+    with pytest.raises(ValueError):
+        Monitor(gpu, interval=0)
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from tinygpu.gpu import TinyGPU
+from tinygpu.optimizer import optimize
+
+# reduce_sum.tgpu: pairwise tree reduction of 8 values with 4 threads
+REDUCE = [
+    ("SET", [("R", 0), 0]),
+    ("SET", [("R", 1), 1]),
+    ("SET", [("R", 8), 0]),
+    ("MUL", [("R", 2), ("R", 7), 2]),  # phase_loop:
+    ("MUL", [("R", 2), ("R", 2), ("R", 1)]),
+    ("ADD", [("R", 2), ("R", 2), ("R", 0)]),
+    ("ADD", [("R", 3), ("R", 2), ("R", 1)]),
+    ("LD", [("R", 4), ("R", 2)]),
+    ("LD", [("R", 5), ("R", 3)]),
+    ("ADD", [("R", 6), ("R", 4), ("R", 5)]),
+    ("ST", [("R", 2), ("R", 6)]),
+    ("SYNC", []),
+    ("MUL", [("R", 1), ("R", 1), 2]),
+    ("ADD", [("R", 8), ("R", 8), 1]),
+    ("BNE", [("R", 8), 3, 3]),
+    ("JMP", [15]),  # done: JMP done
+]
+
+
+def _run(program, labels=None):
+    gpu = TinyGPU(num_threads=4, num_registers=12, mem_size=32)
+    gpu.memory[:8] = np.arange(1, 9)
+    gpu.load_program(program, labels)
+    gpu.run(max_cycles=100)
+    return gpu
+
+
+def test_reduce_sum_optimized_matches_and_hoists_invariant():
+    labels = {"phase_loop": 3, "done": 15}
+    program, new_labels = optimize(REDUCE, labels, num_registers=12)
+    assert np.array_equal(_run(program).memory, _run(REDUCE).memory)
+    assert _run(program).memory[0] == 36
+
+    loop = new_labels["phase_loop"]
+    body = program[loop:]
+    # tid * 2 is computed once, before the loop
+    assert ("MUL", [("R", 9), ("R", 7), 2]) in program[:loop]
+    assert not any(ins == "MUL" and args[1] == ("R", 7) for ins, args in body)
+    # base address 0 folded away, done-loop removed, back edge fixed up
+    assert len(program) < len(REDUCE)
+    assert program[-1] == ("BNE", [("R", 8), 3, loop])
+    assert new_labels["done"] == len(program)
+
+
+def test_without_spare_registers_code_is_not_renamed():
+    program, _labels = optimize(REDUCE, num_registers=9)
+    assert not any(("R", 9) in args for _ins, args in program)
+    assert np.array_equal(_run(program).memory, _run(REDUCE).memory)
+
+
+def test_constant_branches_and_copies():
+    program = [
+        ("SET", [("R", 0), 3]),
+        ("SET", [("R", 1), ("R", 7)]),
+        ("CMP", [("R", 0), 2]),
+        ("BRGT", [5]),
+        ("ST", [("R", 1), 99]),  # never executed
+        ("ADD", [("R", 2), ("R", 1), ("R", 0)]),
+        ("ST", [("R", 1), ("R", 2)]),
+    ]
+    optimized, _labels = optimize(program)
+    assert optimized == [
+        ("ADD", [("R", 2), ("R", 7), 3]),
+        ("ST", [("R", 7), ("R", 2)]),
+    ]
+    assert np.array_equal(_run(optimized).memory, _run(program).memory)
+
+
+def test_known_predicates_and_selects_are_folded():
+    program = [
+        ("SET", [("R", 0), 1]),
+        ("CMP", [("R", 0), 1]),
+        ("@Z ADD", [("R", 1), ("R", 7), 5]),
+        ("@NZ SET", [("R", 1), 0]),
+        ("SEL", [("R", 2), ("R", 0), ("R", 1), 7]),
+        ("CMP", [("R", 7), 1]),
+        ("@GT ADD", [("R", 2), ("R", 2), 1]),
+        ("ST", [("R", 7), ("R", 2)]),
+    ]
+    optimized, _labels = optimize(program)
+    assert optimized == [
+        ("ADD", [("R", 1), ("R", 7), 5]),
+        ("SET", [("R", 2), ("R", 1)]),  # R2 is kept where the predicate fails
+        ("CMP", [("R", 7), 1]),
+        ("@GT ADD", [("R", 2), ("R", 1), 1]),
+        ("ST", [("R", 7), ("R", 2)]),
+    ]
+    assert np.array_equal(_run(optimized).memory, _run(program).memory)
+
+
+def test_alu_constants_fold_with_wraparound():
+    program = [
+        ("SET", [("R", 0), 2**31 - 1]),
+        ("ADD", [("R", 1), ("R", 0), 1]),
+        ("DIV", [("R", 2), ("R", 1), 0]),
+        ("SHR", [("R", 3), ("R", 1), 28]),
+        ("SUB", [("R", 4), ("R", 3), ("R", 2)]),
+        ("ST", [("R", 7), ("R", 4)]),
+    ]
+    optimized, _labels = optimize(program)
+    assert optimized == [("ST", [("R", 7), -7])]
+    assert np.array_equal(_run(optimized).memory, _run(program).memory)
+
+
+def test_rejects_programs_it_cannot_reason_about():
+    with pytest.raises(ValueError, match="undefined label"):
+        optimize([("JMP", ["missing"])])
+    with pytest.raises(ValueError, match="unknown opcode"):
+        optimize([("LOAD", [("R", 0), 1])])
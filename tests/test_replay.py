@@ -0,0 +1,66 @@
+import numpy as np
+from tinygpu import vector
+from tinygpu.assembler import assemble_file
+from tinygpu.gpu import TinyGPU
+from tinygpu.replay import ReplayLog, ReplayRecorder, StateHasher
+from pathlib import Path
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def _record(engine="thread"):
+    program, labels = assemble_file(EXAMPLES / "block_shared_sum.tgpu")
+    gpu = TinyGPU(num_threads=8, mem_size=4096, engine=engine)
+    gpu.memory[:8] = np.arange(1, 9)
+    recorder = ReplayRecorder(page_size=256)
+    gpu.attach(recorder)
+    gpu.load_kernel(program, labels, grid=(2, 4), shared_size=4)
+    gpu.run()
+    return gpu, recorder.log
+
+
+def test_log_roundtrip_and_engines_agree(tmp_path):
+    gpu, log = _record()
+    assert log.num_cycles == gpu.cycle
+    path = tmp_path / "run.replay.npz"
+    log.save(path)
+    loaded = ReplayLog.load(path)
+    assert np.array_equal(loaded.hashes, log.hashes)
+    assert loaded.program == log.program
+
+    replayed = loaded.replay()
+    assert np.array_equal(replayed.memory, gpu.memory)
+    assert loaded.diff() is None
+    assert loaded.diff(engine="vector") is None
+
+
+def test_diff_reports_first_diverging_cell(monkeypatch):
+    _gpu, log = _record()
+
+    def buggy_add(gpu, tids, rd, op1, op2):
+        vector.vec_add(gpu, tids, rd, op1, op2)
+        if rd == ("R", 4) and op1 == ("R", 4):
+            gpu.registers[tids[tids == 4], 4] += 1
+
+    monkeypatch.setitem(vector.VECTOR_INSTRUCTIONS, vector.ins.op_add, buggy_add)
+    divergence = log.diff(engine="vector")
+    assert divergence is not None
+    assert (divergence.field, divergence.thread) == ("registers", 4)
+    assert divergence.index == (4, 4)
+    assert divergence.actual == divergence.expected + 1
+    assert "thread 4" in str(divergence)
+
+
+def test_incremental_memory_hash_matches_full_rehash():
+    gpu = TinyGPU(num_threads=4, mem_size=3000, fault_policy="clamp")
+    program = [
+        ("MUL", [("R", 0), ("R", 7), 997]),
+        ("ST", [("R", 0), ("R", 7)]),
+        ("CSWAP", [("R", 0), 2999]),
+    ]
+    recorder = ReplayRecorder(page_size=128)
+    gpu.attach(recorder)
+    gpu.load_program(program)
+    gpu.run()
+    fresh = StateHasher(gpu, page_size=128).hashes(gpu)
+    assert tuple(int(h) for h in recorder.log.hashes[-1]) == fresh
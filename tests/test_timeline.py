@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+from tinygpu.gpu import TinyGPU
+from tinygpu.timeline import TimelineRecorder, export_chrome_trace
+from tinygpu.trace import TraceReader, TraceWriter
+
+# thread 0 loops three times before the block barrier, the others wait
+PROGRAM = [
+    ("SET", [("R", 0), 0]),
+    ("BNE", [("R", 6), 0, 4]),
+    ("ADD", [("R", 0), ("R", 0), 1]),
+    ("BNE", [("R", 0), 3, 2]),
+    ("SYNCB", []),
+    ("ST", [("R", 7), ("R", 0)]),
+]
+
+
+def _gpu():
+    gpu = TinyGPU(num_threads=4, num_registers=8, mem_size=16)
+    gpu.set_grid(2, 2)
+    gpu.load_program(PROGRAM, {"loop": 2, "barrier": 4})
+    return gpu
+
+
+def _events(path):
+    with open(path) as f:
+        return json.load(f)["traceEvents"]
+
+
+def test_export_from_recorder_has_tracks_spans_and_counters():
+    gpu = _gpu()
+    recorder = TimelineRecorder()
+    gpu.attach(recorder)
+    gpu.run(max_cycles=50)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "timeline.json")
+        count = export_chrome_trace(recorder, path)
+        events = _events(path)
+    assert count == len(events)
+    names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert {"block 0", "block 1", "thread 1 (tid 3)"} <= names
+    waits = [e for e in events if e["name"] == "SYNCB wait"]
+    # thread 1 of every block waits while thread 0 loops
+    assert {(e["pid"], e["tid"]) for e in waits} >= {(1, 1), (2, 1)}
+    assert any(e["ph"] == "X" and e["name"] == "loop" for e in events)
+    finished = [e for e in events if e["name"] == "finished"]
+    assert len(finished) == 4
+    counters = [e for e in events if e["ph"] == "C"]
+    assert counters[-1]["args"]["finished"] == 4
+
+
+def test_export_from_trace_and_history_agree_on_wait_release():
+    with tempfile.TemporaryDirectory() as d:
+        trace_path = os.path.join(d, "run.trace")
+        gpu = _gpu()
+        with TraceWriter(trace_path, chunk_size=3) as writer:
+            gpu.attach(writer)
+            gpu.run(max_cycles=50)
+        with TraceReader(trace_path) as reader:
+            export_chrome_trace(reader, os.path.join(d, "a.json"))
+        export_chrome_trace(gpu, os.path.join(d, "b.json"))
+        a = _events(os.path.join(d, "a.json"))
+        b = _events(os.path.join(d, "b.json"))
+
+    # history only has PCs, so a wait may start one cycle early there; the
+    # barrier release (span end) must match the exact trace
+    def waits(events):
+        return sorted(
+            (e["pid"], e["tid"], e["ts"] + e["dur"])
+            for e in events
+            if e["name"] == "SYNCB wait"
+        )
+
+    assert waits(a) == waits(b) != []
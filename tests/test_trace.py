@@ -0,0 +1,63 @@
+import os
+import tempfile
+import numpy as np
+from tinygpu.gpu import TinyGPU
+from tinygpu.trace import TraceReader, TraceWriter
+
+PROGRAM = [
+    ("SET", [("R", 0), 0]),
+    ("ADD", [("R", 0), ("R", 0), ("R", 7)]),
+    ("ST", [("R", 7), ("R", 0)]),
+    ("SYNC", []),
+    ("ADD", [("R", 1), ("R", 1), 1]),
+    ("BNE", [("R", 1), 3, 1]),
+]
+
+
+def _run(record_history=True, trace_path=None, chunk_size=2):
+    gpu = TinyGPU(
+        num_threads=4, num_registers=8, mem_size=16, record_history=record_history
+    )
+    gpu.load_program(PROGRAM)
+    writer = None
+    if trace_path:
+        writer = TraceWriter(trace_path, chunk_size=chunk_size)
+        gpu.attach(writer)
+    gpu.run(max_cycles=50)
+    if writer:
+        writer.close()
+    return gpu
+
+
+def test_trace_reconstructs_history():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "run.trace")
+        gpu = _run(trace_path=path)
+        with TraceReader(path) as reader:
+            assert len(reader) == gpu.cycle == len(gpu.history_pc)
+            for cycle, state in reader.iter_states():
+                assert np.array_equal(state["registers"], gpu.history_registers[cycle])
+                assert np.array_equal(state["memory"], gpu.history_memory[cycle])
+                assert np.array_equal(state["pc"], gpu.history_pc[cycle])
+            last = reader.state_at(-1)
+            assert np.array_equal(last["memory"], gpu.memory)
+            assert not last["active"].any()
+            assert reader.program == PROGRAM
+
+            hist = reader.history(step=2)
+            assert hist.num_threads == 4
+            assert len(hist.history_pc) == (len(reader) + 1) // 2
+            assert np.array_equal(hist.history_registers[1], gpu.history_registers[2])
+
+
+def test_trace_without_in_memory_history():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "run.trace")
+        gpu = _run(record_history=False, trace_path=path, chunk_size=64)
+        assert gpu.history_registers == []
+        with TraceReader(path) as reader:
+            assert len(reader) == gpu.cycle
+            assert np.array_equal(
+                reader.state_at(len(reader) - 1)["memory"], gpu.memory
+            )
+            assert reader.initial_state()["memory"].sum() == 0
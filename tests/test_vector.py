@@ -0,0 +1,150 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tinygpu.assembler import assemble, assemble_file
+from tinygpu.gpu import TinyGPU
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def _run(name, engine, setup, **grid):
+    program, labels = assemble_file(EXAMPLES / name)
+    gpu = TinyGPU(num_threads=4, num_registers=8, mem_size=128, engine=engine)
+    if grid:
+        gpu.set_grid(**grid)
+    setup(gpu)
+    gpu.load_program(program, labels)
+    gpu.run(max_cycles=200)
+    return gpu
+
+
+def _sort_input(gpu):
+    gpu.memory[:8] = [5, 2, 7, 1, 8, 3, 6, 4]
+
+
+def _block_input(gpu):
+    gpu.memory[:8] = np.arange(1, 9)
+
+
+@pytest.mark.parametrize(
+    "name, setup, grid",
+    [
+        ("odd_even_sort.tgpu", _sort_input, {}),
+        (
+            "block_shared_sum.tgpu",
+            _block_input,
+            {"num_blocks": 2, "threads_per_block": 4, "shared_size": 4},
+        ),
+    ],
+)
+def test_vector_engine_matches_thread_engine(name, setup, grid):
+    ref = _run(name, "thread", setup, **grid)
+    vec = _run(name, "vector", setup, **grid)
+    assert vec.cycle == ref.cycle
+    assert vec.instructions_executed == ref.instructions_executed > 0
+    assert np.array_equal(vec.memory, ref.memory)
+    assert np.array_equal(vec.registers, ref.registers)
+    assert np.array_equal(vec.shared, ref.shared)
+    assert np.array_equal(vec.history_pc, ref.history_pc)
+
+
+def test_divergent_branches_and_overflow():
+    program = [
+        ("CMP", [("R", 7), 2]),
+        ("BRLT", [4]),
+        ("ADD", [("R", 0), ("R", 7), 100]),
+        ("JMP", [5]),
+        ("MUL", [("R", 0), ("R", 7), -1]),
+        ("ST", [("R", 7), ("R", 0)]),
+    ]
+    results = []
+    for engine in ("thread", "vector"):
+        gpu = TinyGPU(num_threads=4, engine=engine)
+        gpu.load_program(program)
+        gpu.run()
+        results.append((gpu.cycle, gpu.memory[:4].tolist()))
+    assert results[0] == results[1] == (2, [0, -1, 102, 103])
+
+    gpu = TinyGPU(num_threads=2, engine="vector")
+    gpu.load_program([("SET", [("R", 0), 2**31])])
+    with pytest.raises(OverflowError):
+        gpu.run()
+
+
+def test_predicated_instructions_and_select_stay_converged():
+    # |tid - 2| and min(tid, 2) without branches
+    program, _ = assemble("""
+    ADD R0, R7, -2
+    CMP R0, 0
+    @LT MUL R0, R0, -1
+    CMP R7, 2
+    SET R1, R7
+    @GE SET R1, 2
+    SEL R2, R6, 10, 20
+    ST R7, R0
+    ADD R3, R7, 8
+    ST R3, R1
+    ADD R3, R7, 16
+    ST R3, R2
+""")
+    results = []
+    for engine in ("thread", "vector"):
+        gpu = TinyGPU(num_threads=4, engine=engine)
+        gpu.set_grid(2, 2)
+        gpu.load_program(program)
+        gpu.run()
+        results.append((gpu.cycle, gpu.instructions_executed, gpu.memory.tolist()))
+    assert results[0] == results[1]
+    cycles, executed, memory = results[0]
+    assert cycles == 1 and executed == 4 * len(program)
+    assert memory[:4] == [2, 1, 0, 1]
+    assert memory[8:12] == [0, 1, 2, 2]
+    assert memory[16:20] == [20, 10, 20, 10]
+
+
+INT_MIN, INT_MAX = -(2**31), 2**31 - 1
+
+
+@pytest.mark.parametrize(
+    "op, a, b, expected",
+    [
+        ("SUB", 3, 10, -7),
+        ("SUB", INT_MIN, 1, INT_MAX),
+        ("ADD", INT_MAX, 1, INT_MIN),
+        ("MUL", 65536, 65536, 0),
+        ("DIV", -7, 2, -3),
+        ("DIV", 7, 0, -1),
+        ("DIV", INT_MIN, -1, INT_MIN),
+        ("MOD", -7, 2, -1),
+        ("MOD", 7, -2, 1),
+        ("MOD", 7, 0, 7),
+        ("MOD", INT_MIN, -1, 0),
+        ("AND", 12, 10, 8),
+        ("OR", 12, 10, 14),
+        ("XOR", 12, 10, 6),
+        ("SHL", 1, 31, INT_MIN),
+        ("SHL", 3, 33, 6),
+        ("SHR", -16, 2, -4),
+        ("SHR", 16, -1, 0),
+        ("MIN", -3, 2, -3),
+        ("MAX", -3, 2, 2),
+        ("NOT", 0, None, -1),
+        ("ABS", -5, None, 5),
+        ("ABS", INT_MIN, None, INT_MIN),
+    ],
+)
+def test_alu_semantics_match_across_engines(op, a, b, expected):
+    sources = [("R", 0)] + ([("R", 1)] if b is not None else [])
+    program = [("SET", [("R", 0), a]), ("SET", [("R", 1), b or 0])]
+    program.append((op, [("R", 2)] + sources))
+    for engine in ("thread", "vector"):
+        gpu = TinyGPU(num_threads=2, engine=engine)
+        gpu.load_program(program)
+        gpu.run()
+        assert gpu.registers[:, 2].tolist() == [expected] * 2
+
+
+def test_unknown_engine_rejected():
+    with pytest.raises(ValueError):
+        TinyGPU(engine="simd")
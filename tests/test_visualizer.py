@@ -0,0 +1,117 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from tinygpu.assembler import assemble  # noqa: E402
+from tinygpu.gpu import TinyGPU  # noqa: E402
+import imageio  # noqa: E402
+from tinygpu.visualizer import (  # noqa: E402
+    HistoryPyramid,
+    save_animation,
+    thread_groups,
+    visualize,
+)
+
+
+def _dense_stats(frames, starts, size, rows=None):
+    dense = np.stack(frames).astype(float)  # (cycles, rows, cols)
+    if rows is not None:
+        dense = dense[:, rows[0] : rows[1]]
+    bounds = np.append(starts, dense.shape[1])
+    out = {"min": [], "max": [], "mean": []}
+    for c in range(0, dense.shape[0], size):
+        cells = [
+            dense[c : c + size, a:b]
+            for a, b in zip(bounds[:-1], bounds[1:], strict=True)
+        ]
+        out["min"].append([x.min(axis=(0, 1)) for x in cells])
+        out["max"].append([x.max(axis=(0, 1)) for x in cells])
+        out["mean"].append([x.mean(axis=(0, 1)) for x in cells])
+    return {k: np.array(v).transpose(1, 2, 0) for k, v in out.items()}
+
+
+@pytest.mark.parametrize("k", [0, 1, 3])
+def test_pyramid_levels_match_dense_aggregation(k):
+    rng = np.random.default_rng(k)
+    frames = [rng.integers(-50, 50, size=(10, 3)) for _ in range(37)]
+    pyramid = HistoryPyramid(frames, [0, 4, 8], chunk=5)
+    expected = _dense_stats(frames, [0, 4, 8], 1 << k)
+    for name, got in zip(("min", "max", "mean"), pyramid.level(k), strict=True):
+        assert np.allclose(got, expected[name]), name
+
+    # halving a cached level gives the same result as streaming it
+    fresh = HistoryPyramid(frames, [0, 4, 8]).level(k + 1)
+    for a, b in zip(pyramid.level(k + 1), fresh, strict=True):
+        assert np.allclose(a, b)
+
+
+def test_pyramid_window_picks_level_and_zooms():
+    frames = [np.arange(8) + c for c in range(100)]  # (rows,) frames
+    pyramid = HistoryPyramid(frames, [0, 2], rows=(2, 6))
+    lo, hi, mean = pyramid.window(10, 50, width=10)  # 40 cycles -> bins of 4
+    assert lo.shape == (2, 1, 10)
+    assert lo[0, 0, 0] == 12 and hi[1, 0, 0] == 5 + 13
+    assert np.allclose(mean[0, 0], 12.5 + 4 * np.arange(10) + 1.5)
+    assert HistoryPyramid.level_for(1000, 1000) == 0
+    assert HistoryPyramid.level_for(1001, 1000) == 1
+
+
+def test_thread_groups():
+    gpu = TinyGPU(num_threads=256, record_history=False)
+    gpu.set_grid(4, 64)
+    assert thread_groups(gpu, 256, "thread")[1] == "thread"
+    assert thread_groups(gpu, 256, "auto", max_rows=64, cols=8)[1] == "warp"
+    starts, label = thread_groups(gpu, 256, "auto", max_rows=32, cols=8)
+    assert label == "block" and starts.tolist() == [0, 64, 128, 192]
+    starts, label = thread_groups(gpu, 256, "auto", max_rows=16, cols=8)
+    assert label == "128 threads" and len(starts) * 8 <= 16
+    with pytest.raises(ValueError):
+        thread_groups(gpu, 256, "lane")
+
+
+def test_visualize_aggregates_large_runs(monkeypatch):
+    program, labels = assemble("""
+        SET R0, 0
+    loop:
+        ADD R0, R0, 1
+        ST R7, R0
+        BNE R0, 300, loop
+        """)
+    gpu = TinyGPU(num_threads=128, num_registers=8, mem_size=128)
+    gpu.load_kernel(program, labels, grid=(4, 32))
+    gpu.run(1000)
+    monkeypatch.setattr(plt, "show", lambda: None)
+    fig = visualize(gpu, width=100, max_rows=32)
+    regs, mem, pcs = (ax.images[0].get_array() for ax in fig.axes[:3])
+    assert regs.shape == (4 * 8, 75)  # per block x regs, 300 cycles in bins of 4
+    assert mem.shape[0] <= 64 and pcs.shape == (4, 75)
+    plt.close(fig)
+
+    fig = visualize(gpu, cycles=(0, 50), threads=(0, 8), stat="max")
+    assert fig.axes[0].images[0].get_array().shape == (8 * 8, 50)
+    plt.close(fig)
+
+
+def test_save_animation_renders_in_parallel_in_order(tmp_path):
+    program, labels = assemble("""
+        SET R0, 0
+    loop:
+        ADD R0, R0, 1
+        ST R7, R0
+        BNE R0, 40, loop
+        """)
+    gpu = TinyGPU(num_threads=4, num_registers=8, mem_size=16)
+    gpu.load_program(program, labels)
+    gpu.run(100)
+    frames = {}
+    for workers in (1, 2):
+        path = tmp_path / f"run{workers}.gif"
+        save_animation(gpu, out_path=path, max_frames=3, dpi=20, workers=workers)
+        frames[workers] = imageio.mimread(path)
+    assert len(frames[1]) == 3
+    assert {f.shape[:2] for f in frames[1]} == {(120, 160)}
+    for a, b in zip(frames[1], frames[2], strict=True):
+        assert np.array_equal(a, b)